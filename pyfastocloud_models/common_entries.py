@@ -2,6 +2,7 @@ from mongoengine import EmbeddedDocument, fields, errors
 from pyfastogt.maker import Maker
 
 import pyfastocloud_models.constants as constants
+from pyfastocloud_models.utils.serializer import front_dict
 from pyfastocloud_models.utils.utils import is_valid_url
 
 
@@ -27,9 +28,7 @@ class Url(EmbeddedDocument, Maker):
         return True
 
     def to_front_dict(self) -> dict:
-        result = self.to_mongo()
-        result.pop('_cls')
-        return result.to_dict()
+        return front_dict(self)
 
     @staticmethod
     def generate_id():
@@ -73,8 +72,7 @@ class StreamLink(EmbeddedDocument, Maker):
         return True
 
     def to_front_dict(self) -> dict:
-        result = self.to_mongo()
-        return result.to_dict()
+        return front_dict(self)
 
     def update_entry(self, json: dict):
         Maker.update_entry(self, json)
@@ -115,8 +113,7 @@ class SrtKey(EmbeddedDocument, Maker):
         return True
 
     def to_front_dict(self) -> dict:
-        result = self.to_mongo()
-        return result.to_dict()
+        return front_dict(self)
 
     def update_entry(self, json: dict):
         Maker.update_entry(self, json)
@@ -141,6 +138,7 @@ class InputUrl(Url):
     PROGRAM_NUMBER_FIELD = 'program_number'
     MULTICAST_IFACE_FIELD = 'multicast_iface'
     SRT_KEY_FIELD = 'srt_key'
+    AVAILABLE_FIELD = 'available'
 
     MIN_PROGRAM_NUMBER = 0
     MAX_PROGRAM_NUMBER = constants.MAX_INTEGER_NUMBER
@@ -151,6 +149,8 @@ class InputUrl(Url):
     program_number = fields.IntField(min_value=MIN_PROGRAM_NUMBER, max_value=MAX_PROGRAM_NUMBER, required=False)
     multicast_iface = fields.StringField(required=False)
     srt_key = fields.EmbeddedDocumentField(SrtKey, required=False)
+    # last probe result, see ServiceSettings.probe_input_urls
+    available = fields.BooleanField(required=False)
 
     def __init__(self, *args, **kwargs):
         super(InputUrl, self).__init__(*args, **kwargs)
@@ -302,8 +302,7 @@ class Point(EmbeddedDocument, Maker):
         return True
 
     def to_front_dict(self) -> dict:
-        result = self.to_mongo()
-        return result.to_dict()
+        return front_dict(self)
 
     def update_entry(self, json: dict):
         Maker.update_entry(self, json)
@@ -363,8 +362,7 @@ class Size(EmbeddedDocument, Maker):
             self.height = height
 
     def to_front_dict(self) -> dict:
-        result = self.to_mongo()
-        return result.to_dict()
+        return front_dict(self)
 
     def __str__(self):
         return '{0}x{1}'.format(self.width, self.height)
@@ -415,8 +413,7 @@ class Logo(EmbeddedDocument, Maker):
             self.size = Size.make_entry(size)
 
     def to_front_dict(self) -> dict:
-        result = self.to_mongo()
-        return result.to_dict()
+        return front_dict(self)
 
 
 class RSVGLogo(EmbeddedDocument, Maker):
@@ -455,8 +452,7 @@ class RSVGLogo(EmbeddedDocument, Maker):
             self.size = Size.make_entry(size)
 
     def to_front_dict(self) -> dict:
-        result = self.to_mongo()
-        return result.to_dict()
+        return front_dict(self)
 
 
 class Rational(EmbeddedDocument, Maker):
@@ -505,8 +501,7 @@ class Rational(EmbeddedDocument, Maker):
             self.den = den
 
     def to_front_dict(self) -> dict:
-        result = self.to_mongo()
-        return result.to_dict()
+        return front_dict(self)
 
     def __str__(self):
         return '{0}:{1}'.format(self.num, self.den)
@@ -540,8 +535,7 @@ class HostAndPort(EmbeddedDocument, Maker):
             self.port = port
 
     def to_front_dict(self) -> dict:
-        result = self.to_mongo()
-        return result.to_dict()
+        return front_dict(self)
 
     def __str__(self):
         return '{0}:{1}'.format(self.host, self.port)
@@ -602,8 +596,7 @@ class MachineLearning(EmbeddedDocument, Maker):
             self.overlay = overlay
 
     def to_front_dict(self) -> dict:
-        result = self.to_mongo()
-        return result.to_dict()
+        return front_dict(self)
 
 
 class MetaUrl(EmbeddedDocument, Maker):
@@ -622,8 +615,7 @@ class MetaUrl(EmbeddedDocument, Maker):
         return True
 
     def to_front_dict(self) -> dict:
-        result = self.to_mongo()
-        return result.to_dict()
+        return front_dict(self)
 
     def update_entry(self, json: dict):
         Maker.update_entry(self, json)
@@ -674,5 +666,4 @@ class Phone(EmbeddedDocument, Maker):
             self.iso_code = iso_code
 
     def to_front_dict(self) -> dict:
-        result = self.to_mongo()
-        return result.to_dict()
+        return front_dict(self)
@@ -1,4 +1,5 @@
 from enum import IntEnum
+from functools import lru_cache
 
 MIN_COUNTRY_LENGTH = 2
 MAX_COUNTRY_LENGTH = 2048
@@ -16,11 +17,13 @@ AVAILABLE_LOCALES_PAIRS = [(DEFAULT_LOCALE, 'English'), ('ru', 'Russian')]
 
 
 def is_valid_locale_code(code: str) -> bool:
-    for locale in AVAILABLE_LOCALES_PAIRS:
-        if locale[0] == code:
-            return True
+    return code in _locale_codes()
 
-    return False
+
+# frozen lookup table built on the first use
+@lru_cache(maxsize=None)
+def _locale_codes() -> frozenset:
+    return frozenset(locale[0] for locale in AVAILABLE_LOCALES_PAIRS)
 
 
 # limits
@@ -157,7 +160,8 @@ ACTIVATION_KEY_LENGTH = 97
 MAX_VIDEO_DURATION_MSEC = (60 * 60 * 1000) * 24 * 365
 
 DEFAULT_COUNTRY = 'US'
-AVAILABLE_COUNTRIES = [('AF', 'Afghanistan'),
+# tuple of constant tuples, loaded as one folded constant instead of being built on import
+AVAILABLE_COUNTRIES = (('AF', 'Afghanistan'),
                        ('AX', 'Åland Islands'),
                        ('AL', 'Albania'),
                        ('DZ', 'Algeria'),
@@ -392,7 +396,7 @@ AVAILABLE_COUNTRIES = [('AF', 'Afghanistan'),
                        ('UA', 'Ukraine'),
                        ('AE', 'United Arab Emirates'),
                        ('GB', 'United Kingdom'),
-                       (DEFAULT_COUNTRY, 'United States'),
+                       ('US', 'United States'),
                        ('UM', 'United States Minor Outlying Islands'),
                        ('UY', 'Uruguay'),
                        ('UZ', 'Uzbekistan'),
@@ -405,15 +409,17 @@ AVAILABLE_COUNTRIES = [('AF', 'Afghanistan'),
                        ('EH', 'Western Sahara'),
                        ('YE', 'Yemen'),
                        ('ZM', 'Zambia'),
-                       ('ZW', 'Zimbabwe')]
+                       ('ZW', 'Zimbabwe'))
 
 
 def is_valid_country_code(code: str) -> bool:
-    for country in AVAILABLE_COUNTRIES:
-        if country[0] == code:
-            return True
+    return code in _country_codes()
+
 
-    return False
+# frozen lookup table built on the first use
+@lru_cache(maxsize=None)
+def _country_codes() -> frozenset:
+    return frozenset(country[0] for country in AVAILABLE_COUNTRIES)
 
 
 def round_value(value: float, precision=2):
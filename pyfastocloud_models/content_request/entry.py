@@ -5,6 +5,7 @@ from bson.objectid import ObjectId
 from mongoengine import Document, fields, errors
 from pyfastogt.maker import Maker
 
+from pyfastocloud_models.utils.serializer import raw_value
 from pyfastocloud_models.utils.utils import date_to_utc_msec
 
 
@@ -53,6 +54,15 @@ class ContentRequest(Document, Maker):
                 ContentRequest.CREATED_DATE_FIELD: self.created_date_utc_msec(),
                 ContentRequest.STATUS_FIELD: self.status}
 
+    # same dicts as to_front_dict of the matched requests, read from raw documents
+    @staticmethod
+    def iter_front_dicts(query=None):
+        for data in ContentRequest._get_collection().find(query or {}):
+            yield {ContentRequest.ID_FIELD: str(data['_id']), ContentRequest.TITLE_FIELD: data.get('title'),
+                   ContentRequest.TYPE_FIELD: raw_value(ContentRequest, data, 'type'),
+                   ContentRequest.CREATED_DATE_FIELD: date_to_utc_msec(raw_value(ContentRequest, data, 'created_date')),
+                   ContentRequest.STATUS_FIELD: raw_value(ContentRequest, data, 'status')}
+
     def created_date_utc_msec(self):
         return date_to_utc_msec(self.created_date)
 
@@ -8,6 +8,7 @@ import pyfastocloud_models.constants as constants
 from pyfastocloud_models.common_entries import HostAndPort
 from pyfastocloud_models.machine_entry import Machine
 from pyfastocloud_models.provider.entry_pair import ProviderPair
+from pyfastocloud_models.utils.serializer import raw_batches, raw_front_embedded, raw_value
 from pyfastocloud_models.utils.utils import date_to_utc_msec
 
 
@@ -42,6 +43,10 @@ class EpgUrl(EmbeddedDocument, Maker):
     def to_front_dict(self) -> dict:
         return {EpgUrl.ID_FIELD: self.get_id(), EpgUrl.URL_FIELD: self.url}
 
+    @staticmethod
+    def raw_to_front_dict(data: dict) -> dict:
+        return {EpgUrl.ID_FIELD: str(data['_id']), EpgUrl.URL_FIELD: raw_value(EpgUrl, data, EpgUrl.URL_FIELD)}
+
 
 class EpgSettings(Document, Maker):
     ID_FIELD = 'id'
@@ -62,10 +67,32 @@ class EpgSettings(Document, Maker):
     def all():
         return EpgSettings.objects.all()
 
+    @staticmethod
+    def all_light(stats=False):
+        if stats:
+            return EpgSettings.objects.all()
+        return EpgSettings.objects.exclude('stats')
+
     @staticmethod
     def get_by_id(sid: ObjectId):
         return EpgSettings.objects.get(id=sid)
 
+    @staticmethod
+    def latest_stat(sid: ObjectId) -> Machine:
+        node = EpgSettings.objects(id=sid).fields(id=1, slice__stats=-1).first()
+        if not node or not node.stats:
+            return None
+
+        return node.stats[-1]
+
+    @staticmethod
+    def latest_stats_for(sids: [ObjectId]) -> dict:
+        result = {}
+        for node in EpgSettings.objects(id__in=sids).fields(id=1, slice__stats=-1):
+            result[node.id] = node.stats[-1] if node.stats else None
+
+        return result
+
     DEFAULT_SERVICE_NAME = 'Epg'
     MIN_SERVICE_NAME_LENGTH = 3
     MAX_SERVICE_NAME_LENGTH = 30
@@ -73,6 +100,8 @@ class EpgSettings(Document, Maker):
     DEFAULT_SERVICE_HOST = '127.0.0.1'
     DEFAULT_SERVICE_PORT = 4317
 
+    RAW_BATCH_SIZE = 1000
+
     providers = fields.EmbeddedDocumentListField(ProviderPair, blank=True)
     urls = fields.EmbeddedDocumentListField(EpgUrl, blank=True)
 
@@ -213,3 +242,26 @@ class EpgSettings(Document, Maker):
                 EpgSettings.AUTO_UPDATE_FIELD: self.auto_update,
                 EpgSettings.AUTO_UPDATE_PERIOD_FIELD: self.auto_update_period,
                 EpgSettings.PROVIDERS_FIELD: providers, EpgSettings.MONITORING_FILED: self.monitoring}
+
+    # same dicts as to_front_dict of the matched epgs, built from raw documents without stats
+    @staticmethod
+    def iter_front_dicts(query=None, batch_size=RAW_BATCH_SIZE):
+        for batch in raw_batches(EpgSettings._get_collection().find(query or {}, {'stats': 0}), batch_size):
+            emails = ProviderPair.raw_emails(batch, EpgSettings.PROVIDERS_FIELD)
+            for data in batch:
+                yield EpgSettings._raw_front_dict(data, emails)
+
+    # private
+    @staticmethod
+    def _raw_front_dict(data: dict, emails: dict) -> dict:
+        urls = [EpgUrl.raw_to_front_dict(url) for url in data.get(EpgSettings.URLS_FIELD) or []]
+        return {EpgSettings.ID_FIELD: str(data['_id']), EpgSettings.NAME_FIELD: raw_value(EpgSettings, data, 'name'),
+                EpgSettings.HOST_FIELD: raw_front_embedded(EpgSettings, data, 'host'), EpgSettings.URLS_FIELD: urls,
+                EpgSettings.CREATED_DATE_FIELD: date_to_utc_msec(raw_value(EpgSettings, data, 'created_date')),
+                EpgSettings.AUTO_START_FIELD: raw_value(EpgSettings, data, 'auto_start'),
+                EpgSettings.ACTIVATION_KEY_FIELD: data.get('activation_key'),
+                EpgSettings.AUTO_UPDATE_FIELD: raw_value(EpgSettings, data, 'auto_update'),
+                EpgSettings.AUTO_UPDATE_PERIOD_FIELD: data.get('auto_update_period'),
+                EpgSettings.PROVIDERS_FIELD: ProviderPair.raw_front_dicts(data.get(EpgSettings.PROVIDERS_FIELD),
+                                                                          emails),
+                EpgSettings.MONITORING_FILED: raw_value(EpgSettings, data, 'monitoring')}
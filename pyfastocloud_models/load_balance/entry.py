@@ -8,6 +8,7 @@ import pyfastocloud_models.constants as constants
 from pyfastocloud_models.common_entries import HostAndPort
 from pyfastocloud_models.machine_entry import Machine
 from pyfastocloud_models.provider.entry_pair import ProviderPair
+from pyfastocloud_models.utils.serializer import raw_batches, raw_front_embedded, raw_value
 from pyfastocloud_models.utils.utils import date_to_utc_msec
 
 
@@ -30,10 +31,32 @@ class LoadBalanceSettings(Document, Maker):
     def all():
         return LoadBalanceSettings.objects.all()
 
+    @staticmethod
+    def all_light(stats=False):
+        if stats:
+            return LoadBalanceSettings.objects.all()
+        return LoadBalanceSettings.objects.exclude('stats')
+
     @staticmethod
     def get_by_id(sid: ObjectId):
         return LoadBalanceSettings.objects.get(id=sid)
 
+    @staticmethod
+    def latest_stat(sid: ObjectId) -> Machine:
+        node = LoadBalanceSettings.objects(id=sid).fields(id=1, slice__stats=-1).first()
+        if not node or not node.stats:
+            return None
+
+        return node.stats[-1]
+
+    @staticmethod
+    def latest_stats_for(sids: [ObjectId]) -> dict:
+        result = {}
+        for node in LoadBalanceSettings.objects(id__in=sids).fields(id=1, slice__stats=-1):
+            result[node.id] = node.stats[-1] if node.stats else None
+
+        return result
+
     DEFAULT_SERVICE_NAME = 'Load Balance'
     MIN_SERVICE_NAME_LENGTH = 3
     MAX_SERVICE_NAME_LENGTH = 30
@@ -47,6 +70,8 @@ class LoadBalanceSettings(Document, Maker):
     DEFAULT_CATCHUPS_HTTP_HOST = '0.0.0.0'
     DEFAULT_CATCHUPS_HTTP_PORT = 8000
 
+    RAW_BATCH_SIZE = 1000
+
     providers = fields.EmbeddedDocumentListField(ProviderPair, blank=True)
 
     name = fields.StringField(default=DEFAULT_SERVICE_NAME, max_length=MAX_SERVICE_NAME_LENGTH,
@@ -163,3 +188,30 @@ class LoadBalanceSettings(Document, Maker):
                 LoadBalanceSettings.AUTO_START_FIELD: self.auto_start,
                 LoadBalanceSettings.ACTIVATION_KEY_FIELD: self.activation_key,
                 LoadBalanceSettings.PROVIDERS_FIELD: providers, LoadBalanceSettings.MONITORING_FILED: self.monitoring}
+
+    # same dicts as to_front_dict of the matched load balancers, built from raw documents without stats
+    @staticmethod
+    def iter_front_dicts(query=None, batch_size=RAW_BATCH_SIZE):
+        for batch in raw_batches(LoadBalanceSettings._get_collection().find(query or {}, {'stats': 0}), batch_size):
+            emails = ProviderPair.raw_emails(batch, LoadBalanceSettings.PROVIDERS_FIELD)
+            for data in batch:
+                yield LoadBalanceSettings._raw_front_dict(data, emails)
+
+    # private
+    @staticmethod
+    def _raw_front_dict(data: dict, emails: dict) -> dict:
+        return {LoadBalanceSettings.ID_FIELD: str(data['_id']),
+                LoadBalanceSettings.NAME_FIELD: raw_value(LoadBalanceSettings, data, 'name'),
+                LoadBalanceSettings.HOST_FIELD: raw_front_embedded(LoadBalanceSettings, data, 'host'),
+                LoadBalanceSettings.CLIENTS_HOST: raw_front_embedded(LoadBalanceSettings, data, 'clients_host'),
+                LoadBalanceSettings.CATCHUPS_HOST_FIELD: raw_front_embedded(LoadBalanceSettings, data,
+                                                                            'catchups_http_host'),
+                LoadBalanceSettings.CATCHUPS_HTTP_ROOT_FIELD: raw_value(LoadBalanceSettings, data,
+                                                                        'catchups_hls_directory'),
+                LoadBalanceSettings.CREATED_DATE_FIELD: date_to_utc_msec(
+                    raw_value(LoadBalanceSettings, data, 'created_date')),
+                LoadBalanceSettings.AUTO_START_FIELD: raw_value(LoadBalanceSettings, data, 'auto_start'),
+                LoadBalanceSettings.ACTIVATION_KEY_FIELD: data.get('activation_key'),
+                LoadBalanceSettings.PROVIDERS_FIELD: ProviderPair.raw_front_dicts(
+                    data.get(LoadBalanceSettings.PROVIDERS_FIELD), emails),
+                LoadBalanceSettings.MONITORING_FILED: raw_value(LoadBalanceSettings, data, 'monitoring')}
@@ -1,11 +1,64 @@
+import re
+from bisect import bisect_left, bisect_right
+
 from mongoengine import EmbeddedDocument, fields, errors
 from pyfastogt.maker import Maker
 
+from pyfastocloud_models.utils.serializer import front_dict
+
+LOAD_AVERAGE_VALUE_RE = re.compile(r'\d+(?:\.\d+)?')
+# of load averages printed with the comma decimal separator, as '0,52, 0,58, 0,59'
+LOAD_AVERAGE_COMMA_VALUE_RE = re.compile(r'\d+(?:,\d+)?')
+
+
+# (1, 5, 15) minute values of a load average string, all None if it has not the three values
+def parse_load_average(load_average: str) -> (float, float, float):
+    if not load_average:
+        return None, None, None
+
+    if '.' in load_average:
+        matches = LOAD_AVERAGE_VALUE_RE.findall(load_average)
+    else:
+        matches = LOAD_AVERAGE_COMMA_VALUE_RE.findall(load_average)
+    if len(matches) != 3:
+        return None, None, None
+
+    return tuple(float(match.replace(',', '.')) for match in matches)
+
+
+# Fills the numeric load averages of the stats of the nodes stored before they existed by a $set of only them,
+# samples are matched by their timestamp so ones rotated out or added since the nodes were loaded don't stop
+# the others, returns the count of migrated nodes
+def migrate_load_average(nodes) -> int:
+    migrated = 0
+    for node in nodes:
+        modified = 0
+        for stat in node.stats:
+            if stat.load_average_1 is not None or not stat.load_average:
+                continue
+
+            stat.set_load_average(stat.load_average)
+            if stat.load_average_1 is None:
+                continue
+
+            query = {'_id': node.pk, 'stats': {'$elemMatch': {Machine.TIMESTAMP_FIELD: stat.timestamp,
+                                                              Machine.LOAD_AVERAGE_FIELD: stat.load_average}}}
+            fields_set = {'stats.$.' + field: getattr(stat, field) for field in Machine.LOAD_AVERAGE_FIELDS}
+            modified += node._get_collection().update_one(query, {'$set': fields_set}).modified_count
+
+        if modified:
+            migrated += 1
+
+    return migrated
+
 
 class Machine(EmbeddedDocument, Maker):
     CPU_FIELD = 'cpu'
     GPU_FIELD = 'gpu'
     LOAD_AVERAGE_FIELD = 'load_average'
+    LOAD_AVERAGE_1_FIELD = 'load_average_1'
+    LOAD_AVERAGE_5_FIELD = 'load_average_5'
+    LOAD_AVERAGE_15_FIELD = 'load_average_15'
     MEMORY_TOTAL_FIELD = 'memory_total'
     MEMORY_FREE_FIELD = 'memory_free'
     HDD_TOTAL_FIELD = 'hdd_total'
@@ -16,12 +69,21 @@ class Machine(EmbeddedDocument, Maker):
     TIMESTAMP_FIELD = 'timestamp'
     TOTAL_BYTES_IN_FIELD = 'total_bytes_in'
     TOTAL_BYTES_OUT_FIELD = 'total_bytes_out'
+    HDD_USED_FIELD = 'hdd_used'
+
+    LOAD_AVERAGE_FIELDS = (LOAD_AVERAGE_1_FIELD, LOAD_AVERAGE_5_FIELD, LOAD_AVERAGE_15_FIELD)
+    CHART_METRICS = (CPU_FIELD, GPU_FIELD, LOAD_AVERAGE_1_FIELD, LOAD_AVERAGE_5_FIELD, LOAD_AVERAGE_15_FIELD,
+                     MEMORY_TOTAL_FIELD, MEMORY_FREE_FIELD, HDD_TOTAL_FIELD, HDD_FREE_FIELD, HDD_USED_FIELD,
+                     BANDWIDTH_IN_FIELD, BANDWIDTH_OUT_FIELD, UPTIME_FIELD, TOTAL_BYTES_IN_FIELD, TOTAL_BYTES_OUT_FIELD)
 
     meta = {'allow_inheritance': False}
 
     cpu = fields.FloatField(required=True)
     gpu = fields.FloatField(required=True)
     load_average = fields.StringField(required=True)
+    load_average_1 = fields.FloatField(required=False)
+    load_average_5 = fields.FloatField(required=False)
+    load_average_15 = fields.FloatField(required=False)
     memory_total = fields.IntField(required=True)
     memory_free = fields.IntField(required=True)
     hdd_total = fields.IntField(required=True)
@@ -43,13 +105,20 @@ class Machine(EmbeddedDocument, Maker):
             return False
         return True
 
+    def clean(self):
+        if self.load_average_1 is None and self.load_average:
+            self.set_load_average(self.load_average)
+
+    def set_load_average(self, load_average: str):
+        self.load_average = load_average
+        self.load_average_1, self.load_average_5, self.load_average_15 = parse_load_average(load_average)
+
     @property
     def hdd_used(self):
         return self.hdd_total - self.hdd_free
 
     def to_front_dict(self) -> dict:
-        result = self.to_mongo()
-        return result.to_dict()
+        return front_dict(self)
 
     def update_entry(self, json: dict):
         Maker.update_entry(self, json)
@@ -63,7 +132,7 @@ class Machine(EmbeddedDocument, Maker):
 
         res, load_average = self.check_required_type(Machine.LOAD_AVERAGE_FIELD, str, json)
         if res:
-            self.load_average = load_average
+            self.set_load_average(load_average)
 
         res, memory_total = self.check_required_type(Machine.MEMORY_TOTAL_FIELD, int, json)
         if res:
@@ -108,7 +177,72 @@ class Machine(EmbeddedDocument, Maker):
     def __lt__(self, other):
         return self.timestamp < other.timestamp
 
+    @staticmethod
+    def downsample(stats: list, metric: str, start_timestamp: int, stop_timestamp: int, points: int,
+                   min_max=False) -> dict:
+        if metric not in Machine.CHART_METRICS:
+            raise ValueError('Invalid metric: {0}'.format(metric))
+
+        from pyfastocloud_models.utils.downsample import lttb_indices, min_max_indices
+
+        first = bisect_left(stats, Machine(timestamp=start_timestamp))
+        last = bisect_right(stats, Machine(timestamp=stop_timestamp))
+        timestamps = []
+        values = []
+        for i in range(first, last):
+            value = getattr(stats[i], metric)
+            if value is None:
+                continue
+
+            timestamps.append(stats[i].timestamp)
+            values.append(value)
+
+        if min_max:
+            indices = min_max_indices(values, points)
+        else:
+            indices = lttb_indices(timestamps, values, points)
+        return {Machine.TIMESTAMP_FIELD: [timestamps[i] for i in indices], metric: [values[i] for i in indices]}
+
+    @staticmethod
+    def average_load(stats: list, field=LOAD_AVERAGE_1_FIELD) -> float:
+        values = Machine._load_values(stats, field)
+        if not values:
+            return 0.0
+
+        return sum(values) / len(values)
+
+    @staticmethod
+    def percentile_load(stats: list, percentile: float, field=LOAD_AVERAGE_1_FIELD) -> float:
+        if not 0 <= percentile <= 100:
+            raise ValueError('Invalid percentile: {0}'.format(percentile))
+
+        values = sorted(Machine._load_values(stats, field))
+        if not values:
+            return 0.0
+
+        pos = (len(values) - 1) * percentile / 100
+        low = int(pos)
+        high = min(low + 1, len(values) - 1)
+        return values[low] + (values[high] - values[low]) * (pos - low)
+
     @staticmethod
     def default():
-        return Machine(cpu=0.0, gpu=0.0, load_average=str(), memory_total=0, memory_free=0, hdd_total=0, hdd_free=0,
+        return Machine(cpu=0.0, gpu=0.0, load_average=str(), load_average_1=0.0, load_average_5=0.0,
+                       load_average_15=0.0, memory_total=0, memory_free=0, hdd_total=0, hdd_free=0,
                        bandwidth_in=0, bandwidth_out=0, uptime=0, timestamp=0, total_bytes_in=0, total_bytes_out=0)
+
+    # private
+    @staticmethod
+    def _load_values(stats: list, field: str) -> [float]:
+        if field not in Machine.LOAD_AVERAGE_FIELDS:
+            raise ValueError('Invalid load average field: {0}'.format(field))
+
+        pos = Machine.LOAD_AVERAGE_FIELDS.index(field)
+        values = []
+        for stat in stats:
+            value = getattr(stat, field)
+            if value is None and stat.load_average:
+                value = parse_load_average(stat.load_average)[pos]
+            if value is not None:
+                values.append(value)
+        return values
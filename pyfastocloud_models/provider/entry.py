@@ -5,13 +5,13 @@ from bson.objectid import ObjectId
 from mongoengine import Document, fields, errors, PULL
 from pyfastogt.maker import Maker
 from pyfastogt.utils import is_valid_email
-from werkzeug.security import generate_password_hash, check_password_hash
 
 import pyfastocloud_models.constants as constants
 from pyfastocloud_models.epg.entry import EpgSettings
 from pyfastocloud_models.load_balance.entry import LoadBalanceSettings
 from pyfastocloud_models.service.entry import ServiceSettings
 from pyfastocloud_models.subscriber.entry import Subscriber
+from pyfastocloud_models.utils.serializer import raw_value
 from pyfastocloud_models.utils.utils import date_to_utc_msec
 
 
@@ -156,10 +156,12 @@ class Provider(Document, Maker):
 
     @staticmethod
     def generate_password_hash(password: str) -> str:
+        from werkzeug.security import generate_password_hash
         return generate_password_hash(password, method='sha256')
 
     @staticmethod
     def check_password_hash(hash_str: str, password: str) -> bool:
+        from werkzeug.security import check_password_hash
         return check_password_hash(hash_str, password)
 
     @classmethod
@@ -238,6 +240,13 @@ class Provider(Document, Maker):
                 Provider.LANGUAGE_FIELD: self.language, Provider.COUNTRY_FIELD: self.country,
                 Provider.CREDITS_REMAINING_FIELD: cred}
 
+    # same dicts as to_front_dict of the matched providers, read from raw documents without reference lists
+    @staticmethod
+    def iter_front_dicts(query=None):
+        projection = {'servers': 0, 'load_balancers': 0, 'epgs': 0}
+        for data in Provider._get_collection().find(query or {}, projection):
+            yield Provider._raw_front_dict(data)
+
     def delete(self, signal_kwargs=None, **write_concern):
         from pyfastocloud_models.service.entry import ServiceSettings
         servers = ServiceSettings.objects.all()
@@ -264,3 +273,18 @@ class Provider(Document, Maker):
         except errors.ValidationError:
             return False
         return True
+
+    # private
+    @staticmethod
+    def _raw_front_dict(data: dict) -> dict:
+        credits_count = raw_value(Provider, data, Provider.CREDITS_FIELD)
+        return {Provider.ID_FIELD: str(data['_id']), Provider.EMAIL_FIELD: data.get(Provider.EMAIL_FIELD),
+                Provider.PASSWORD_FIELD: data.get(Provider.PASSWORD_FIELD),
+                Provider.FIRST_NAME_FIELD: data.get(Provider.FIRST_NAME_FIELD),
+                Provider.LAST_NAME_FIELD: data.get(Provider.LAST_NAME_FIELD),
+                Provider.CREATED_DATE_FIELD: date_to_utc_msec(raw_value(Provider, data, Provider.CREATED_DATE_FIELD)),
+                Provider.STATUS_FIELD: raw_value(Provider, data, Provider.STATUS_FIELD),
+                Provider.CREDITS_FIELD: credits_count, Provider.TYPE_FIELD: raw_value(Provider, data, Provider.TYPE_FIELD),
+                Provider.LANGUAGE_FIELD: raw_value(Provider, data, Provider.LANGUAGE_FIELD),
+                Provider.COUNTRY_FIELD: data.get(Provider.COUNTRY_FIELD),
+                Provider.CREDITS_REMAINING_FIELD: credits_count - len(data.get('subscribers') or [])}
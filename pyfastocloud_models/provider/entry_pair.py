@@ -2,6 +2,8 @@ from enum import IntEnum
 
 from mongoengine import EmbeddedDocument, fields
 
+from pyfastocloud_models.utils.serializer import raw_value
+
 
 class ProviderPair(EmbeddedDocument):
     ID_FIELD = 'id'
@@ -29,3 +31,27 @@ class ProviderPair(EmbeddedDocument):
 
     def to_front_dict(self) -> dict:
         return {ProviderPair.ID_FIELD: self.user.get_id(), ProviderPair.ROLE_FIELD: self.role, 'email': self.user.email}
+
+    # same dicts as to_front_dict of the raw pairs, emails are {provider id: email} of raw_emails
+    @staticmethod
+    def raw_front_dicts(pairs: list, emails: dict) -> list:
+        result = []
+        for pair in pairs or []:
+            user = pair.get('user')
+            role = raw_value(ProviderPair, pair, 'role')
+            result.append({ProviderPair.ID_FIELD: str(user), ProviderPair.ROLE_FIELD: role, 'email': emails.get(user)})
+        return result
+
+    # {provider id: email} of the pairs under key of the raw documents, by one query
+    @staticmethod
+    def raw_emails(batch: list, key: str) -> dict:
+        from pyfastocloud_models.provider.entry import Provider
+
+        users = {pair.get('user') for data in batch for pair in data.get(key) or []}
+        if not users:
+            return {}
+
+        emails = {}
+        for provider in Provider._get_collection().find({'_id': {'$in': list(users)}}, {Provider.EMAIL_FIELD: 1}):
+            emails[provider['_id']] = provider.get(Provider.EMAIL_FIELD)
+        return emails
@@ -6,6 +6,7 @@ from pyfastogt.maker import Maker
 
 import pyfastocloud_models.constants as constants
 from pyfastocloud_models.stream.entry import IStream, ProxyVodStream, VodEncodeStream, VodRelayStream
+from pyfastocloud_models.utils.serializer import front_dict, raw_front_dict, raw_batches, raw_id, raw_date_msec
 from pyfastocloud_models.utils.utils import date_to_utc_msec
 
 
@@ -25,6 +26,17 @@ class Serial(Document, Maker):
     MIN_SERIES_NAME_LENGTH = 3
     MAX_SERIES_NAME_LENGTH = 30
 
+    # (key, func(serial), raw_func(data, refs)) of values computed for the front dict, refs are raw episodes
+    FRONT_FIELDS = ((CREATED_DATE_FIELD, lambda serial: serial.created_date_utc_msec(),
+                     raw_date_msec(CREATED_DATE_FIELD, datetime.now)),
+                    (ID_FIELD, lambda serial: serial.get_id(), raw_id),
+                    (VIEW_COUNT_FIELD, lambda serial: sum(episode.view_count for episode in serial.episodes),
+                     lambda data, refs: sum(episode.get(IStream.VIEW_COUNT_FIELD, 0)
+                                            for episode in Serial._raw_episodes(data, refs))),
+                    (EPISODES_FIELD, lambda serial: [episode.get_id() for episode in serial.episodes],
+                     lambda data, refs: [str(episode['_id']) for episode in Serial._raw_episodes(data, refs)]))
+    RAW_BATCH_SIZE = 1000
+
     meta = {'collection': 'series', 'allow_inheritance': False}
 
     @staticmethod
@@ -71,18 +83,20 @@ class Serial(Document, Maker):
             pass
 
     def to_front_dict(self) -> dict:
-        result = self.to_mongo()
-        result.pop('_id')
-        result[Serial.CREATED_DATE_FIELD] = self.created_date_utc_msec()
-        result[Serial.ID_FIELD] = self.get_id()
-        episodes = []
-        views = 0
-        for episode in self.episodes:
-            views += episode.view_count
-            episodes.append(episode.get_id())
-        result[Serial.VIEW_COUNT_FIELD] = views
-        result[Serial.EPISODES_FIELD] = episodes
-        return result.to_dict()
+        return front_dict(self, Serial.FRONT_FIELDS)
+
+    # same dicts as to_front_dict of the matched series, built from raw documents without loading series and episodes
+    @staticmethod
+    def iter_front_dicts(query=None, batch_size=RAW_BATCH_SIZE):
+        for batch in raw_batches(Serial._get_collection().find(query or {}), batch_size):
+            episodes = {episode for data in batch for episode in data.get(Serial.EPISODES_FIELD, [])}
+            refs = {}
+            if episodes:
+                projection = {IStream.VIEW_COUNT_FIELD: 1}
+                for episode in IStream._get_collection().find({'_id': {'$in': list(episodes)}}, projection):
+                    refs[episode['_id']] = episode
+            for data in batch:
+                yield raw_front_dict(Serial, data, Serial.FRONT_FIELDS, refs)
 
     def created_date_utc_msec(self):
         return date_to_utc_msec(self.created_date)
@@ -151,6 +165,17 @@ class Serial(Document, Maker):
             return False
         return True
 
+    # private
+    # raw episodes of the serial which still exist, as only they are loaded with the serial
+    @staticmethod
+    def _raw_episodes(data: dict, refs: dict) -> list:
+        episodes = []
+        for episode in data.get(Serial.EPISODES_FIELD, []):
+            ref = refs.get(episode)
+            if ref:
+                episodes.append(ref)
+        return episodes
+
 
 # if remove vod also clean parts
 ProxyVodStream.register_delete_rule(Serial, 'episodes', PULL)
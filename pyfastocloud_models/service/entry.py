@@ -4,14 +4,19 @@ from datetime import datetime
 from bson import ObjectId
 from mongoengine import Document, fields, errors, PULL
 from pyfastogt.maker import Maker
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
 
 import pyfastocloud_models.constants as constants
 from pyfastocloud_models.common_entries import HostAndPort
 from pyfastocloud_models.machine_entry import Machine
 from pyfastocloud_models.provider.entry_pair import ProviderPair
 from pyfastocloud_models.series.entry import Serial
-from pyfastocloud_models.stream.entry import IStream
-from pyfastocloud_models.utils.utils import date_to_utc_msec
+from pyfastocloud_models.stream.entry import IStream, ProxyStream, ProxyVodStream
+from pyfastocloud_models.utils.entry_parser import EntryField, parse_entry, patch_entry, msec_to_date, entry_of
+from pyfastocloud_models.utils.m3u_parser import M3uParser
+from pyfastocloud_models.utils.serializer import raw_batches, raw_front_embedded, raw_value
+from pyfastocloud_models.utils.utils import date_to_utc_msec, normalize_uri
 
 
 class ServiceSettings(Document, Maker):
@@ -37,6 +42,29 @@ class ServiceSettings(Document, Maker):
     AUTO_START_FIELD = 'auto_start'
     ACTIVATION_KEY_FIELD = 'activation_key'
     DESCRIPTION_FIELD = 'description'
+    STREAMS_FIELD = 'streams'
+
+    # json values update_entry parses into the service, in order
+    ENTRY_FIELDS = (EntryField(NAME_FIELD, str, required=True),
+                    EntryField(HOST_FIELD, dict, required=True, convert=entry_of(HostAndPort)),
+                    EntryField(HTTP_HOST_FIELD, dict, required=True, convert=entry_of(HostAndPort)),
+                    EntryField(VODS_HOST_FIELD, dict, required=True, convert=entry_of(HostAndPort)),
+                    EntryField(CODS_HOST_FIELD, dict, required=True, convert=entry_of(HostAndPort)),
+                    EntryField(NGINX_HOST_FIELD, dict, required=True, convert=entry_of(HostAndPort)),
+                    EntryField(RTMP_HOST_FIELD, dict, required=True, convert=entry_of(HostAndPort)),
+                    EntryField(FEEDBACK_DIRECOTRY_FIELD, str, required=True),
+                    EntryField(TIMESHIFTS_DIRECTORY_FIELD, str, required=True),
+                    EntryField(HLS_DIRECTORY_FIELD, str, required=True),
+                    EntryField(VODS_DIRECTORY_FIELD, str, required=True),
+                    EntryField(CODS_DIRECTORY_FIELD, str, required=True),
+                    EntryField(PROXY_DIRECTORY_FIELD, str, required=True),
+                    EntryField(DATA_DIRECTORY_FIELD, str, required=True),
+                    EntryField(PRICE_PACKAGE_FIELD, float, required=True),
+                    EntryField(CREATED_DATE_FIELD, int, convert=msec_to_date),
+                    EntryField(MONITORING_FILED, bool, required=True),
+                    EntryField(AUTO_START_FIELD, bool, required=True),
+                    EntryField(ACTIVATION_KEY_FIELD, str),
+                    EntryField(DESCRIPTION_FIELD, str))
 
     meta = {'collection': 'services', 'allow_inheritance': False}
 
@@ -44,10 +72,37 @@ class ServiceSettings(Document, Maker):
     def all():
         return ServiceSettings.objects.all()
 
+    @staticmethod
+    def all_light(stats=False, streams=False, series=False):
+        excluded = []
+        if not stats:
+            excluded.append('stats')
+        if not streams:
+            excluded.append('streams')
+        if not series:
+            excluded.append('series')
+        return ServiceSettings.objects.exclude(*excluded)
+
     @staticmethod
     def get_by_id(sid: ObjectId):
         return ServiceSettings.objects.get(id=sid)
 
+    @staticmethod
+    def latest_stat(sid: ObjectId) -> Machine:
+        node = ServiceSettings.objects(id=sid).fields(id=1, slice__stats=-1).first()
+        if not node or not node.stats:
+            return None
+
+        return node.stats[-1]
+
+    @staticmethod
+    def latest_stats_for(sids: [ObjectId]) -> dict:
+        result = {}
+        for node in ServiceSettings.objects(id__in=sids).fields(id=1, slice__stats=-1):
+            result[node.id] = node.stats[-1] if node.stats else None
+
+        return result
+
     DEFAULT_SERVICE_NAME = 'Service'
     MIN_SERVICE_NAME_LENGTH = 3
     MAX_SERVICE_NAME_LENGTH = 30
@@ -73,6 +128,9 @@ class ServiceSettings(Document, Maker):
     DEFAULT_SERVICE_RTMP_HOST = '0.0.0.0'
     DEFAULT_SERVICE_RTMP_PORT = 1935
 
+    IMPORT_BATCH_SIZE = 1000
+    RAW_BATCH_SIZE = 1000
+
     streams = fields.ListField(fields.ReferenceField(IStream), blank=True)
     series = fields.ListField(fields.ReferenceField(Serial, reverse_delete_rule=PULL), blank=True)
     providers = fields.EmbeddedDocumentListField(ProviderPair, blank=True)
@@ -157,6 +215,28 @@ class ServiceSettings(Document, Maker):
 
         return result / (stats_len - ind)
 
+    @staticmethod
+    def get_net_bytes_for(sids: [ObjectId], start_timestamp) -> dict:
+        pipeline = [{'$project': {'net_bytes': ServiceSettings._net_bytes_expression(start_timestamp)}}]
+        result = {}
+        for item in ServiceSettings.objects(id__in=sids).aggregate(pipeline):
+            # null of services without stats or with samples missing the fields
+            value = item.get('net_bytes')
+            result[item['_id']] = float(value) if value is not None else 0.0
+
+        return result
+
+    @staticmethod
+    def get_store_bytes_for(sids: [ObjectId], start_timestamp) -> dict:
+        pipeline = [{'$project': {'store_bytes': ServiceSettings._store_bytes_expression(start_timestamp)}}]
+        result = {}
+        for item in ServiceSettings.objects(id__in=sids).aggregate(pipeline):
+            # null of services without stats or with samples missing the fields
+            value = item.get('store_bytes')
+            result[item['_id']] = float(value) if value is not None else 0.0
+
+        return result
+
     def get_id(self) -> str:
         return str(self.pk)
 
@@ -233,6 +313,133 @@ class ServiceSettings(Document, Maker):
         if stream:
             self.streams.append(stream)
 
+    # Import M3uParser entries as proxy streams, returns {'imported': count, 'errors': [{index, title, error}]}
+    # entries with links already served by a stream of uri_index (StreamUriIndex) are reported and skipped,
+    # source is the id of the playlist reimport_m3u_streams syncs the streams by
+    def import_m3u_streams(self, files, vod=False, batch_size=IMPORT_BATCH_SIZE, uri_index=None, source=None) -> dict:
+        stream_class = ProxyVodStream if vod else ProxyStream
+        report = {'imported': 0, 'errors': []}
+        self._import_m3u_entries(enumerate(files), stream_class, batch_size, report, uri_index=uri_index,
+                                 source=source)
+        return report
+
+    # Import the playlist streamed from the url, batches are committed while it downloads. After every batch
+    # checkpoint {'offset', 'index'} is passed to on_checkpoint, giving it back resumes an interrupted import.
+    # Streams are imported with the normalized url as their source
+    def import_m3u_url(self, url: str, vod=False, batch_size=IMPORT_BATCH_SIZE, checkpoint=None,
+                       on_checkpoint=None, uri_index=None) -> dict:
+        stream_class = ProxyVodStream if vod else ProxyStream
+        start = checkpoint or {'offset': 0, 'index': 0}
+        report = {'imported': 0, 'errors': [], 'checkpoint': start}
+        offset = start['offset']
+
+        def entries():
+            nonlocal offset
+            for idx, (file, end) in enumerate(M3uParser.iter_m3u_url(url, start['offset']), start['index']):
+                offset = end
+                yield idx, file
+
+        def committed(idx: int):
+            report['checkpoint'] = {'offset': offset, 'index': idx + 1}
+            if on_checkpoint:
+                on_checkpoint(report['checkpoint'])
+
+        self._import_m3u_entries(entries(), stream_class, batch_size, report, committed, uri_index,
+                                 normalize_uri(url))
+        return report
+
+    # Sync streams previously imported from the source playlist with its new version by entry hashes,
+    # only added, changed and removed entries are written. Streams of other sources are not touched, streams
+    # without a source or a hash, imported before them or added by hand, are updated by the entries of their link
+    # and never removed.
+    def reimport_m3u_streams(self, files, vod=False, batch_size=IMPORT_BATCH_SIZE, source=None) -> dict:
+        stream_class = ProxyVodStream if vod else ProxyStream
+        report = {'imported': 0, 'updated': 0, 'removed': 0, 'unchanged': 0, 'errors': []}
+
+        stored = {}
+        legacy = {}
+        for doc in self._imported_stream_docs(stream_class, source):
+            file_hash = doc.get(ProxyStream.SOURCE_HASH_FIELD)
+            if file_hash and doc.get(ProxyStream.SOURCE_FIELD) == source:
+                stored.setdefault(file_hash, []).append(doc)
+            elif doc.get(IStream.OUTPUT_FIELD):
+                legacy.setdefault(doc[IStream.OUTPUT_FIELD][0]['uri'], []).append(doc['_id'])
+
+        added = []
+        for idx, file in enumerate(files):
+            file_hash = M3uParser.entry_hash(file)
+            docs = stored.get(file_hash)
+            if docs:
+                docs.pop()
+                if not docs:
+                    del stored[file_hash]
+                report['unchanged'] += 1
+            else:
+                added.append((idx, file))
+
+        # what is left was changed or removed, changed entries keep their link and stream id
+        outdated = {}
+        for docs in stored.values():
+            for doc in docs:
+                outdated.setdefault(doc[IStream.OUTPUT_FIELD][0]['uri'], []).append(doc['_id'])
+
+        new = []
+        updates = []
+        for idx, file in added:
+            sids = outdated.get(file.get('link')) or legacy.get(file.get('link'))
+            if sids:
+                updates.append((idx, file, sids.pop()))
+            else:
+                new.append((idx, file))
+
+        self._update_m3u_entries(updates, stream_class, report, source)
+        self._import_m3u_entries(new, stream_class, batch_size, report, source=source)
+
+        removed = [sid for sids in outdated.values() for sid in sids]
+        if removed:
+            ServiceSettings.objects(id=self.id).update_one(pull_all__streams=removed)
+            self._delete_streams(stream_class, removed)
+            report['removed'] += len(removed)
+        return report
+
+    # Probe http inputs of the service streams and store results in InputUrl.available,
+    # returns {sid: {input id: available}}, inputs without an id can't be updated and are not probed
+    def probe_input_urls(self, prober=None) -> dict:
+        own_prober = prober is None
+        if own_prober:
+            from pyfastocloud_models.utils.url_prober import UrlProber
+            prober = UrlProber()
+
+        try:
+            docs = list(IStream._get_collection().find(
+                {'_id': {'$in': self._stream_ids()}, 'input': {'$exists': True}},
+                {'input.id': 1, 'input.uri': 1, 'input.proxy': 1}))
+            probed = prober.probe_many([(url.get('uri'), url.get('proxy')) for doc in docs for url in doc['input']
+                                        if url.get('id') is not None])
+        finally:
+            if own_prober:
+                prober.close()
+
+        result = {}
+        requests = []
+        for doc in docs:
+            for url in doc['input']:
+                input_id = url.get('id')
+                if input_id is None:
+                    continue
+
+                available = probed.get((url.get('uri'), url.get('proxy')))
+                if available is None:
+                    continue
+
+                result.setdefault(doc['_id'], {})[input_id] = available
+                requests.append(UpdateOne({'_id': doc['_id'], 'input.id': input_id},
+                                          {'$set': {'input.$.available': available}}))
+
+        if requests:
+            IStream._get_collection().bulk_write(requests, ordered=False)
+        return result
+
     def remove_stream(self, stream: IStream):
         if stream:
             self.streams.remove(stream)
@@ -278,92 +485,16 @@ class ServiceSettings(Document, Maker):
         return super(ServiceSettings, self).delete(signal_kwargs, **write_concern)
 
     def update_entry(self, json: dict):
-        Maker.update_entry(self, json)
-        res, name = self.check_required_type(ServiceSettings.NAME_FIELD, str, json)
-        if res:  # required field
-            self.name = name
-
-        res, host = self.check_required_type(ServiceSettings.HOST_FIELD, dict, json)
-        if res:  # required field
-            self.host = HostAndPort.make_entry(host)
-
-        res, http_host = self.check_required_type(ServiceSettings.HTTP_HOST_FIELD, dict, json)
-        if res:  # required field
-            self.http_host = HostAndPort.make_entry(http_host)
-
-        res, vods_host = self.check_required_type(ServiceSettings.VODS_HOST_FIELD, dict, json)
-        if res:  # required field
-            self.vods_host = HostAndPort.make_entry(vods_host)
-
-        res, cods_host = self.check_required_type(ServiceSettings.CODS_HOST_FIELD, dict, json)
-        if res:  # required field
-            self.cods_host = HostAndPort.make_entry(cods_host)
-
-        res, nginx_host = self.check_required_type(ServiceSettings.NGINX_HOST_FIELD, dict, json)
-        if res:  # required field
-            self.nginx_host = HostAndPort.make_entry(nginx_host)
-
-        res, rtmp_host = self.check_required_type(ServiceSettings.RTMP_HOST_FIELD, dict, json)
-        if res:  # required field
-            self.rtmp_host = HostAndPort.make_entry(rtmp_host)
-
-        res, feedback = self.check_required_type(ServiceSettings.FEEDBACK_DIRECOTRY_FIELD, str, json)
-        if res:  # required field
-            self.feedback_directory = feedback
-
-        res, timeshift = self.check_required_type(ServiceSettings.TIMESHIFTS_DIRECTORY_FIELD, str, json)
-        if res:  # required field
-            self.timeshifts_directory = timeshift
-
-        res, hls = self.check_required_type(ServiceSettings.HLS_DIRECTORY_FIELD, str, json)
-        if res:  # required field
-            self.hls_directory = hls
-
-        res, vods = self.check_required_type(ServiceSettings.VODS_DIRECTORY_FIELD, str, json)
-        if res:  # required field
-            self.vods_directory = vods
-
-        res, cods = self.check_required_type(ServiceSettings.CODS_DIRECTORY_FIELD, str, json)
-        if res:  # required field
-            self.cods_directory = cods
-
-        res, proxy = self.check_required_type(ServiceSettings.PROXY_DIRECTORY_FIELD, str, json)
-        if res:  # required field
-            self.proxy_directory = proxy
-
-        res, data = self.check_required_type(ServiceSettings.DATA_DIRECTORY_FIELD, str, json)
-        if res:  # required field
-            self.data_directory = data
-
-        res, price_package = self.check_required_type(ServiceSettings.PRICE_PACKAGE_FIELD, float, json)
-        if res:  # required field
-            self.price_package = price_package
-
-        res, created_date_msec = self.check_optional_type(ServiceSettings.CREATED_DATE_FIELD, int, json)
-        if res:  # optional field
-            self.created_date = datetime.utcfromtimestamp(created_date_msec / 1000)
-
-        res, monitoring = self.check_required_type(ServiceSettings.MONITORING_FILED, bool, json)
-        if res:  # required field
-            self.monitoring = monitoring
-
-        res, auto_start = self.check_required_type(ServiceSettings.AUTO_START_FIELD, bool, json)
-        if res:  # required field
-            self.auto_start = auto_start
-
-        res, activation_key = self.check_optional_type(ServiceSettings.ACTIVATION_KEY_FIELD, str, json)
-        if res:  # optional field
-            self.activation_key = activation_key
-
-        res, description = self.check_optional_type(ServiceSettings.DESCRIPTION_FIELD, str, json)
-        if res:  # optional field
-            self.description = description
-
+        parse_entry(self, json, ServiceSettings.ENTRY_FIELDS)
         try:
             self.validate()
         except errors.ValidationError as err:
             raise ValueError(err.message)
 
+    # applies the keys of json to the saved service by one update of only their fields
+    def patch(self, json: dict) -> dict:
+        return patch_entry(self, json, ServiceSettings.ENTRY_FIELDS)
+
     def to_front_dict(self) -> dict:
         providers = []
         for prov in self.providers:
@@ -390,9 +521,173 @@ class ServiceSettings(Document, Maker):
                 ServiceSettings.CREATED_DATE_FIELD: self.created_date_utc_msec(),
                 ServiceSettings.PROVIDERS_FIELD: providers}
 
+    # same dicts as to_front_dict of the matched services, built from raw documents without stats and content lists
+    @staticmethod
+    def iter_front_dicts(query=None, batch_size=RAW_BATCH_SIZE):
+        projection = {'stats': 0, ServiceSettings.STREAMS_FIELD: 0, 'series': 0}
+        for batch in raw_batches(ServiceSettings._get_collection().find(query or {}, projection), batch_size):
+            emails = ProviderPair.raw_emails(batch, ServiceSettings.PROVIDERS_FIELD)
+            for data in batch:
+                yield ServiceSettings._raw_front_dict(data, emails)
+
     def is_valid(self) -> bool:
         try:
             self.validate()
         except errors.ValidationError:
             return False
         return True
+
+    # private
+    def _import_m3u_entries(self, files, stream_class, batch_size: int, report: dict, committed=None,
+                            uri_index=None, source=None):
+        batch = []
+        idx = None
+        for idx, file in files:
+            try:
+                if uri_index and uri_index.contains(file['link']):
+                    raise ValueError('Already served uri: {0}'.format(file['link']))
+                stream = stream_class.make_m3u_entry(file, source)
+                stream.pk = ObjectId()
+                stream.fixup_input_urls(self)
+                stream.fixup_output_urls(self)
+                stream.validate()
+            except (KeyError, ValueError, errors.ValidationError) as err:
+                report['errors'].append({'index': idx, 'title': file.get('title'), 'error': str(err)})
+                continue
+
+            if uri_index:
+                uri_index.add_stream(stream)
+            batch.append((idx, stream))
+            if len(batch) >= batch_size:
+                self._insert_streams(batch, report)
+                batch = []
+                if committed:
+                    committed(idx)
+
+        if batch:
+            self._insert_streams(batch, report)
+        if committed and idx is not None:
+            committed(idx)
+
+    @staticmethod
+    def _raw_front_dict(data: dict, emails: dict) -> dict:
+        result = {ServiceSettings.ID_FIELD: str(data['_id']),
+                  ServiceSettings.NAME_FIELD: raw_value(ServiceSettings, data, ServiceSettings.NAME_FIELD)}
+        for key in [ServiceSettings.HOST_FIELD, ServiceSettings.HTTP_HOST_FIELD, ServiceSettings.VODS_HOST_FIELD,
+                    ServiceSettings.CODS_HOST_FIELD, ServiceSettings.NGINX_HOST_FIELD, ServiceSettings.RTMP_HOST_FIELD]:
+            result[key] = raw_front_embedded(ServiceSettings, data, key)
+        for key in [ServiceSettings.FEEDBACK_DIRECOTRY_FIELD, ServiceSettings.TIMESHIFTS_DIRECTORY_FIELD,
+                    ServiceSettings.HLS_DIRECTORY_FIELD, ServiceSettings.VODS_DIRECTORY_FIELD,
+                    ServiceSettings.CODS_DIRECTORY_FIELD, ServiceSettings.PROXY_DIRECTORY_FIELD,
+                    ServiceSettings.DATA_DIRECTORY_FIELD, ServiceSettings.PRICE_PACKAGE_FIELD,
+                    ServiceSettings.MONITORING_FILED, ServiceSettings.AUTO_START_FIELD,
+                    ServiceSettings.ACTIVATION_KEY_FIELD, ServiceSettings.DESCRIPTION_FIELD]:
+            result[key] = raw_value(ServiceSettings, data, key)
+        result[ServiceSettings.CREATED_DATE_FIELD] = date_to_utc_msec(
+            raw_value(ServiceSettings, data, ServiceSettings.CREATED_DATE_FIELD))
+        result[ServiceSettings.PROVIDERS_FIELD] = ProviderPair.raw_front_dicts(
+            data.get(ServiceSettings.PROVIDERS_FIELD), emails)
+        return result
+
+    def _update_m3u_entries(self, updates: list, stream_class, report: dict, source=None):
+        requests = []
+        for idx, file, sid in updates:
+            try:
+                stream = stream_class.make_m3u_entry(file, source)
+                stream.pk = sid
+                stream.validate()
+            except (KeyError, ValueError, errors.ValidationError) as err:
+                report['errors'].append({'index': idx, 'title': file.get('title'), 'error': str(err)})
+                continue
+
+            # only playlist fields, everything set on the stream after import stays as is
+            son = stream.to_mongo()
+            changed = {IStream.GROUPS_FIELD: stream.groups}
+            removed = {}
+            for field in [IStream.NAME_FIELD, IStream.TVG_ID_FIELD, IStream.TVG_NAME_FIELD, IStream.ICON_FIELD,
+                          ProxyStream.SOURCE_HASH_FIELD, ProxyStream.SOURCE_FIELD]:
+                if field in son:
+                    changed[field] = son[field]
+                else:
+                    removed[field] = ''
+            update = {'$set': changed}
+            if removed:
+                update['$unset'] = removed
+            requests.append(UpdateOne({'_id': sid}, update))
+
+        if requests:
+            IStream._get_collection().bulk_write(requests, ordered=False)
+            report['updated'] += len(requests)
+
+    def _stream_ids(self) -> list:
+        node = ServiceSettings.objects(id=self.id).only(ServiceSettings.STREAMS_FIELD).as_pymongo().first()
+        if not node:
+            return []
+
+        return node.get(ServiceSettings.STREAMS_FIELD, [])
+
+    # streams of the source and streams without a source
+    def _imported_stream_docs(self, stream_class, source):
+        return IStream._get_collection().find(
+            {'_id': {'$in': self._stream_ids()}, '_cls': stream_class._class_name,
+             ProxyStream.SOURCE_FIELD: {'$in': [source, None]}},
+            {ProxyStream.SOURCE_HASH_FIELD: 1, ProxyStream.SOURCE_FIELD: 1, IStream.OUTPUT_FIELD + '.uri': 1})
+
+    # removes the streams from subscribers and series as IStream.delete does, by one update of each collection
+    @staticmethod
+    def _delete_streams(stream_class, sids: list):
+        from pyfastocloud_models.subscriber.entry import Subscriber, UserStream
+
+        user_fields = ['streams', 'vods', 'catchups']
+        official = {'sid': {'$in': sids}, UserStream.PRIVATE_FIELD: {'$ne': True}}
+        Subscriber._get_collection().update_many({'$or': [{field + '.sid': {'$in': sids}} for field in user_fields]},
+                                                 {'$pull': {field: official for field in user_fields}})
+        Serial._get_collection().update_many({Serial.EPISODES_FIELD: {'$in': sids}},
+                                             {'$pull': {Serial.EPISODES_FIELD: {'$in': sids}}})
+        stream_class.objects(id__in=sids).delete()
+
+    def _insert_streams(self, batch: list, report: dict):
+        failed = {}
+        try:
+            IStream._get_collection().insert_many([stream.to_mongo() for _, stream in batch], ordered=False)
+        except BulkWriteError as err:
+            for write_error in err.details.get('writeErrors', []):
+                failed[write_error['index']] = write_error.get('errmsg')
+
+        inserted = []
+        for pos, (idx, stream) in enumerate(batch):
+            if pos in failed:
+                report['errors'].append({'index': idx, 'title': stream.name, 'error': failed[pos]})
+            else:
+                inserted.append(stream)
+
+        if inserted:
+            # streams list is not touched in memory, it may be excluded from a light document
+            ServiceSettings.objects(id=self.id).update_one(push_all__streams=inserted)
+            report['imported'] += len(inserted)
+
+    @staticmethod
+    def _stats_after_expression(start_timestamp) -> dict:
+        return {'$filter': {'input': '$stats', 'as': 'stat', 'cond': {'$gt': ['$$stat.timestamp', start_timestamp]}}}
+
+    @staticmethod
+    def _net_bytes_expression(start_timestamp) -> dict:
+        # same as get_net_bytes: sum of positive total_bytes_out deltas between neighbour samples
+        delta = {'$cond': [{'$and': [{'$ne': ['$$value.prev', None]},
+                                     {'$lt': ['$$value.prev', '$$this.total_bytes_out']}]},
+                           {'$subtract': ['$$this.total_bytes_out', '$$value.prev']}, 0]}
+        reduced = {'$reduce': {'input': ServiceSettings._stats_after_expression(start_timestamp),
+                               'initialValue': {'prev': None, 'total': 0},
+                               'in': {'prev': '$$this.total_bytes_out', 'total': {'$add': ['$$value.total', delta]}}}}
+        return {'$let': {'vars': {'reduced': reduced}, 'in': '$$reduced.total'}}
+
+    @staticmethod
+    def _store_bytes_expression(start_timestamp) -> dict:
+        # same as get_store_bytes: average hdd usage after start_timestamp or the last sample if it matches exactly
+        hdd_used = {'$subtract': ['$$this.hdd_total', '$$this.hdd_free']}
+        last_used = {'$subtract': ['$$last.hdd_total', '$$last.hdd_free']}
+        return {'$let': {'vars': {'after': ServiceSettings._stats_after_expression(start_timestamp),
+                                  'last': {'$arrayElemAt': ['$stats', -1]}},
+                         'in': {'$cond': [{'$gt': [{'$size': '$$after'}, 0]},
+                                          {'$avg': {'$map': {'input': '$$after', 'in': hdd_used}}},
+                                          {'$cond': [{'$eq': ['$$last.timestamp', start_timestamp]}, last_used, 0]}]}}}
@@ -0,0 +1,92 @@
+from typing import NamedTuple
+
+from bson.objectid import ObjectId
+
+from pyfastocloud_models.common_entries import HostAndPort
+from pyfastocloud_models.service.entry import ServiceSettings
+from pyfastocloud_models.stream.snapshot import StreamSnapshot
+from pyfastocloud_models.utils.serializer import raw_value
+
+
+class HostSnapshot(NamedTuple):
+    host: str
+    port: int
+
+    @classmethod
+    def from_raw(cls, data: dict) -> 'HostSnapshot':
+        return cls(data.get(HostAndPort.HOST_FIELD), data.get(HostAndPort.PORT_FIELD))
+
+    def __str__(self):
+        return '{0}:{1}'.format(self.host, self.port)
+
+
+# Immutable read model of a service with snapshots of its streams, for playlists and load balancing
+class ServiceSnapshot(NamedTuple):
+    id: ObjectId
+    name: str
+    host: HostSnapshot
+    http_host: HostSnapshot
+    vods_host: HostSnapshot
+    cods_host: HostSnapshot
+    nginx_host: HostSnapshot
+    rtmp_host: HostSnapshot
+    feedback_directory: str
+    timeshifts_directory: str
+    hls_directory: str
+    vods_directory: str
+    cods_directory: str
+    proxy_directory: str
+    data_directory: str
+    streams: tuple
+
+    HOST_FIELDS = (ServiceSettings.HOST_FIELD, ServiceSettings.HTTP_HOST_FIELD, ServiceSettings.VODS_HOST_FIELD,
+                   ServiceSettings.CODS_HOST_FIELD, ServiceSettings.NGINX_HOST_FIELD, ServiceSettings.RTMP_HOST_FIELD)
+    DIRECTORY_FIELDS = (ServiceSettings.FEEDBACK_DIRECOTRY_FIELD, ServiceSettings.TIMESHIFTS_DIRECTORY_FIELD,
+                        ServiceSettings.HLS_DIRECTORY_FIELD, ServiceSettings.VODS_DIRECTORY_FIELD,
+                        ServiceSettings.CODS_DIRECTORY_FIELD, ServiceSettings.PROXY_DIRECTORY_FIELD,
+                        ServiceSettings.DATA_DIRECTORY_FIELD)
+
+    # streams are StreamSnapshot by id, ids of removed streams are skipped as on load of the service
+    @classmethod
+    def from_raw(cls, data: dict, streams: dict) -> 'ServiceSnapshot':
+        hosts = []
+        for field in ServiceSnapshot.HOST_FIELDS:
+            host = raw_value(ServiceSettings, data, field)
+            hosts.append(HostSnapshot(host.host, host.port) if isinstance(host, HostAndPort) else
+                         HostSnapshot.from_raw(host))
+
+        directories = [raw_value(ServiceSettings, data, field) for field in ServiceSnapshot.DIRECTORY_FIELDS]
+        stabled = []
+        for sid in data.get(ServiceSettings.STREAMS_FIELD) or []:
+            stream = streams.get(sid)
+            if stream:
+                stabled.append(stream)
+        return cls(data['_id'], raw_value(ServiceSettings, data, ServiceSettings.NAME_FIELD), *hosts, *directories,
+                   tuple(stabled))
+
+    @classmethod
+    def load(cls, sid: ObjectId) -> 'ServiceSnapshot':
+        projection = {field: 1 for field in (ServiceSettings.NAME_FIELD, ServiceSettings.STREAMS_FIELD) +
+                      ServiceSnapshot.HOST_FIELDS + ServiceSnapshot.DIRECTORY_FIELDS}
+        data = ServiceSettings._get_collection().find_one({'_id': sid}, projection)
+        if not data:
+            return None
+
+        sids = data.get(ServiceSettings.STREAMS_FIELD) or []
+        streams = {stream.id: stream for stream in StreamSnapshot.find({'_id': {'$in': sids}})} if sids else {}
+        return cls.from_raw(data, streams)
+
+    # same as ServiceSettings
+    get_host = ServiceSettings.get_host
+    get_http_host = ServiceSettings.get_http_host
+    get_vods_host = ServiceSettings.get_vods_host
+    get_cods_host = ServiceSettings.get_cods_host
+    get_nginx_host = ServiceSettings.get_nginx_host
+    get_rtmp_host = ServiceSettings.get_rtmp_host
+    generate_http_link = ServiceSettings.generate_http_link
+    generate_vods_link = ServiceSettings.generate_vods_link
+    generate_cods_link = ServiceSettings.generate_cods_link
+    generate_playlist = ServiceSettings.generate_playlist
+
+    def get_id(self) -> str:
+        return str(self.id)
@@ -3,6 +3,7 @@ from datetime import datetime
 from enum import IntEnum
 from urllib.parse import urlparse
 
+from bson.dbref import DBRef
 from bson.objectid import ObjectId
 from mongoengine import Document, fields, PULL, errors
 from pyfastogt.maker import Maker
@@ -10,7 +11,12 @@ from pyfastogt.maker import Maker
 import pyfastocloud_models.constants as constants
 from pyfastocloud_models.common_entries import Rational, Size, Logo, RSVGLogo, InputUrl, OutputUrl, MetaUrl, \
     MachineLearning
-from pyfastocloud_models.utils.utils import date_to_utc_msec
+from pyfastocloud_models.utils.entry_parser import EntryField, RESET, BLANK, parse_entry, patch_entry, \
+    msec_to_date, entry_of, entries_of
+from pyfastocloud_models.utils.m3u_parser import M3uParser, UNKNOWN_VALUE
+from pyfastocloud_models.utils.serializer import front_dict, raw_front_dict, raw_batches, raw_id, raw_date_msec, \
+    raw_front_list, document_class
+from pyfastocloud_models.utils.utils import date_to_utc_msec, is_valid_url
 
 
 class StreamLogLevel(IntEnum):
@@ -52,6 +58,33 @@ class IStream(Document, Maker):
     PARTS_FIELD = 'parts'
     META_FIELD = 'meta'
 
+    # (key, func(stream), raw_func(data, refs)) of values computed for the front dict, refs are raw parts
+    FRONT_FIELDS = ((CREATED_DATE_FIELD, lambda stream: stream.created_date_utc_msec(),
+                     raw_date_msec(CREATED_DATE_FIELD, datetime.now)),
+                    (TYPE_FIELD, lambda stream: stream.get_type(),
+                     lambda data, refs: STREAM_TYPES[document_class(data, IStream)]),
+                    (ID_FIELD, lambda stream: stream.get_id(), raw_id),
+                    (OUTPUT_FIELD, lambda stream: [out.to_front_dict() for out in stream.output],
+                     raw_front_list(OUTPUT_FIELD, OutputUrl)),
+                    (PARTS_FIELD, lambda stream: [str(part) for part in stream.parts],
+                     lambda data, refs: IStream._raw_parts(data, refs)),
+                    (META_FIELD, lambda stream: [met.to_front_dict() for met in stream.meta_urls],
+                     raw_front_list(META_FIELD, MetaUrl)))
+    # json values update_entry parses into the stream, in order
+    ENTRY_FIELDS = (EntryField(NAME_FIELD, str, required=True),
+                    EntryField(CREATED_DATE_FIELD, int, convert=msec_to_date),
+                    EntryField(GROUPS_FIELD, list, missing=RESET),
+                    EntryField(TVG_ID_FIELD, str, missing=BLANK),
+                    EntryField(TVG_NAME_FIELD, str, missing=BLANK),
+                    EntryField(ICON_FIELD, str, missing=BLANK),
+                    EntryField(PRICE_FIELD, float),
+                    EntryField(VISIBLE_FIELD, bool),
+                    EntryField(IARC_FIELD, int),
+                    EntryField(OUTPUT_FIELD, list, required=True, convert=entries_of(OutputUrl)),
+                    EntryField(META_FIELD, list, name='meta_urls', convert=entries_of(MetaUrl)))
+    RAW_BATCH_SIZE = 1000
+    MAKE_CHUNK_SIZE = 500
+
     meta = {'collection': 'streams', 'allow_inheritance': True}
 
     @staticmethod
@@ -89,28 +122,26 @@ class IStream(Document, Maker):
     meta_urls = fields.EmbeddedDocumentListField(MetaUrl, db_field='meta')
 
     def to_front_dict(self) -> dict:
-        result = self.to_mongo()
-        result.pop('_cls')
-        result.pop('_id')
-        result[IStream.CREATED_DATE_FIELD] = self.created_date_utc_msec()
-        result[IStream.TYPE_FIELD] = self.get_type()
-        result[IStream.ID_FIELD] = self.get_id()
-
-        output = []
-        for out in self.output:
-            output.append(out.to_front_dict())
-        result[IStream.OUTPUT_FIELD] = output
-
-        parts = []
-        for part in self.parts:
-            parts.append(str(part))
-        result[IStream.PARTS_FIELD] = parts
+        return front_dict(self, self.FRONT_FIELDS)
 
-        meta = []
-        for met in self.meta_urls:
-            meta.append(met.to_front_dict())
-        result[IStream.META_FIELD] = meta
-        return result.to_dict()
+    # same dicts as to_front_dict of the matched streams, built from raw documents without loading streams
+    @staticmethod
+    def iter_front_dicts(query=None, batch_size=RAW_BATCH_SIZE):
+        collection = IStream._get_collection()
+        for batch in raw_batches(collection.find(query or {}), batch_size):
+            parts = {part for data in batch for part in data.get(IStream.PARTS_FIELD, [])}
+            refs = {}
+            if parts:
+                for part in collection.find({'_id': {'$in': list(parts)}}, {'_cls': 1}):
+                    refs[part['_id']] = part
+            for data in batch:
+                yield IStream.raw_to_front_dict(data, refs)
+
+    # refs are raw parts by id, references to other streams are printed as removed ones
+    @staticmethod
+    def raw_to_front_dict(data: dict, refs=None) -> dict:
+        stream_class = document_class(data, IStream)
+        return raw_front_dict(stream_class, data, stream_class.FRONT_FIELDS, refs or {})
 
     def created_date_utc_msec(self):
         return date_to_utc_msec(self.created_date)
@@ -243,11 +274,16 @@ class IStream(Document, Maker):
     def fixup_output_urls(self, settings):
         return
 
+    # urls are fixed up unless the output, the stream type and the settings directories and hosts are the same as on
+    # the last fixup, only changed urls are replaced, so an unchanged output is not saved again
     def save(self, settings=None):
         if self.pk is None:
             self.pk = ObjectId()
-        self.fixup_input_urls(settings)
-        self.fixup_output_urls(settings)
+        fixup_key = self._fixup_key(settings)
+        if fixup_key != getattr(self, '_fixed_up_key', None) or self._output_changed():
+            self.fixup_input_urls(settings)
+            self.fixup_output_urls(settings)
+            self._fixed_up_key = fixup_key
         return super(IStream, self).save()
 
     def delete(self, signal_kwargs=None, **write_concern):
@@ -267,99 +303,42 @@ class IStream(Document, Maker):
         return super(IStream, self).delete(signal_kwargs, **write_concern)
 
     def update_entry(self, json: dict):
-        Maker.update_entry(self, json)
-        res, name = self.check_required_type(IStream.NAME_FIELD, str, json)
-        if res:  # required field
-            self.name = name
-
-        res, created_date_msec = self.check_optional_type(IStream.CREATED_DATE_FIELD, int, json)
-        if res:  # optional field
-            self.created_date = datetime.utcfromtimestamp(created_date_msec / 1000)
-
-        res, groups = self.check_optional_type(IStream.GROUPS_FIELD, list, json)
-        if res:  # optional field
-            self.groups = groups
-        else:
-            self.groups = []
-
-        res, tvg_id = self.check_optional_type(IStream.TVG_ID_FIELD, str, json)
-        if res and tvg_id:  # optional field
-            self.tvg_id = tvg_id
-        else:
-            self.tvg_id = None
-
-        res, tvg_name = self.check_optional_type(IStream.TVG_NAME_FIELD, str, json)
-        if res and tvg_name:  # optional field
-            self.tvg_name = tvg_name
-        else:
-            self.tvg_name = None
-
-        res, icon = self.check_optional_type(IStream.ICON_FIELD, str, json)
-        if res and icon:  # optional field
-            self.tvg_logo = icon
-        else:
-            self.tvg_logo = None
-
-        res, price = self.check_optional_type(IStream.PRICE_FIELD, float, json)
-        if res:  # optional field
-            self.price = price
-
-        res, visible = self.check_optional_type(IStream.VISIBLE_FIELD, bool, json)
-        if res:  # optional field
-            self.visible = visible
-
-        res, iarc = self.check_optional_type(IStream.IARC_FIELD, int, json)
-        if res:  # optional field
-            self.iarc = iarc
-
-        res, output = self.check_required_type(IStream.OUTPUT_FIELD, list, json)
-        if res:  # optional field
-            stabled = []
-            for url in output:
-                stabled.append(OutputUrl.make_entry(url))
-            self.output = stabled
-
-        res, meta = self.check_optional_type(IStream.META_FIELD, list, json)
-        if res:  # optional field
-            meta_stabled = []
-            for met in meta:
-                meta_stabled.append(MetaUrl.make_entry(met))
-            self.meta_urls = meta_stabled
+        parse_entry(self, json, self.ENTRY_FIELDS)
+
+    # applies the keys of json to the saved stream by one update of only their fields, a patched output is fixed up
+    # for the settings as on save
+    def patch(self, json: dict, settings=None) -> dict:
+        def fixup(names: list):
+            if IStream.OUTPUT_FIELD in names:
+                self.fixup_output_urls(settings)
+
+        return patch_entry(self, json, self.ENTRY_FIELDS, fixup)
 
     @staticmethod
     def make_stream_entry(json: dict):
         if not json:
             raise ValueError('Invalid input')
 
-        stream_type = json[IStream.TYPE_FIELD]
-        if stream_type == constants.StreamType.PROXY:
-            return ProxyStream.make_entry(json)
-        elif stream_type == constants.StreamType.VOD_PROXY:
-            return ProxyVodStream.make_entry(json)
-        elif stream_type == constants.StreamType.RELAY:
-            return RelayStream.make_entry(json)
-        elif stream_type == constants.StreamType.ENCODE:
-            return EncodeStream.make_entry(json)
-        elif stream_type == constants.StreamType.TIMESHIFT_RECORDER:
-            return TimeshiftRecorderStream.make_entry(json)
-        elif stream_type == constants.StreamType.TIMESHIFT_PLAYER:
-            return TimeshiftPlayerStream.make_entry(json)
-        elif stream_type == constants.StreamType.CATCHUP:
-            return CatchupStream.make_entry(json)
-        elif stream_type == constants.StreamType.TEST_LIFE:
-            return TestLifeStream.make_entry(json)
-        elif stream_type == constants.StreamType.VOD_RELAY:
-            return VodRelayStream.make_entry(json)
-        elif stream_type == constants.StreamType.VOD_ENCODE:
-            return VodEncodeStream.make_entry(json)
-        elif stream_type == constants.StreamType.COD_RELAY:
-            return CodRelayStream.make_entry(json)
-        elif stream_type == constants.StreamType.COD_ENCODE:
-            return CodEncodeStream.make_entry(json)
-        elif stream_type == constants.StreamType.CV_DATA:
-            return CvDataStream.make_entry(json)
-        else:
-            return ChangerStream.make_entry(json)
+        stream_class = STREAM_CLASSES.get(json[IStream.TYPE_FIELD], ChangerStream)
+        return stream_class.make_entry(json)
+
+    # Make validated streams of the json entries, returns (streams, failures) where failures are [{'index', 'error'}]
+    # of the entries which failed and streams are the others in order, workers > 1 makes chunks on a process pool
+    @staticmethod
+    def make_stream_entries(jsons: list, workers=None, chunk_size=MAKE_CHUNK_SIZE) -> (list, list):
+        starts = list(range(0, len(jsons), chunk_size))
+        if not workers or workers < 2 or len(starts) < 2:
+            return IStream._make_stream_chunk(0, jsons)
+
+        streams = []
+        failures = []
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            chunks = [jsons[start:start + chunk_size] for start in starts]
+            for chunk_streams, chunk_failures in executor.map(IStream._make_stream_chunk, starts, chunks):
+                streams.extend(chunk_streams)
+                failures.extend(chunk_failures)
+        return streams, failures
 
     def is_valid(self) -> bool:
         try:
@@ -368,9 +347,57 @@ class IStream(Document, Maker):
             return False
         return True
 
+    # private
+    def _fixup_key(self, settings) -> tuple:
+        if not settings:
+            return self.pk, self.get_type()
+        return (self.pk, self.get_type(), settings.hls_directory, settings.vods_directory, settings.cods_directory,
+                settings.get_http_host(), settings.get_vods_host(), settings.get_cods_host())
+
+    def _output_changed(self) -> bool:
+        for changed in self._get_changed_fields():
+            if changed.split('.', 1)[0] == IStream.OUTPUT_FIELD:
+                return True
+        return False
+
+    @staticmethod
+    def _make_stream_chunk(start: int, jsons: list) -> (list, list):
+        streams = []
+        failures = []
+        for idx, json in enumerate(jsons, start):
+            try:
+                stream = IStream.make_stream_entry(json)
+                stream.validate()
+            except (ValueError, TypeError, KeyError, errors.ValidationError) as ex:
+                failures.append({'index': idx, 'error': str(ex)})
+            else:
+                streams.append(stream)
+        return streams, failures
+
+    # compatibility shim of to_front_dict, which prints the loaded parts: str() of a document is
+    # '<Class> object' and str() of a reference to a removed stream is its DBRef, the raw front dict
+    # has to print the same strings
+    @staticmethod
+    def _raw_parts(data: dict, refs: dict) -> list:
+        parts = []
+        for part in data.get(IStream.PARTS_FIELD, []):
+            ref = refs.get(part)
+            if ref:
+                parts.append('{0} object'.format(document_class(ref, IStream).__name__))
+            else:
+                parts.append(str(DBRef(IStream._get_collection_name(), part)))
+        return parts
+
 
 class ProxyStream(IStream):
+    SOURCE_HASH_FIELD = 'source_hash'
+    SOURCE_FIELD = 'source'
+
     output = fields.EmbeddedDocumentListField(OutputUrl, required=True)
+    # M3uParser.entry_hash of imported streams
+    source_hash = fields.StringField(required=False)
+    # id of the playlist imported streams come from, normalized url of url imports
+    source = fields.StringField(required=False)
 
     def __init__(self, *args, **kwargs):
         super(ProxyStream, self).__init__(*args, **kwargs)
@@ -381,6 +408,32 @@ class ProxyStream(IStream):
     def generate_input_playlist(self, header=True) -> str:
         return self.generate_playlist(header)
 
+    # M3uParser entry to stream, Unknown values are left blank
+    @classmethod
+    def make_m3u_entry(cls, file: dict, source=None):
+        link = file['link']
+        if not constants.is_special_url(link) and not is_valid_url(link):
+            raise ValueError('Invalid url: {0}'.format(link))
+
+        stream = cls(name=file['title'], output=[OutputUrl(id=OutputUrl.generate_id(), uri=link)],
+                     source_hash=M3uParser.entry_hash(file), source=source)
+        tvg_id = file.get('tvg-id')
+        if tvg_id and tvg_id != UNKNOWN_VALUE:
+            stream.tvg_id = tvg_id
+
+        tvg_name = file.get('tvg-name')
+        if tvg_name and tvg_name != UNKNOWN_VALUE:
+            stream.tvg_name = tvg_name
+
+        tvg_logo = file.get('tvg-logo')
+        if tvg_logo and tvg_logo != UNKNOWN_VALUE:
+            stream.tvg_logo = tvg_logo
+
+        group = file.get('tvg-group')
+        if group and group != UNKNOWN_VALUE:
+            stream.groups = [group]
+        return stream
+
 
 class HardwareStream(IStream):
     LOG_LEVEL_FIELD = 'log_level'
@@ -398,6 +451,25 @@ class HardwareStream(IStream):
     EXTRA_CONFIG_FIELD = 'extra_config'
     AUTO_START_FIELD = 'auto_start'
 
+    FRONT_FIELDS = IStream.FRONT_FIELDS + (
+        (INPUT_FIELD, lambda stream: [inp.to_front_dict() for inp in stream.input],
+         raw_front_list(INPUT_FIELD, InputUrl)),)
+    ENTRY_FIELDS = IStream.ENTRY_FIELDS + (
+        EntryField(LOG_LEVEL_FIELD, int),
+        EntryField(INPUT_FIELD, list, required=True, convert=entries_of(InputUrl)),
+        EntryField(HAVE_VIDEO_FIELD, bool),
+        EntryField(HAVE_AUDIO_FIELD, bool),
+        EntryField(RELAY_VIDEO_TYPE_FIELD, int),
+        EntryField(RELAY_AUDIO_TYPE_FIELD, int),
+        EntryField(AUTO_START_FIELD, bool),
+        EntryField(AUDIO_SELECT_FIELD, int, missing=RESET),
+        EntryField(AUDIO_TRACKS_COUNT_FIELD, int),
+        EntryField(LOOP_FIELD, bool),
+        EntryField(RESTART_ATTEMPTS_FIELD, int),
+        EntryField(AUTO_EXIT_TIME_FIELD, int, missing=RESET),
+        EntryField(PHOENIX_FIELD, bool),
+        EntryField(EXTRA_CONFIG_FIELD, str))
+
     # required
     log_level = fields.IntField(default=StreamLogLevel.LOG_LEVEL_INFO, min_value=StreamLogLevel.LOG_LEVEL_EMERG,
                                 max_value=StreamLogLevel.LOG_LEVEL_DEBUG, required=True)
@@ -427,80 +499,6 @@ class HardwareStream(IStream):
     def __init__(self, *args, **kwargs):
         super(HardwareStream, self).__init__(*args, **kwargs)
 
-    def to_front_dict(self) -> dict:
-        base = super(HardwareStream, self).to_front_dict()
-        input = []
-        for inp in self.input:
-            input.append(inp.to_front_dict())
-        base[HardwareStream.INPUT_FIELD] = input
-        return base
-
-    def update_entry(self, json: dict):
-        IStream.update_entry(self, json)
-
-        res, log_level = IStream.check_optional_type(HardwareStream.LOG_LEVEL_FIELD, int, json)
-        if res:  # optional field
-            self.log_level = log_level
-
-        res, inp = IStream.check_required_type(HardwareStream.INPUT_FIELD, list, json)
-        if res:
-            stabled = []
-            for url in inp:
-                stabled.append(InputUrl.make_entry(url))
-            self.input = stabled
-
-        res, have_video = IStream.check_optional_type(HardwareStream.HAVE_VIDEO_FIELD, bool, json)
-        if res:  # optional field
-            self.have_video = have_video
-
-        res, have_audio = IStream.check_optional_type(HardwareStream.HAVE_AUDIO_FIELD, bool, json)
-        if res:  # optional field
-            self.have_audio = have_audio
-
-        res, relay_video_type = IStream.check_optional_type(HardwareStream.RELAY_VIDEO_TYPE_FIELD, int, json)
-        if res:  # optional field
-            self.relay_video_type = relay_video_type
-
-        res, relay_audio_type = IStream.check_optional_type(HardwareStream.RELAY_AUDIO_TYPE_FIELD, int, json)
-        if res:  # optional field
-            self.relay_audio_type = relay_audio_type
-
-        res, auto_start = IStream.check_optional_type(HardwareStream.AUTO_START_FIELD, bool, json)
-        if res:  # optional field
-            self.auto_start = auto_start
-
-        res, audio_select = IStream.check_optional_type(HardwareStream.AUDIO_SELECT_FIELD, int, json)
-        if res:  # optional field
-            self.audio_select = audio_select
-        else:
-            delattr(self, HardwareStream.AUDIO_SELECT_FIELD)
-
-        res, audio_tracks_count = IStream.check_optional_type(HardwareStream.AUDIO_TRACKS_COUNT_FIELD, int, json)
-        if res:  # optional field
-            self.audio_tracks_count = audio_tracks_count
-
-        res, loop = IStream.check_optional_type(HardwareStream.LOOP_FIELD, bool, json)
-        if res:  # optional field
-            self.loop = loop
-
-        res, restart = IStream.check_optional_type(HardwareStream.RESTART_ATTEMPTS_FIELD, int, json)
-        if res:  # optional field
-            self.restart_attempts = restart
-
-        res, auto_exit = IStream.check_optional_type(HardwareStream.AUTO_EXIT_TIME_FIELD, int, json)
-        if res:  # optional field
-            self.auto_exit_time = auto_exit
-        else:
-            delattr(self, HardwareStream.AUTO_EXIT_TIME_FIELD)
-
-        res, phoenix = IStream.check_optional_type(HardwareStream.PHOENIX_FIELD, bool, json)
-        if res:  # optional field
-            self.phoenix = phoenix
-
-        res, extra = IStream.check_optional_type(HardwareStream.EXTRA_CONFIG_FIELD, str, json)
-        if res:  # optional field
-            self.extra_config = extra
-
     def get_type(self) -> constants.StreamType:
         raise NotImplementedError('subclasses must override get_type()!')
 
@@ -625,8 +623,10 @@ class HardwareStream(IStream):
             parsed_uri = urlparse(url)
             if parsed_uri.scheme == 'http':
                 filename = os.path.basename(parsed_uri.path)
-                self.output[idx] = self.generate_http_link(settings, val.hls_type, val.hlssink_type, val.chunk_duration,
-                                                           filename, val.id)
+                link = self.generate_http_link(settings, val.hls_type, val.hlssink_type, val.chunk_duration,
+                                               filename, val.id)
+                if link != val:
+                    self.output[idx] = link
 
     def _fixup_vod_output_urls(self, settings):
         if not settings:
@@ -640,8 +640,10 @@ class HardwareStream(IStream):
             parsed_uri = urlparse(url)
             if parsed_uri.scheme == 'http':
                 filename = os.path.basename(parsed_uri.path)
-                self.output[idx] = self.generate_vod_link(settings, val.hls_type, val.hlssink_type, val.chunk_duration,
-                                                          filename, val.id)
+                link = self.generate_vod_link(settings, val.hls_type, val.hlssink_type, val.chunk_duration,
+                                              filename, val.id)
+                if link != val:
+                    self.output[idx] = link
 
     def _fixup_cod_output_urls(self, settings):
         if not settings:
@@ -655,14 +657,19 @@ class HardwareStream(IStream):
             parsed_uri = urlparse(url)
             if parsed_uri.scheme == 'http':
                 filename = os.path.basename(parsed_uri.path)
-                self.output[idx] = self.generate_cod_link(settings, val.hls_type, val.hlssink_type, val.chunk_duration,
-                                                          filename, val.id)
+                link = self.generate_cod_link(settings, val.hls_type, val.hlssink_type, val.chunk_duration,
+                                              filename, val.id)
+                if link != val:
+                    self.output[idx] = link
 
 
 class RelayStream(HardwareStream):
     VIDEO_PARSER_FIELD = 'video_parser'
     AUDIO_PARSER_FIELD = 'audio_parser'
 
+    ENTRY_FIELDS = HardwareStream.ENTRY_FIELDS + (EntryField(VIDEO_PARSER_FIELD, str, missing=RESET),
+                                                  EntryField(AUDIO_PARSER_FIELD, str, missing=RESET))
+
     output = fields.EmbeddedDocumentListField(OutputUrl, required=True)
     input = fields.EmbeddedDocumentListField(InputUrl, required=True)
 
@@ -672,21 +679,6 @@ class RelayStream(HardwareStream):
     def __init__(self, *args, **kwargs):
         super(RelayStream, self).__init__(*args, **kwargs)
 
-    def update_entry(self, json: dict):
-        HardwareStream.update_entry(self, json)
-
-        res, video = IStream.check_optional_type(RelayStream.VIDEO_PARSER_FIELD, str, json)
-        if res:  # optional field
-            self.video_parser = video
-        else:
-            delattr(self, RelayStream.VIDEO_PARSER_FIELD)
-
-        res, audio = IStream.check_optional_type(RelayStream.AUDIO_PARSER_FIELD, str, json)
-        if res:  # optional field
-            self.audio_parser = audio
-        else:
-            delattr(self, RelayStream.AUDIO_PARSER_FIELD)
-
     def get_type(self) -> constants.StreamType:
         return constants.StreamType.RELAY
 
@@ -717,6 +709,23 @@ class EncodeStream(HardwareStream):
     RSVG_LOGO_FIELD = 'rsvg_logo'
     ASPECT_RATIO_FIELD = 'aspect_ratio'
 
+    ENTRY_FIELDS = HardwareStream.ENTRY_FIELDS + (
+        EntryField(RELAY_VIDEO_FIELD, bool),
+        EntryField(RELAY_AUDIO_FIELD, bool),
+        EntryField(DEINTERLACE_FIELD, bool),
+        EntryField(FRAME_RATE_FIELD, int, missing=RESET),
+        EntryField(VOLUME_FIELD, float),
+        EntryField(VIDEO_CODEC_FIELD, str),
+        EntryField(AUDIO_CODEC_FIELD, str),
+        EntryField(AUDIO_CHANNELS_COUNT_FIELD, int, missing=RESET),
+        EntryField(SIZE_FIELD, dict, missing=RESET, convert=entry_of(Size)),
+        EntryField(MACHINE_LEARNING_FIELD, dict, missing=RESET, convert=entry_of(MachineLearning)),
+        EntryField(VIDEO_BITRATE_FIELD, int, missing=RESET),
+        EntryField(AUDIO_BITRATE_FIELD, int, missing=RESET),
+        EntryField(LOGO_FIELD, dict, missing=RESET, convert=entry_of(Logo)),
+        EntryField(RSVG_LOGO_FIELD, dict, missing=RESET, convert=entry_of(RSVGLogo)),
+        EntryField(ASPECT_RATIO_FIELD, dict, missing=RESET, convert=entry_of(Rational)))
+
     # required
     output = fields.EmbeddedDocumentListField(OutputUrl, required=True)
     input = fields.EmbeddedDocumentListField(InputUrl, required=True)
@@ -743,87 +752,6 @@ class EncodeStream(HardwareStream):
     def __init__(self, *args, **kwargs):
         super(EncodeStream, self).__init__(*args, **kwargs)
 
-    def update_entry(self, json: dict):
-        HardwareStream.update_entry(self, json)
-
-        res, video = IStream.check_optional_type(EncodeStream.RELAY_VIDEO_FIELD, bool, json)
-        if res:  # optional field
-            self.relay_video = video
-
-        res, audio = IStream.check_optional_type(EncodeStream.RELAY_AUDIO_FIELD, bool, json)
-        if res:  # optional field
-            self.relay_audio = audio
-
-        res, deinter = IStream.check_optional_type(EncodeStream.DEINTERLACE_FIELD, bool, json)
-        if res:  # optional field
-            self.deinterlace = deinter
-
-        res, frame_rate = IStream.check_optional_type(EncodeStream.FRAME_RATE_FIELD, int, json)
-        if res:  # optional field
-            self.frame_rate = frame_rate
-        else:
-            delattr(self, EncodeStream.FRAME_RATE_FIELD)
-
-        res, volume = IStream.check_optional_type(EncodeStream.VOLUME_FIELD, float, json)
-        if res:  # optional field
-            self.volume = volume
-
-        res, video_codec = IStream.check_optional_type(EncodeStream.VIDEO_CODEC_FIELD, str, json)
-        if res:  # optional field
-            self.video_codec = video_codec
-
-        res, audio_codec = IStream.check_optional_type(EncodeStream.AUDIO_CODEC_FIELD, str, json)
-        if res:  # optional field
-            self.audio_codec = audio_codec
-
-        res, audio_channel_count = IStream.check_optional_type(EncodeStream.AUDIO_CHANNELS_COUNT_FIELD, int, json)
-        if res:  # optional field
-            self.audio_channels_count = audio_channel_count
-        else:
-            delattr(self, EncodeStream.AUDIO_CHANNELS_COUNT_FIELD)
-
-        res, size = IStream.check_optional_type(EncodeStream.SIZE_FIELD, dict, json)
-        if res:  # optional field
-            self.size = Size.make_entry(size)
-        else:
-            delattr(self, EncodeStream.SIZE_FIELD)
-
-        res, learning = IStream.check_optional_type(EncodeStream.MACHINE_LEARNING_FIELD, dict, json)
-        if res:  # optional field
-            self.machine_learning = MachineLearning.make_entry(learning)
-        else:
-            delattr(self, EncodeStream.MACHINE_LEARNING_FIELD)
-
-        res, video_bit_rate = IStream.check_optional_type(EncodeStream.VIDEO_BITRATE_FIELD, int, json)
-        if res:  # optional field
-            self.video_bit_rate = video_bit_rate
-        else:
-            delattr(self, EncodeStream.VIDEO_BITRATE_FIELD)
-
-        res, audio_bit_rate = IStream.check_optional_type(EncodeStream.AUDIO_BITRATE_FIELD, int, json)
-        if res:  # optional field
-            self.audio_bit_rate = audio_bit_rate
-        else:
-            delattr(self, EncodeStream.AUDIO_BITRATE_FIELD)
-
-        res, logo = IStream.check_optional_type(EncodeStream.LOGO_FIELD, dict, json)
-        if res:  # optional field
-            self.logo = Logo.make_entry(logo)
-        else:
-            delattr(self, EncodeStream.LOGO_FIELD)
-
-        res, rlogo = IStream.check_optional_type(EncodeStream.RSVG_LOGO_FIELD, dict, json)
-        if res:  # optional field
-            self.rsvg_logo = RSVGLogo.make_entry(rlogo)
-        else:
-            delattr(self, EncodeStream.RSVG_LOGO_FIELD)
-
-        res, aspect = IStream.check_optional_type(EncodeStream.ASPECT_RATIO_FIELD, dict, json)
-        if res:  # optional field
-            self.aspect_ratio = Rational.make_entry(aspect)
-        else:
-            delattr(self, EncodeStream.ASPECT_RATIO_FIELD)
-
     def get_type(self) -> constants.StreamType:
         return constants.StreamType.ENCODE
 
@@ -865,6 +793,9 @@ class TimeshiftRecorderStream(RelayStream):
     TIMESHIFT_CHUNK_DURATION = 'timeshift_chunk_duration'
     TIMESHIFT_CHUNK_LIFE_TIME = 'timeshift_chunk_life_time'
 
+    ENTRY_FIELDS = RelayStream.ENTRY_FIELDS + (EntryField(TIMESHIFT_CHUNK_DURATION, int),
+                                               EntryField(TIMESHIFT_CHUNK_LIFE_TIME, int))
+
     # required
     output = fields.EmbeddedDocumentListField(OutputUrl, required=True, blank=True)  #
     timeshift_chunk_duration = fields.IntField(default=constants.DEFAULT_TIMESHIFT_CHUNK_DURATION,
@@ -875,17 +806,6 @@ class TimeshiftRecorderStream(RelayStream):
     def __init__(self, *args, **kwargs):
         super(TimeshiftRecorderStream, self).__init__(*args, **kwargs)
 
-    def update_entry(self, json: dict):
-        RelayStream.update_entry(self, json)
-
-        res, chunk_duration = IStream.check_optional_type(TimeshiftRecorderStream.TIMESHIFT_CHUNK_DURATION, int, json)
-        if res:  # optional field
-            self.timeshift_chunk_duration = chunk_duration
-
-        res, chunk_life = IStream.check_optional_type(TimeshiftRecorderStream.TIMESHIFT_CHUNK_LIFE_TIME, int, json)
-        if res:  # optional field
-            self.timeshift_chunk_life_time = chunk_life
-
     def get_type(self) -> constants.StreamType:
         return constants.StreamType.TIMESHIFT_RECORDER
 
@@ -900,6 +820,15 @@ class CatchupStream(TimeshiftRecorderStream):
     START_RECORD_FIELD = 'start'
     STOP_RECORD_FIELD = 'stop'
 
+    FRONT_FIELDS = IStream.FRONT_FIELDS + (
+        (START_RECORD_FIELD, lambda stream: stream.start_utc_msec(),
+         raw_date_msec(START_RECORD_FIELD, datetime.utcfromtimestamp(0))),
+        (STOP_RECORD_FIELD, lambda stream: stream.stop_utc_msec(),
+         raw_date_msec(STOP_RECORD_FIELD, datetime.utcfromtimestamp(0))))
+    ENTRY_FIELDS = TimeshiftRecorderStream.ENTRY_FIELDS + (
+        EntryField(START_RECORD_FIELD, int, required=True, convert=msec_to_date),
+        EntryField(STOP_RECORD_FIELD, int, required=True, convert=msec_to_date))
+
     # required
     output = fields.EmbeddedDocumentListField(OutputUrl, required=True)
     start = fields.DateTimeField(default=datetime.utcfromtimestamp(0), required=True)
@@ -916,31 +845,17 @@ class CatchupStream(TimeshiftRecorderStream):
     def stop_utc_msec(self):
         return date_to_utc_msec(self.stop)
 
-    def update_entry(self, json: dict):
-        TimeshiftRecorderStream.update_entry(self, json)
-
-        res, start = self.check_required_type(CatchupStream.START_RECORD_FIELD, int, json)
-        if res:
-            self.start = datetime.utcfromtimestamp(start / 1000)
-
-        res, stop = self.check_required_type(CatchupStream.STOP_RECORD_FIELD, int, json)
-        if res:
-            self.stop = datetime.utcfromtimestamp(stop / 1000)
-
     def get_type(self) -> constants.StreamType:
         return constants.StreamType.CATCHUP
 
-    def to_front_dict(self) -> dict:
-        base = super(HardwareStream, self).to_front_dict()
-        base[CatchupStream.START_RECORD_FIELD] = self.start_utc_msec()
-        base[CatchupStream.STOP_RECORD_FIELD] = self.stop_utc_msec()
-        return base
-
 
 class TimeshiftPlayerStream(RelayStream):
     TIMESHIFT_DIR_FIELD = 'timeshift_dir'
     TIMESHIFT_DELAY = 'timeshift_delay'
 
+    ENTRY_FIELDS = RelayStream.ENTRY_FIELDS + (EntryField(TIMESHIFT_DIR_FIELD, str),
+                                               EntryField(TIMESHIFT_DELAY, int))
+
     # required
     input = fields.EmbeddedDocumentListField(InputUrl, required=True, blank=True)  #
     timeshift_dir = fields.StringField(required=True)  # FIXME default
@@ -951,17 +866,6 @@ class TimeshiftPlayerStream(RelayStream):
     def __init__(self, *args, **kwargs):
         super(TimeshiftPlayerStream, self).__init__(*args, **kwargs)
 
-    def update_entry(self, json: dict):
-        RelayStream.update_entry(self, json)
-
-        res, timeshift_dir = self.check_optional_type(TimeshiftPlayerStream.TIMESHIFT_DIR_FIELD, str, json)
-        if res:  # optional field
-            self.timeshift_dir = timeshift_dir
-
-        timeshift_delay_field = self.check_optional_type(TimeshiftPlayerStream.TIMESHIFT_DELAY, int, json)
-        if timeshift_delay_field is not None:  # optional field
-            self.timeshift_chunk_life_time = timeshift_delay_field
-
     def get_type(self) -> constants.StreamType:
         return constants.StreamType.TIMESHIFT_PLAYER
 
@@ -1017,6 +921,17 @@ class VodBasedStream(object):
     MIN_DATE = datetime(1970, 1, 1)
     DEFAULT_COUNTRY = 'Unknown'
 
+    FRONT_FIELDS = IStream.FRONT_FIELDS + ((PRIME_DATE_FIELD, lambda stream: stream.prime_date_utc_msec(),
+                                            raw_date_msec(PRIME_DATE_FIELD, MIN_DATE)),)
+    # appended to ENTRY_FIELDS of the stream classes
+    ENTRY_FIELDS = (EntryField(VOD_TYPE_FIELD, int, required=True),
+                    EntryField(DESCRIPTION_FIELD, str, missing=BLANK),
+                    EntryField(TRAILER_URL_FIELD, str, missing=BLANK),
+                    EntryField(USER_SCORE_FIELD, float),
+                    EntryField(PRIME_DATE_FIELD, int, required=True, convert=msec_to_date),
+                    EntryField(COUNTRY_FIELD, str),
+                    EntryField(DURATION_FIELD, int))
+
     def __init__(self, *args, **kwargs):
         super(VodBasedStream, self).__init__(*args, **kwargs)
 
@@ -1034,96 +949,41 @@ class VodBasedStream(object):
     def prime_date_utc_msec(self):
         return date_to_utc_msec(self.prime_date)
 
-    def update_entry(self, json: dict):
-        if not json:
-            raise ValueError('Invalid input')
-
-        res, vod_type = Maker.check_required_type(VodBasedStream.VOD_TYPE_FIELD, int, json)
-        if res:
-            self.vod_type = vod_type
-
-        res, description = Maker.check_optional_type(VodBasedStream.DESCRIPTION_FIELD, str, json)
-        if res and description:
-            self.description = description
-        else:
-            self.description = None
-
-        res, trailer = Maker.check_optional_type(VodBasedStream.TRAILER_URL_FIELD, str, json)
-        if res and trailer:
-            self.trailer_url = trailer
-        else:
-            self.trailer_url = None
-
-        res, score = Maker.check_optional_type(VodBasedStream.USER_SCORE_FIELD, float, json)
-        if res:
-            self.user_score = score
-
-        res, prime_date = Maker.check_required_type(VodBasedStream.PRIME_DATE_FIELD, int, json)
-        if res:
-            self.prime_date = datetime.utcfromtimestamp(prime_date / 1000)
-
-        res, country = Maker.check_optional_type(VodBasedStream.COUNTRY_FIELD, str, json)
-        if res:
-            self.country = country
-
-        res, duration = Maker.check_optional_type(VodBasedStream.DURATION_FIELD, int, json)
-        if res:
-            self.duration = duration
-
-
 class ProxyVodStream(ProxyStream, VodBasedStream):
+    FRONT_FIELDS = VodBasedStream.FRONT_FIELDS
+    ENTRY_FIELDS = ProxyStream.ENTRY_FIELDS + VodBasedStream.ENTRY_FIELDS
+
     def __init__(self, *args, **kwargs):
         super(ProxyVodStream, self).__init__(*args, **kwargs)
 
-    def update_entry(self, json: dict):
-        ProxyStream.update_entry(self, json)
-        VodBasedStream.update_entry(self, json)
-
     def get_type(self) -> constants.StreamType:
         return constants.StreamType.VOD_PROXY
 
-    def to_front_dict(self) -> dict:
-        front = ProxyStream.to_front_dict(self)
-        front[VodBasedStream.PRIME_DATE_FIELD] = self.prime_date_utc_msec()
-        return front
-
 
 class VodRelayStream(RelayStream, VodBasedStream):
+    FRONT_FIELDS = VodBasedStream.FRONT_FIELDS
+    ENTRY_FIELDS = RelayStream.ENTRY_FIELDS + VodBasedStream.ENTRY_FIELDS
+
     def __init__(self, *args, **kwargs):
         super(VodRelayStream, self).__init__(*args, **kwargs)
 
-    def update_entry(self, json: dict):
-        RelayStream.update_entry(self, json)
-        VodBasedStream.update_entry(self, json)
-
     def get_type(self) -> constants.StreamType:
         return constants.StreamType.VOD_RELAY
 
-    def to_front_dict(self) -> dict:
-        front = ProxyStream.to_front_dict(self)
-        front[VodBasedStream.PRIME_DATE_FIELD] = self.prime_date_utc_msec()
-        return front
-
     def fixup_output_urls(self, settings):
         return self._fixup_vod_output_urls(settings)
 
 
 class VodEncodeStream(EncodeStream, VodBasedStream):
+    FRONT_FIELDS = VodBasedStream.FRONT_FIELDS
+    ENTRY_FIELDS = EncodeStream.ENTRY_FIELDS + VodBasedStream.ENTRY_FIELDS
+
     def __init__(self, *args, **kwargs):
         super(VodEncodeStream, self).__init__(*args, **kwargs)
 
-    def update_entry(self, json: dict):
-        EncodeStream.update_entry(self, json)
-        VodBasedStream.update_entry(self, json)
-
     def get_type(self) -> constants.StreamType:
         return constants.StreamType.VOD_ENCODE
 
-    def to_front_dict(self) -> dict:
-        front = ProxyStream.to_front_dict(self)
-        front[VodBasedStream.PRIME_DATE_FIELD] = self.prime_date_utc_msec()
-        return front
-
     def fixup_output_urls(self, settings):
         return self._fixup_vod_output_urls(settings)
 
@@ -1151,5 +1011,16 @@ class ChangerStream(EncodeStream):
         return constants.StreamType.CHANGER
 
 
+STREAM_CLASSES = {constants.StreamType.PROXY: ProxyStream, constants.StreamType.VOD_PROXY: ProxyVodStream,
+                  constants.StreamType.RELAY: RelayStream, constants.StreamType.ENCODE: EncodeStream,
+                  constants.StreamType.TIMESHIFT_PLAYER: TimeshiftPlayerStream,
+                  constants.StreamType.TIMESHIFT_RECORDER: TimeshiftRecorderStream,
+                  constants.StreamType.CATCHUP: CatchupStream, constants.StreamType.TEST_LIFE: TestLifeStream,
+                  constants.StreamType.VOD_RELAY: VodRelayStream, constants.StreamType.VOD_ENCODE: VodEncodeStream,
+                  constants.StreamType.COD_RELAY: CodRelayStream, constants.StreamType.COD_ENCODE: CodEncodeStream,
+                  constants.StreamType.EVENT: EventStream, constants.StreamType.CV_DATA: CvDataStream,
+                  constants.StreamType.CHANGER: ChangerStream}
+STREAM_TYPES = {stream_class: stream_type for stream_type, stream_class in STREAM_CLASSES.items()}
+
 # if remove catchup also clean parts
 CatchupStream.register_delete_rule(IStream, 'parts', PULL)
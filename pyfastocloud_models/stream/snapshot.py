@@ -0,0 +1,55 @@
+from typing import NamedTuple
+
+from bson.objectid import ObjectId
+
+import pyfastocloud_models.constants as constants
+from pyfastocloud_models.common_entries import OutputUrl
+from pyfastocloud_models.stream.entry import IStream, STREAM_TYPES
+from pyfastocloud_models.utils.serializer import document_class, raw_value
+
+
+class OutputSnapshot(NamedTuple):
+    id: int
+    uri: str
+
+
+# Immutable read model of a stream for playlists and routing, built from raw documents, a fraction of
+# the memory of IStream documents
+class StreamSnapshot(NamedTuple):
+    id: ObjectId
+    type: constants.StreamType
+    name: str
+    tvg_id: str
+    tvg_name: str
+    tvg_logo: str
+    groups: tuple
+    output: tuple
+
+    PROJECTION = {'_cls': 1, IStream.NAME_FIELD: 1, IStream.TVG_ID_FIELD: 1, IStream.TVG_NAME_FIELD: 1,
+                  IStream.ICON_FIELD: 1, IStream.GROUPS_FIELD: 1, IStream.OUTPUT_FIELD: 1}
+
+    @classmethod
+    def from_raw(cls, data: dict) -> 'StreamSnapshot':
+        output = []
+        for out in data.get(IStream.OUTPUT_FIELD) or []:
+            output.append(OutputSnapshot(out.get(OutputUrl.ID_FIELD), out.get(OutputUrl.URI_FIELD)))
+        groups = raw_value(IStream, data, IStream.GROUPS_FIELD)
+        return cls(data['_id'], STREAM_TYPES[document_class(data, IStream)], data.get(IStream.NAME_FIELD),
+                   data.get(IStream.TVG_ID_FIELD), data.get(IStream.TVG_NAME_FIELD),
+                   raw_value(IStream, data, IStream.ICON_FIELD), tuple(groups), tuple(output))
+
+    @classmethod
+    def find(cls, query=None):
+        for data in IStream._get_collection().find(query or {}, StreamSnapshot.PROJECTION):
+            yield cls.from_raw(data)
+
+    # same as IStream
+    main_group = IStream.main_group
+    stable_name = IStream.stable_name
+    generate_playlist = IStream.generate_playlist
+
+    def get_type(self) -> constants.StreamType:
+        return self.type
+
+    def get_id(self) -> str:
+        return str(self.id)
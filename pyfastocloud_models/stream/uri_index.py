@@ -0,0 +1,130 @@
+from bson.objectid import ObjectId
+
+import pyfastocloud_models.constants as constants
+from pyfastocloud_models.stream.entry import IStream
+from pyfastocloud_models.utils.utils import normalize_uri
+
+
+class StreamUriIndex:
+    INPUT_FIELD = 'input'
+    OUTPUT_FIELD = 'output'
+
+    def __init__(self):
+        self._streams = {}  # normalized uri: [sid]
+        self._uris = {}  # sid: [normalized uri]
+
+    @classmethod
+    def build(cls, sids=None) -> 'StreamUriIndex':
+        index = cls()
+        query = {'_id': {'$in': sids}} if sids is not None else {}
+        projection = {StreamUriIndex.INPUT_FIELD + '.uri': 1, StreamUriIndex.OUTPUT_FIELD + '.uri': 1}
+        for doc in IStream._get_collection().find(query, projection):
+            uris = []
+            for field in [StreamUriIndex.INPUT_FIELD, StreamUriIndex.OUTPUT_FIELD]:
+                for url in doc.get(field, []):
+                    uris.append(url.get('uri'))
+            index.add(doc['_id'], uris)
+        return index
+
+    @staticmethod
+    def stream_uris(stream: IStream) -> list:
+        uris = [out.uri for out in stream.output]
+        if hasattr(stream, StreamUriIndex.INPUT_FIELD):
+            uris.extend(url.uri for url in stream.input)
+        return uris
+
+    def add(self, sid: ObjectId, uris: list):
+        for uri in uris:
+            if not uri or constants.is_special_url(uri):
+                continue
+
+            key = normalize_uri(uri)
+            sids = self._streams.setdefault(key, [])
+            if sid not in sids:
+                sids.append(sid)
+                self._uris.setdefault(sid, []).append(key)
+
+    def add_stream(self, stream: IStream):
+        self.add(stream.id, StreamUriIndex.stream_uris(stream))
+
+    def remove(self, sid: ObjectId):
+        for key in self._uris.pop(sid, []):
+            sids = self._streams[key]
+            sids.remove(sid)
+            if not sids:
+                del self._streams[key]
+
+    def contains(self, uri: str) -> bool:
+        return normalize_uri(uri) in self._streams
+
+    def find(self, uri: str) -> list:
+        return list(self._streams.get(normalize_uri(uri), []))
+
+    # {normalized uri: [sid]} of uris served by more than one stream
+    def duplicates(self) -> dict:
+        result = {}
+        for key, sids in self._streams.items():
+            if len(sids) > 1:
+                result[key] = list(sids)
+        return result
+
+    # Replace references to duplicates by keep in services, series, subscribers and parts, then delete duplicates
+    def merge(self, keep: ObjectId, duplicates: list):
+        from pyfastocloud_models.series.entry import Serial
+        from pyfastocloud_models.service.entry import ServiceSettings
+        from pyfastocloud_models.subscriber.entry import Subscriber
+
+        duplicates = [sid for sid in duplicates if sid != keep]
+        if not duplicates:
+            return
+
+        StreamUriIndex._replace_references(ServiceSettings._get_collection(), 'streams', keep, duplicates)
+        StreamUriIndex._replace_references(Serial._get_collection(), 'episodes', keep, duplicates)
+        StreamUriIndex._replace_references(IStream._get_collection(), 'parts', keep, duplicates)
+
+        collection = Subscriber._get_collection()
+        subscriber_fields = ['streams', 'vods', 'catchups']
+        query = {'$or': [{field + '.sid': {'$in': duplicates}} for field in subscriber_fields]}
+        for doc in collection.find(query, {field: 1 for field in subscriber_fields}):
+            changed = {}
+            for field in subscriber_fields:
+                user_streams = doc.get(field, [])
+                stabled = StreamUriIndex._replace_user_streams(user_streams, keep, duplicates)
+                if stabled != user_streams:
+                    changed[field] = stabled
+            if changed:
+                collection.update_one({'_id': doc['_id']}, {'$set': changed})
+
+        IStream.objects(id__in=duplicates).delete()
+        for sid in duplicates:
+            self.remove(sid)
+
+    # private
+    # lists are shown in their order, the first duplicate is replaced in its position and the others are dropped
+    @staticmethod
+    def _replace_references(collection, field: str, keep: ObjectId, duplicates: list):
+        for doc in collection.find({field: {'$in': duplicates}}, {field: 1}):
+            result = []
+            have_keep = False
+            for sid in doc[field]:
+                if sid == keep or sid in duplicates:
+                    if have_keep:
+                        continue
+                    have_keep = True
+                    sid = keep
+                result.append(sid)
+            collection.update_one({'_id': doc['_id']}, {'$set': {field: result}})
+
+    # first entry of the kept stream wins, user settings of the other duplicates are dropped
+    @staticmethod
+    def _replace_user_streams(user_streams: list, keep: ObjectId, duplicates: list) -> list:
+        result = []
+        have_keep = False
+        for user in user_streams:
+            if user['sid'] == keep or user['sid'] in duplicates:
+                if have_keep:
+                    continue
+                have_keep = True
+                user = dict(user, sid=keep)
+            result.append(user)
+        return result
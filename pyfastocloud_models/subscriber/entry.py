@@ -2,6 +2,7 @@ from datetime import datetime
 from enum import IntEnum
 from hashlib import md5
 
+from bson.dbref import DBRef
 from bson.objectid import ObjectId
 from mongoengine import Document, fields, EmbeddedDocument, errors, PULL
 from pyfastogt.maker import Maker
@@ -12,6 +13,8 @@ from pyfastocloud_models.content_request.entry import ContentRequest
 from pyfastocloud_models.series.entry import Serial
 from pyfastocloud_models.service.entry import ServiceSettings
 from pyfastocloud_models.stream.entry import IStream
+from pyfastocloud_models.utils.entry_parser import EntryField, parse_entry, patch_entry, msec_to_date
+from pyfastocloud_models.utils.serializer import raw_value
 from pyfastocloud_models.utils.utils import date_to_utc_msec
 
 
@@ -190,6 +193,22 @@ class Subscriber(Document, Maker):
     SERVERS_FIELD = 'servers'
     DEVICES_COUNT_FIELD = 'devices_count'
 
+    # json values update_entry parses into the subscriber, in order
+    ENTRY_FIELDS = (EntryField(EMAIL_FIELD, str, required=True, convert=lambda email: Subscriber._entry_email(email)),
+                    EntryField(PASSWORD_FIELD, str, required=True,
+                               convert=lambda password: Subscriber.generate_password_hash(password)),
+                    EntryField(FIRST_NAME_FIELD, str, required=True),
+                    EntryField(LAST_NAME_FIELD, str, required=True),
+                    EntryField(CREATED_DATE_FIELD, int, convert=msec_to_date),
+                    EntryField(EXP_DATE_FIELD, int, required=True, convert=msec_to_date),
+                    EntryField(STATUS_FIELD, int, required=True),
+                    EntryField(MAX_DEVICE_COUNT_FIELD, int, required=True),
+                    EntryField(COUNTRY_FIELD, str, required=True,
+                               convert=lambda country: Subscriber._entry_country(country)),
+                    EntryField(LANGUAGE_FIELD, str, required=True,
+                               convert=lambda language: Subscriber._entry_language(language)),
+                    EntryField(SERVERS_FIELD, list, convert=lambda servers: [ObjectId(server) for server in servers]))
+
     meta = {'collection': 'subscribers', 'allow_inheritance': False}
 
     @staticmethod
@@ -745,67 +764,16 @@ class Subscriber(Document, Maker):
         return cl
 
     def update_entry(self, json: dict):
-        Maker.update_entry(self, json)
-
-        res, email_field = self.check_required_type(Subscriber.EMAIL_FIELD, str, json)
-        if res:
-            email = email_field.lower()
-            if not is_valid_email(email):
-                raise ValueError('Invalid email')
-            self.email = email
-
-        res, password = self.check_required_type(Subscriber.PASSWORD_FIELD, str, json)
-        if res:
-            self.password = Subscriber.generate_password_hash(password)
-
-        res, first_name = Subscriber.check_required_type(Subscriber.FIRST_NAME_FIELD, str, json)
-        if res:
-            self.first_name = first_name
-
-        res, last_name = Subscriber.check_required_type(Subscriber.LAST_NAME_FIELD, str, json)
-        if res:
-            self.last_name = last_name
-
-        res, created_date_msec = self.check_optional_type(Subscriber.CREATED_DATE_FIELD, int, json)
-        if res:  # optional field
-            self.created_date = datetime.utcfromtimestamp(created_date_msec / 1000)
-
-        res, exp_date_msec = self.check_required_type(Subscriber.EXP_DATE_FIELD, int, json)
-        if res:
-            self.exp_date = datetime.utcfromtimestamp(exp_date_msec / 1000)
-
-        res, status = self.check_required_type(Subscriber.STATUS_FIELD, int, json)
-        if res:
-            self.status = status
-
-        res, max_dev = self.check_required_type(Subscriber.MAX_DEVICE_COUNT_FIELD, int, json)
-        if res:
-            self.max_devices_count = max_dev
-
-        res, country = self.check_required_type(Subscriber.COUNTRY_FIELD, str, json)
-        if res:
-            if not constants.is_valid_country_code(country):
-                raise ValueError('Invalid {0}'.format(Subscriber.COUNTRY_FIELD))
-            self.country = country
-
-        res, language = self.check_required_type(Subscriber.LANGUAGE_FIELD, str, json)
-        if res:
-            if not constants.is_valid_locale_code(language):
-                raise ValueError('Invalid {0}'.format(Subscriber.LANGUAGE_FIELD))
-            self.language = language
-
-        res, servers = self.check_optional_type(Subscriber.SERVERS_FIELD, list, json)
-        if res:
-            object_servers = []
-            for server in servers:
-                object_servers.append(ObjectId(server))
-            self.servers = object_servers
-
+        parse_entry(self, json, Subscriber.ENTRY_FIELDS)
         try:
             self.validate()
         except errors.ValidationError as err:
             raise ValueError(err.message)
 
+    # applies the keys of json to the saved subscriber by one update of only their fields
+    def patch(self, json: dict) -> dict:
+        return patch_entry(self, json, Subscriber.ENTRY_FIELDS)
+
     def to_front_dict(self) -> dict:
         servers = []
         for server in self.servers:
@@ -819,9 +787,58 @@ class Subscriber(Document, Maker):
                 Subscriber.LANGUAGE_FIELD: self.language, Subscriber.COUNTRY_FIELD: self.country,
                 Subscriber.SERVERS_FIELD: servers, Subscriber.DEVICES_COUNT_FIELD: len(self.devices)}
 
+    # same dicts as to_front_dict of the matched subscribers, read from raw documents without content lists
+    @staticmethod
+    def iter_front_dicts(query=None):
+        names = [Subscriber.FIRST_NAME_FIELD, Subscriber.LAST_NAME_FIELD, Subscriber.EMAIL_FIELD,
+                 Subscriber.PASSWORD_FIELD, Subscriber.CREATED_DATE_FIELD, Subscriber.EXP_DATE_FIELD,
+                 Subscriber.STATUS_FIELD, Subscriber.MAX_DEVICE_COUNT_FIELD, Subscriber.LANGUAGE_FIELD,
+                 Subscriber.COUNTRY_FIELD, Subscriber.SERVERS_FIELD, 'devices._id']
+        projection = {name: 1 for name in names}
+        for data in Subscriber._get_collection().find(query or {}, projection):
+            yield Subscriber._raw_front_dict(data)
+
     def is_valid(self) -> bool:
         try:
             self.validate()
         except errors.ValidationError:
             return False
         return True
+
+    # private
+    @staticmethod
+    def _entry_email(email: str) -> str:
+        email = email.lower()
+        if not is_valid_email(email):
+            raise ValueError('Invalid email')
+        return email
+
+    @staticmethod
+    def _entry_country(country: str) -> str:
+        if not constants.is_valid_country_code(country):
+            raise ValueError('Invalid {0}'.format(Subscriber.COUNTRY_FIELD))
+        return country
+
+    @staticmethod
+    def _entry_language(language: str) -> str:
+        if not constants.is_valid_locale_code(language):
+            raise ValueError('Invalid {0}'.format(Subscriber.LANGUAGE_FIELD))
+        return language
+
+    @staticmethod
+    def _raw_front_dict(data: dict) -> dict:
+        servers = []
+        for server in raw_value(Subscriber, data, Subscriber.SERVERS_FIELD):
+            servers.append(str(server.id if isinstance(server, DBRef) else server))
+        return {Subscriber.FIRST_NAME_FIELD: data.get(Subscriber.FIRST_NAME_FIELD),
+                Subscriber.LAST_NAME_FIELD: data.get(Subscriber.LAST_NAME_FIELD),
+                Subscriber.EMAIL_FIELD: data.get(Subscriber.EMAIL_FIELD), Subscriber.ID_FIELD: str(data['_id']),
+                Subscriber.PASSWORD_FIELD: data.get(Subscriber.PASSWORD_FIELD),
+                Subscriber.CREATED_DATE_FIELD: date_to_utc_msec(
+                    raw_value(Subscriber, data, Subscriber.CREATED_DATE_FIELD)),
+                Subscriber.EXP_DATE_FIELD: date_to_utc_msec(raw_value(Subscriber, data, Subscriber.EXP_DATE_FIELD)),
+                Subscriber.STATUS_FIELD: raw_value(Subscriber, data, Subscriber.STATUS_FIELD),
+                Subscriber.MAX_DEVICE_COUNT_FIELD: raw_value(Subscriber, data, Subscriber.MAX_DEVICE_COUNT_FIELD),
+                Subscriber.LANGUAGE_FIELD: raw_value(Subscriber, data, Subscriber.LANGUAGE_FIELD),
+                Subscriber.COUNTRY_FIELD: data.get(Subscriber.COUNTRY_FIELD),
+                Subscriber.SERVERS_FIELD: servers, Subscriber.DEVICES_COUNT_FIELD: len(data.get('devices') or [])}
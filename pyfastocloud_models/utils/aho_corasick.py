@@ -0,0 +1,54 @@
+from collections import deque
+
+
+class AhoCorasick:
+    def __init__(self, words: list):
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [False]
+        for word in words:
+            self._add_word(word)
+        self._build()
+
+    def search(self, text: str) -> bool:
+        if self._out[0]:
+            return True
+
+        goto = self._goto
+        fail = self._fail
+        out = self._out
+        state = 0
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                return True
+
+        return False
+
+    # private
+    def _add_word(self, word: str):
+        state = 0
+        for ch in word:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(False)
+            state = nxt
+        self._out[state] = True
+
+    def _build(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                self._out[nxt] = self._out[nxt] or self._out[self._fail[nxt]]
@@ -0,0 +1,183 @@
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from threading import Lock
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from pyfastocloud_models.utils.host_limiter import HostLimiter
+
+PART_EXTENSION = '.part'
+VALIDATOR_EXTENSION = '.validator'  # of the .part file, the ETag or Last-Modified of the content it holds
+
+
+# Downloads over one pooled requests.Session, reading into a reused buffer, interrupted downloads are resumed
+# from their .part files by http range requests if the content is unchanged, downloads into the same path are
+# serialized
+class DownloadManager:
+    DEFAULT_WORKERS = 8
+    DEFAULT_PER_HOST = 4
+    DEFAULT_CHUNK_SIZE = 1024 * 1024
+    DEFAULT_TIMEOUT = 10
+
+    _default = None
+    _default_lock = Lock()
+
+    def __init__(self, workers=DEFAULT_WORKERS, per_host=DEFAULT_PER_HOST, chunk_size=DEFAULT_CHUNK_SIZE,
+                 timeout=DEFAULT_TIMEOUT):
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.timeout = timeout
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=max(workers, per_host))
+        self._session.mount('http://', adapter)
+        self._session.mount('https://', adapter)
+        self._limiter = HostLimiter(per_host)
+        self._paths = {}  # full_path: [lock, users]
+        self._paths_lock = Lock()
+
+    @staticmethod
+    def default() -> 'DownloadManager':
+        with DownloadManager._default_lock:
+            if not DownloadManager._default:
+                DownloadManager._default = DownloadManager()
+        return DownloadManager._default
+
+    @staticmethod
+    def file_name_for(url: str, extension: str) -> str:
+        file_name = urlparse(url).path.split('/')[-1]
+        if not file_name:
+            file_name = '{0}{1}'.format(str(uuid.uuid4()), extension)
+        return file_name
+
+    # returns (full_path, file_name) as download_file
+    def download(self, url: str, path: str, extension='', timeout=None):
+        file_name = DownloadManager.file_name_for(url, extension)
+        full_path = os.path.join(path, file_name)
+        with self._path_lock(full_path), self._limiter.acquire(url):
+            self._fetch(url, full_path, timeout if timeout is not None else self.timeout)
+        return full_path, file_name
+
+    # returns ({url: (full_path, file_name)}, {url: error}) for the given urls downloaded into path
+    def download_many(self, urls: list, path: str, extension=''):
+        urls = list(dict.fromkeys(urls))
+        results = {}
+        failed = {}
+        if not urls:
+            return results, failed
+
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(urls))) as executor:
+            futures = [(url, executor.submit(self.download, url, path, extension)) for url in urls]
+            for url, future in futures:
+                try:
+                    results[url] = future.result()
+                except (requests.RequestException, OSError) as ex:
+                    failed[url] = ex
+        return results, failed
+
+    def close(self):
+        self._session.close()
+
+    # private
+    @contextmanager
+    def _path_lock(self, full_path: str):
+        key = os.path.abspath(full_path)
+        with self._paths_lock:
+            entry = self._paths.get(key)
+            if not entry:
+                entry = [Lock(), 0]
+                self._paths[key] = entry
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._paths_lock:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._paths[key]
+
+    def _fetch(self, url: str, full_path: str, timeout):
+        part_path = full_path + PART_EXTENSION
+        validator_path = part_path + VALIDATOR_EXTENSION
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        validator = _read_validator(validator_path) if offset else None
+        if not validator or not self._get(url, part_path, offset, validator, timeout):
+            # nothing to resume or the part file does not continue the current content
+            if not self._get(url, part_path, 0, None, timeout):
+                raise requests.RequestException('Invalid response of {0}'.format(url))
+
+        os.replace(part_path, full_path)
+        if os.path.exists(validator_path):
+            os.remove(validator_path)
+
+    # writes the content from offset into the part file, returns False if it can't be resumed from offset
+    def _get(self, url: str, part_path: str, offset: int, validator, timeout) -> bool:
+        # raw body is read, so the content should not be encoded
+        headers = {'Accept-Encoding': 'identity'}
+        if offset:
+            headers['Range'] = 'bytes={0}-'.format(offset)
+            headers['If-Range'] = validator
+
+        with self._session.get(url, headers=headers, stream=True, timeout=timeout) as response:
+            if offset and response.status_code == 416:  # part file is complete if it has the size of the content
+                return _content_range(response) == (None, offset)
+
+            response.raise_for_status()
+            encoded = response.headers.get('Content-Encoding', 'identity').lower() != 'identity'
+            if response.status_code == 206:
+                # ranges of encoded content are not ranges of the decoded part file
+                if not offset or encoded or _content_range(response)[0] != offset:
+                    return False
+                mode = 'ab'
+            else:
+                _write_validator(part_path + VALIDATOR_EXTENSION, response)
+                mode = 'wb'
+
+            with open(part_path, mode) as file:
+                if encoded:
+                    for chunk in response.iter_content(self.chunk_size):
+                        file.write(chunk)
+                    return True
+
+                buffer = bytearray(self.chunk_size)
+                view = memoryview(buffer)
+                while True:
+                    read = response.raw.readinto(view)
+                    if not read:
+                        break
+                    file.write(view[:read])
+        return True
+
+
+# (start, total) of the Content-Range header, start is None for unsatisfied ranges, (None, None) if invalid
+def _content_range(response) -> tuple:
+    unit, _, value = response.headers.get('Content-Range', '').partition(' ')
+    byte_range, _, total = value.partition('/')
+    if unit != 'bytes' or not total.isdigit():
+        return None, None
+    if byte_range == '*':
+        return None, int(total)
+    start, _, _ = byte_range.partition('-')
+    return (int(start), int(total)) if start.isdigit() else (None, None)
+
+
+# strong ETag or Last-Modified usable by If-Range, weak ETags are not
+def _write_validator(validator_path: str, response):
+    etag = response.headers.get('ETag')
+    validator = etag if etag and not etag.startswith('W/') else response.headers.get('Last-Modified')
+    if validator:
+        with open(validator_path, 'w') as file:
+            file.write(validator)
+    elif os.path.exists(validator_path):
+        os.remove(validator_path)
+
+
+def _read_validator(validator_path: str):
+    if not os.path.exists(validator_path):
+        return None
+    with open(validator_path) as file:
+        return file.read().strip() or None
@@ -0,0 +1,51 @@
+import numpy as np
+
+
+def lttb_indices(x, y, points: int):
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    length = len(x)
+    if points < 3:
+        raise ValueError('Invalid points: {0}, at least 3 are kept'.format(points))
+    if points >= length:
+        return np.arange(length)
+
+    every = (length - 2) / (points - 2)
+    result = np.empty(points, dtype=np.int64)
+    result[0] = 0
+    result[-1] = length - 1
+    selected = 0
+    for i in range(points - 2):
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, length)
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+        area = np.abs((x[selected] - avg_x) * (y[start:end] - y[selected]) -
+                      (x[selected] - x[start:end]) * (avg_y - y[selected]))
+        selected = start + int(area.argmax())
+        result[i + 1] = selected
+
+    return result
+
+
+def min_max_indices(y, points: int):
+    y = np.asarray(y, dtype=np.float64)
+    length = len(y)
+    if points < 2:
+        raise ValueError('Invalid points: {0}, at least 2 are kept'.format(points))
+    if points >= length:
+        return np.arange(length)
+
+    bounds = np.linspace(0, length, points // 2 + 1).astype(np.int64)
+    result = []
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        if start == end:
+            continue
+
+        chunk = y[start:end]
+        low = start + int(chunk.argmin())
+        high = start + int(chunk.argmax())
+        result.extend(sorted({low, high}))
+
+    return np.array(result, dtype=np.int64)
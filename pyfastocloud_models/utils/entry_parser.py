@@ -0,0 +1,212 @@
+from datetime import datetime
+from typing import NamedTuple, Callable
+
+from mongoengine import fields, errors
+
+# what update_entry does with the attribute of an optional key missing in the json
+KEEP = 0  # left as is
+RESET = 1  # set to the field default
+BLANK = 2  # set to the field default, also if the value is empty
+
+
+class EntryField(NamedTuple):
+    key: str
+    tp: type
+    required: bool = False
+    missing: int = KEEP
+    name: str = None  # attribute of the value, the key if None
+    convert: Callable = None  # of the checked value into the attribute value, raises ValueError on bad values
+
+
+_parsers = {}
+
+
+# Parses json into document by entry_fields in one pass, as the check_required_type/check_optional_type calls did:
+# values are type checked, ints are taken as floats, and values of declared fields are checked against their min/max
+# values or lengths, choices and regex, raising ValueError before the values are set. None values are missing ones,
+# front dicts hold None for unset optional values.
+# Patch parsers only parse the keys present in json, missing ones are left as is, None values of optional fields
+# are reset unless kept, and return the names of the parsed attributes.
+def get_parser(cls, entry_fields: tuple, patch=False):
+    key = (cls, entry_fields, patch)
+    parser = _parsers.get(key)
+    if not parser:
+        parser = _compile(cls, entry_fields, patch)
+        _parsers[key] = parser
+    return parser
+
+
+def parse_entry(document, json: dict, entry_fields: tuple):
+    get_parser(document.__class__, entry_fields)(document, json)
+
+
+# $set of the stored values of the named attributes of document, $unset of the None ones, values are validated by
+# their fields as patches are written without validate() of the document
+def patch_update(document, names: list) -> dict:
+    fields_set = {}
+    fields_unset = {}
+    for name in names:
+        field = document._fields[name]
+        value = document._data.get(name)
+        if value is None:
+            fields_unset[field.db_field] = ''
+            continue
+
+        try:
+            field.validate(value)
+        except errors.ValidationError as err:
+            raise ValueError('Invalid input field({0}) {1}'.format(field.db_field, err.message))
+        fields_set[field.db_field] = field.to_mongo(value)
+
+    update = {}
+    if fields_set:
+        update['$set'] = fields_set
+    if fields_unset:
+        update['$unset'] = fields_unset
+    return update
+
+
+# Writes the named attributes of the saved document by one atomic update_one of only their values, returns the update
+def apply_patch(document, names: list) -> dict:
+    if document.pk is None:
+        raise ValueError('Invalid input, document not saved')
+
+    update = patch_update(document, names)
+    if update:
+        document._get_collection().update_one({'_id': document.pk}, update)
+        written = set(update.get('$set', {})) | set(update.get('$unset', {}))
+        document._changed_fields = [changed for changed in document._changed_fields if
+                                    changed.split('.', 1)[0] not in written]
+    return update
+
+
+# Parses the keys of json present in entry_fields into the saved document, checked as update_entry checks them,
+# calls prepare(names) if given and writes them by apply_patch. Values are assigned while parsing, if a key fails
+# the attributes of the document are restored so a later save() doesn't write a part of the patch.
+def patch_entry(document, json: dict, entry_fields: tuple, prepare=None) -> dict:
+    if document.pk is None:
+        raise ValueError('Invalid input, document not saved')
+
+    stored = {}
+    for entry_field in entry_fields:
+        name = entry_field.name or entry_field.key
+        stored[name] = document._data.get(name)
+    changed_fields = list(document._changed_fields)
+    try:
+        names = get_parser(document.__class__, entry_fields, True)(document, json)
+        if prepare:
+            prepare(names)
+        return apply_patch(document, names)
+    except ValueError:
+        document._data.update(stored)
+        document._changed_fields = changed_fields
+        raise
+
+
+# convert helpers of entry fields
+def msec_to_date(msec: int) -> datetime:
+    return datetime.utcfromtimestamp(msec / 1000)
+
+
+def entry_of(entry_cls):
+    def make_entry(value: dict):
+        return entry_cls.make_entry(value)
+
+    return make_entry
+
+
+def entries_of(entry_cls):
+    def make_entries(values: list) -> list:
+        return [entry_cls.make_entry(value) for value in values]
+
+    return make_entries
+
+
+def _field_checks(field) -> list:
+    checks = []
+    if isinstance(field, (fields.IntField, fields.FloatField)):
+        if field.min_value is not None:
+            checks.append(('value < {0}', field.min_value, 'is too small'))
+        if field.max_value is not None:
+            checks.append(('value > {0}', field.max_value, 'is too large'))
+    elif isinstance(field, fields.StringField):
+        if field.min_length is not None:
+            checks.append(('len(value) < {0}', field.min_length, 'is too short'))
+        if field.max_length is not None:
+            checks.append(('len(value) > {0}', field.max_length, 'is too long'))
+        if field.regex is not None:
+            checks.append(('not {0}.match(value)', field.regex, 'did not match validation regex'))
+    if field.choices:
+        choices = [choice[0] if isinstance(choice, (list, tuple)) else choice for choice in field.choices]
+        checks.append(('value not in {0}', frozenset(choices), 'is not a valid choice'))
+    return checks
+
+
+def _compile(cls, entry_fields: tuple, patch: bool):
+    namespace = {}
+    lines = ['def parse(document, json):', '    if not json:', "        raise ValueError('Invalid input')"]
+    if patch:
+        lines.append('    names = []')
+
+    def emit_set(entry_field: EntryField, indent: str):
+        name = entry_field.name or entry_field.key
+        field = getattr(cls, '_fields', {}).get(name)
+        if patch and isinstance(field, fields.ListField) and field.required:
+            # patches are written without validate()
+            lines.append('{0}if not value:'.format(indent))
+            lines.append('{0}    raise ValueError({1!r})'.format(indent, 'Invalid input({0} required)'.format(
+                entry_field.key)))
+        if entry_field.convert:
+            convert_name = 'convert_{0}'.format(len(namespace))
+            namespace[convert_name] = entry_field.convert
+            lines.append('{0}value = {1}(value)'.format(indent, convert_name))
+        elif field:
+            for condition, bound, reason in _field_checks(field):
+                bound_name = 'bound_{0}'.format(len(namespace))
+                namespace[bound_name] = bound
+                lines.append('{0}if {1}:'.format(indent, condition.format(bound_name)))
+                message = 'Invalid input field({0}) value {1}'.format(entry_field.key, reason)
+                lines.append('{0}    raise ValueError({1!r})'.format(indent, message))
+        lines.append('{0}document.{1} = value'.format(indent, name))
+
+    for entry_field in entry_fields:
+        key = entry_field.key
+        name = entry_field.name or key
+        type_name = 'type_{0}'.format(len(namespace))
+        namespace[type_name] = entry_field.tp
+        if patch:
+            lines.append('    if {0!r} in json:'.format(key))
+            lines.append('        names.append({0!r})'.format(name))
+            indent = '        '
+        else:
+            indent = '    '
+        lines.append('{0}value = json.get({1!r})'.format(indent, key))
+        lines.append('{0}if value is None:'.format(indent))
+        if entry_field.required:
+            lines.append('{0}    raise ValueError({1!r})'.format(indent, 'Invalid input({0} required)'.format(key)))
+        elif entry_field.missing == KEEP:
+            if patch:
+                lines.append('{0}    names.pop()'.format(indent))
+            else:
+                lines.append('{0}    pass'.format(indent))
+        else:
+            lines.append('{0}    delattr(document, {1!r})'.format(indent, name))
+        lines.append('{0}else:'.format(indent))
+        if entry_field.tp is float:
+            lines.append('{0}    if value.__class__ is int:'.format(indent))
+            lines.append('{0}        value = float(value)'.format(indent))
+        lines.append('{0}    if not isinstance(value, {1}):'.format(indent, type_name))
+        lines.append('{0}        raise ValueError({1!r})'.format(
+            indent, 'Invalid input field({0}) expected type({1})'.format(key, entry_field.tp.__name__)))
+        if entry_field.missing == BLANK and not entry_field.required:
+            lines.append('{0}    if not value:'.format(indent))
+            lines.append('{0}        delattr(document, {1!r})'.format(indent, name))
+            lines.append('{0}    else:'.format(indent))
+            emit_set(entry_field, indent + '        ')
+        else:
+            emit_set(entry_field, indent + '    ')
+
+    if patch:
+        lines.append('    return names')
+    exec('\n'.join(lines), namespace)
+    return namespace['parse']
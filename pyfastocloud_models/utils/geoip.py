@@ -0,0 +1,95 @@
+import csv
+import ipaddress
+from array import array
+from bisect import bisect_right
+from functools import lru_cache
+
+MAX_IPV4 = 0xFFFFFFFF
+
+
+# IP range -> country table, rows of csv: start,end,country where start and end are addresses or integers
+# (integers up to 0xFFFFFFFF are IPv4), lookups bisect sorted range starts.
+# GeoIpTable.set_default(GeoIpTable.from_csv(path)) enables it in get_country_code_by_remote_addr
+class GeoIpTable:
+    DEFAULT_CACHE_SIZE = 65536
+
+    _default = None
+
+    def __init__(self, cache_size=DEFAULT_CACHE_SIZE):
+        self._starts = {4: array('L'), 6: []}
+        self._ends = {4: array('L'), 6: []}
+        self._countries = {4: [], 6: []}
+        self.lookup = lru_cache(maxsize=cache_size)(self._lookup)
+
+    @classmethod
+    def from_csv(cls, path: str, cache_size=DEFAULT_CACHE_SIZE) -> 'GeoIpTable':
+        table = cls(cache_size)
+        with open(path, newline='') as file:
+            table.load_rows(csv.reader(file))
+        return table
+
+    @staticmethod
+    def default() -> 'GeoIpTable':
+        return GeoIpTable._default
+
+    @staticmethod
+    def set_default(table):
+        GeoIpTable._default = table
+
+    def load_rows(self, rows):
+        ranges = {4: [], 6: []}
+        for row in rows:
+            if len(row) < 3:
+                continue
+
+            try:
+                version, start = GeoIpTable._parse_address(row[0])
+                _, end = GeoIpTable._parse_address(row[1])
+            except ValueError:  # header or broken row
+                continue
+
+            country = row[2].strip()
+            if country and country != '-':
+                ranges[version].append((start, end, country))
+
+        for version, items in ranges.items():
+            items.extend(zip(self._starts[version], self._ends[version], self._countries[version]))
+            items.sort()
+            starts = [item[0] for item in items]
+            ends = [item[1] for item in items]
+            # IPv6 values don't fit machine integers
+            self._starts[version] = array('L', starts) if version == 4 else starts
+            self._ends[version] = array('L', ends) if version == 4 else ends
+            self._countries[version] = [item[2] for item in items]
+        self.lookup.cache_clear()
+
+    def __len__(self):
+        return len(self._countries[4]) + len(self._countries[6])
+
+    # private
+    def _lookup(self, remote_addr: str):
+        try:
+            address = ipaddress.ip_address(remote_addr)
+        except ValueError:
+            return None
+
+        version = address.version
+        if version == 6 and address.ipv4_mapped:
+            address = address.ipv4_mapped
+            version = 4
+
+        value = int(address)
+        pos = bisect_right(self._starts[version], value) - 1
+        if pos < 0 or value > self._ends[version][pos]:
+            return None
+        return self._countries[version][pos]
+
+    @staticmethod
+    def _parse_address(value: str):
+        value = value.strip()
+        if value.isdigit():
+            number = int(value)
+            return (4 if number <= MAX_IPV4 else 6), number
+
+        address = ipaddress.ip_address(value)
+        return address.version, int(address)
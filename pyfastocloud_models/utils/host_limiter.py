@@ -0,0 +1,19 @@
+from threading import Lock, BoundedSemaphore
+from urllib.parse import urlparse
+
+
+# Bounds concurrent requests per host, use as: with limiter.acquire(url): ...
+class HostLimiter:
+    def __init__(self, per_host: int):
+        self.per_host = per_host
+        self._hosts = {}
+        self._lock = Lock()
+
+    def acquire(self, url: str) -> BoundedSemaphore:
+        host = urlparse(url).netloc.lower()
+        with self._lock:
+            semaphore = self._hosts.get(host)
+            if not semaphore:
+                semaphore = BoundedSemaphore(self.per_host)
+                self._hosts[host] = semaphore
+        return semaphore
@@ -0,0 +1,59 @@
+import json
+from datetime import datetime
+
+from bson.dbref import DBRef
+from bson.objectid import ObjectId
+
+from pyfastocloud_models.utils.utils import date_to_utc_msec
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+
+def _default(value):
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, datetime):
+        return date_to_utc_msec(value)
+    if isinstance(value, DBRef):
+        return str(value.id)
+    raise TypeError('Object of type {0} is not JSON serializable'.format(type(value).__name__))
+
+
+# IntEnum values are encoded as ints by json itself
+_encoder = json.JSONEncoder(default=_default, ensure_ascii=False, separators=(',', ':'))
+
+
+def encode(value) -> bytes:
+    return _encoder.encode(value).encode('utf-8')
+
+
+# Yields utf-8 chunks of a json array of serialize(document) for documents, a queryset is iterated without
+# caching so memory doesn't grow with the result, the first document is flushed at once.
+def iter_json_array(documents, serialize=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    if hasattr(documents, 'no_cache'):
+        documents = documents.no_cache()
+    if not serialize:
+        serialize = _front_dict
+
+    parts = ['[']
+    size = 1
+    first = True
+    for document in documents:
+        text = _encoder.encode(serialize(document))
+        if not first:
+            parts.append(',')
+            size += 1
+        parts.append(text)
+        size += len(text)
+        if first or size >= chunk_size:
+            yield ''.join(parts).encode('utf-8')
+            parts = []
+            size = 0
+        first = False
+
+    parts.append(']')
+    yield ''.join(parts).encode('utf-8')
+
+
+def _front_dict(document) -> dict:
+    return document.to_front_dict()
@@ -1,29 +1,49 @@
+import hashlib
+import mmap
+import os
 import re
+import zlib
+from queue import Queue, Full
+from threading import Thread, Event
+from urllib.parse import urlparse
+
+from pyfastocloud_models.utils.aho_corasick import AhoCorasick
+
+EXTINF_TOKEN_RE = re.compile(r'\s([\w-]+)="([^"]*)"|,(.*)$')
+UNKNOWN_VALUE = 'Unknown'
+EXTINF_ATTRIBUTES = {'tvg-name': 'tvg-name', 'tvg-id': 'tvg-id', 'tvg-logo': 'tvg-logo', 'group-title': 'tvg-group'}
+# entry keys other attributes can't be stored as
+RESERVED_ENTRY_KEYS = frozenset(['title', 'link', 'tvg-group'])
+GZIP_CONTENT_TYPES = ('application/gzip', 'application/x-gzip')
+URL_CHUNK_SIZE = 1024 * 1024
+URL_PREFETCH_CHUNKS = 8
 
 
 class M3uParser:
     def __init__(self):
         self.files = []
+        self._groups = {}
         self.lines = []
 
+    # The list of entries, files of each group are indexed by their positions while parsing and filtering. Entries can
+    # be changed in place once the list is handed out, so the index is dropped then and rebuilt by the next filter.
+    @property
+    def files(self):
+        self._groups = None
+        return self._files
+
+    @files.setter
+    def files(self, files):
+        self._files = files
+        self._groups = None
+
     # Read the file from the given path
     def read_m3u(self, file_path):
-        file = open(file_path)
-        self.load_content(file.read())
+        with open(file_path) as file:
+            self._load_lines(file)
 
     def load_content(self, content):
-        lines = []
-        for line in content.split('\n'):
-            ln = line.rstrip()
-            if ln:
-                if ln.startswith('#EXTM3U'):
-                    lines.append(ln)
-                elif ln.startswith('#EXTINF'):
-                    lines.append(ln)
-                elif ln[0] != '#':
-                    lines.append(ln)
-        self.lines = lines
-        return len(self.lines)
+        return self._load_lines(content.split('\n'))
 
     def parse(self):
         numLine = len(self.lines)
@@ -32,13 +52,105 @@ class M3uParser:
             if line[0] == '#':
                 self._manage_line(n)
 
+    # Read and parse the file from the given path without keeping its lines in memory
+    def parse_m3u(self, file_path):
+        for entry in M3uParser.iter_m3u(file_path):
+            self._add_entry(entry)
+
+    # Lazily yield entries of the file from the given path
+    @staticmethod
+    def iter_m3u(file_path):
+        with open(file_path) as file:
+            yield from M3uParser.iter_lines(file)
+
+    # Parse the file from the given path on several processes
+    def parse_m3u_parallel(self, file_path, workers=None):
+        for entry in M3uParser.iter_m3u_parallel(file_path, workers):
+            self._add_entry(entry)
+
+    # Yield entries of the file from the given path parsed in chunks by a process pool, order is kept
+    @staticmethod
+    def iter_m3u_parallel(file_path, workers=None):
+        if not workers:
+            workers = os.cpu_count() or 1
+
+        ranges = M3uParser._split_m3u(file_path, workers * 4) if workers > 1 else []
+        if len(ranges) < 2:
+            yield from M3uParser.iter_m3u(file_path)
+            return
+
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            paths = [file_path] * len(ranges)
+            starts = [start for start, _ in ranges]
+            ends = [end for _, end in ranges]
+            for entries in executor.map(M3uParser._parse_m3u_range, paths, starts, ends):
+                yield from entries
+
+    # Stream the playlist from the given url, yields (entry, offset) where offset is the position in the decoded
+    # content after the entry at which no line is pending, passing it back as offset resumes the parsing after
+    # that entry
+    @staticmethod
+    def iter_m3u_url(url: str, offset=0, timeout=10):
+        position = offset
+        pending = b''
+        line_info = None
+        for chunk in M3uParser._iter_url_chunks(url, offset, timeout):
+            lines = (pending + chunk).split(b'\n')
+            pending = lines.pop()
+            for line in lines:
+                start = position
+                position += len(line) + 1
+                ln = M3uParser._stable_line(line.decode('utf-8', errors='replace'))
+                if not ln:
+                    continue
+
+                if line_info is not None:
+                    entry = M3uParser._make_entry(line_info, ln)
+                    if entry:
+                        # a # link line is also the info line of the next entry, resumed from its start
+                        yield entry, start if ln[0] == '#' else position
+                line_info = ln if ln[0] == '#' else None
+
+        ln = M3uParser._stable_line(pending.decode('utf-8', errors='replace'))
+        if ln and line_info is not None:
+            entry = M3uParser._make_entry(line_info, ln)
+            if entry:
+                yield entry, position + len(pending)
+
+    # Lazily yield entries pairing each #EXTINF line with the next line
+    @staticmethod
+    def iter_lines(lines):
+        line_info = None
+        for line in lines:
+            ln = M3uParser._stable_line(line)
+            if not ln:
+                continue
+
+            if line_info is not None:
+                entry = M3uParser._make_entry(line_info, ln)
+                if entry:
+                    yield entry
+            line_info = ln if ln[0] == '#' else None
+
+    # Content hash of the entry, link and all attributes
+    @staticmethod
+    def entry_hash(entry: dict) -> str:
+        content = '\n'.join('{0}={1}'.format(key, entry[key]) for key in sorted(entry))
+        return hashlib.sha1(content.encode('utf-8')).hexdigest()
+
     # Getter for the list
     def get_list(self):
         return self.files
 
     # Remove files that contains a certain filterWord
     def filter_out_files_of_groups_containing(self, filter_word):
-        self.files = list(filter(lambda file: filter_word not in file['tvg-group'], self.files))
+        if not isinstance(filter_word, list):
+            filter_word = [filter_word]
+        if not len(filter_word):
+            return
+        matcher = AhoCorasick(filter_word)
+        self._select_groups(lambda group: not matcher.search(group))
 
     # Select only files that contais a certain filterWord
     def filter_in_files_of_groups_containing(self, filter_word):
@@ -47,33 +159,184 @@ class M3uParser:
             filter_word = [filter_word]
         if not len(filter_word):
             return
-        new = []
-        for file in self.files:
-            for fw in filter_word:
-                if fw in file['tvg-group']:
-                    # Allowed extension - go to next file
-                    new.append(file)
-                    break
-        self.files = new
+        matcher = AhoCorasick(filter_word)
+        self._select_groups(matcher.search)
 
     # private
+    def _load_lines(self, content):
+        lines = []
+        for line in content:
+            ln = M3uParser._stable_line(line)
+            if ln:
+                lines.append(ln)
+        self.lines = lines
+        return len(self.lines)
+
+    @staticmethod
+    def _split_m3u(file_path, chunks: int):
+        size = os.path.getsize(file_path)
+        if not size:
+            return []
+
+        ranges = []
+        with open(file_path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            start = 0
+            for i in range(1, chunks):
+                pos = mm.find(b'\n#EXTINF', max(start, size * i // chunks))
+                if pos == -1:
+                    break
+                ranges.append((start, pos + 1))
+                start = pos + 1
+        ranges.append((start, size))
+        return ranges
+
+    @staticmethod
+    def _parse_m3u_range(file_path, start: int, end: int):
+        with open(file_path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            # next chunk begins with #EXTINF, take its line to pair a trailing entry the same way as parse does
+            next_end = mm.find(b'\n', end)
+            data = mm[start:next_end if next_end != -1 else len(mm)]
+        lines = data.decode('utf-8', errors='replace').split('\n')
+        return list(M3uParser.iter_lines(lines))
+
+    @staticmethod
+    def _open_url(url: str, offset: int, timeout):
+        import requests
+
+        # compressed playlists can't be resumed by range, the decoded content is skipped instead
+        headers = {}
+        if offset and not urlparse(url).path.endswith('.gz'):
+            headers = {'Range': 'bytes={0}-'.format(offset), 'Accept-Encoding': 'identity'}
+
+        response = requests.get(url, headers=headers, stream=True, timeout=timeout)
+        response.raise_for_status()
+        gzipped = M3uParser._is_gzip_response(url, response)
+        if response.status_code == 206 and gzipped:
+            response.close()
+            response = requests.get(url, stream=True, timeout=timeout)
+            response.raise_for_status()
+
+        skip = offset if response.status_code != 206 else 0
+        return response, skip, gzipped
+
+    @staticmethod
+    def _is_gzip_response(url: str, response) -> bool:
+        # content encoding is decoded by requests itself
+        if 'gzip' in response.headers.get('Content-Encoding', ''):
+            return False
+
+        content_type = response.headers.get('Content-Type', '').split(';')[0].strip()
+        return content_type in GZIP_CONTENT_TYPES or urlparse(url).path.endswith('.gz')
+
+    # decoded content chunks downloaded by a thread, so the network read overlaps parsing and writes of the consumer
+    @staticmethod
+    def _iter_url_chunks(url: str, offset: int, timeout):
+        chunks = Queue(maxsize=URL_PREFETCH_CHUNKS)
+        stop = Event()
+
+        def put(item):
+            while not stop.is_set():
+                try:
+                    chunks.put(item, timeout=1)
+                    return True
+                except Full:
+                    continue
+            return False
+
+        def download():
+            try:
+                response, skip, gzipped = M3uParser._open_url(url, offset, timeout)
+                with response:
+                    decoder = zlib.decompressobj(zlib.MAX_WBITS | 32) if gzipped else None
+                    for chunk in response.iter_content(URL_CHUNK_SIZE):
+                        if decoder:
+                            chunk = decoder.decompress(chunk)
+                        if skip:
+                            dropped = min(skip, len(chunk))
+                            chunk = chunk[dropped:]
+                            skip -= dropped
+                        if chunk and not put(chunk):
+                            return
+
+                    tail = decoder.flush()[skip:] if decoder else b''
+                    if tail and not put(tail):
+                        return
+                put(None)
+            except Exception as ex:
+                put(ex)
+
+        thread = Thread(target=download, daemon=True)
+        thread.start()
+        try:
+            while True:
+                chunk = chunks.get()
+                if chunk is None:
+                    break
+                if isinstance(chunk, Exception):
+                    raise chunk
+                yield chunk
+        finally:
+            stop.set()
+            thread.join()
+
+    @staticmethod
+    def _stable_line(line):
+        ln = line.rstrip()
+        if ln:
+            if ln.startswith('#EXTM3U'):
+                return ln
+            elif ln.startswith('#EXTINF'):
+                return ln
+            elif ln[0] != '#':
+                return ln
+        return None
+
     def _manage_line(self, n):
         if n + 1 < len(self.lines):
-            line_info = self.lines[n]
-            line_link = self.lines[n + 1]
-            if not line_info.startswith('#EXTM3U'):
-                m = re.search('tvg-name=\"(.*?)\"', line_info)
-                name = m.group(1) if m else 'Unknown'
-                m = re.search('tvg-id=\"(.*?)\"', line_info)
-                tid = m.group(1) if m else 'Unknown'
-                m = re.search('tvg-logo=\"(.*?)\"', line_info)
-                logo = m.group(1) if m else 'Unknown'
-                m = re.search('group-title=\"(.*?)\"', line_info)
-                group = m.group(1) if m else 'Unknown'
-                m = re.search('[,](?!.*[,])(.*?)$', line_info)
-                title = m.group(1) if m else 'Unknown'
-                # ~ print(name+"||"+id+"||"+logo+"||"+group+"||"+title)
-
-                test = {'title': title, 'tvg-name': name, 'tvg-id': tid, 'tvg-logo': logo, 'tvg-group': group,
-                        'link': line_link}
-                self.files.append(test)
+            entry = M3uParser._make_entry(self.lines[n], self.lines[n + 1])
+            if entry:
+                self._add_entry(entry)
+
+    def _add_entry(self, entry):
+        if self._groups is not None:
+            self._groups.setdefault(entry['tvg-group'], []).append(len(self._files))
+        self._files.append(entry)
+
+    def _index_groups(self):
+        groups = {}
+        for idx, file in enumerate(self._files):
+            groups.setdefault(file['tvg-group'], []).append(idx)
+        return groups
+
+    # match every distinct group once and keep files of accepted groups in their original order, the index of the
+    # kept files is renumbered so chained filters don't group the list again
+    def _select_groups(self, cb):
+        groups = self._groups
+        if groups is None:
+            groups = self._index_groups()
+
+        selected = {group: indexes for group, indexes in groups.items() if cb(group)}
+        positions = sorted(idx for indexes in selected.values() for idx in indexes)
+        files = self._files
+        self._files = [files[idx] for idx in positions]
+        renumbered = {old: new for new, old in enumerate(positions)}
+        self._groups = {group: [renumbered[idx] for idx in indexes] for group, indexes in selected.items()}
+
+    @staticmethod
+    def _make_entry(line_info, line_link):
+        if line_info.startswith('#EXTM3U'):
+            return None
+
+        entry = {'title': UNKNOWN_VALUE, 'tvg-name': UNKNOWN_VALUE, 'tvg-id': UNKNOWN_VALUE,
+                 'tvg-logo': UNKNOWN_VALUE, 'tvg-group': UNKNOWN_VALUE}
+        title = UNKNOWN_VALUE
+        for key, value, tail in EXTINF_TOKEN_RE.findall(line_info):
+            if not key:
+                title = tail
+            elif key in EXTINF_ATTRIBUTES:
+                entry[EXTINF_ATTRIBUTES[key]] = value
+            elif key not in RESERVED_ENTRY_KEYS:
+                entry[key] = value
+        entry['title'] = title
+        entry['link'] = line_link
+        return entry
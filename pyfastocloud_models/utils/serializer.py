@@ -0,0 +1,206 @@
+from bson.dbref import DBRef
+from mongoengine import Document, fields
+from mongoengine.base import get_document
+
+from pyfastocloud_models.utils.utils import date_to_utc_msec
+
+ID_KEY = '_id'
+CLS_KEY = '_cls'
+
+# fields which to_mongo stores as is, or through a builtin conversion
+_PLAIN_FIELDS = {fields.StringField: None, fields.EmailField: None, fields.DateTimeField: None,
+                 fields.ObjectIdField: None, fields.IntField: int, fields.FloatField: float,
+                 fields.BooleanField: bool}
+
+_serializers = {}
+
+
+# Same dict as document.to_mongo().to_dict(), in one pass over document._data by a function generated once per class.
+# Front serializers skip _id and _cls, front_fields are (key, func(document), raw_func(data, refs)) triples: keys of
+# declared fields are replaced in place, other keys are appended in the given order.
+# Raw serializers take the raw pymongo dict instead of a document, fill in field defaults as loading the document
+# would and call raw_func(data, refs) where refs are documents referenced by data, loaded by the caller.
+def get_serializer(cls, front=True, front_fields=(), raw=False):
+    key = (cls, front, front_fields, raw)
+    serializer = _serializers.get(key)
+    if not serializer:
+        serializer = _compile(cls, front, front_fields, raw)
+        _serializers[key] = serializer
+    return serializer
+
+
+def front_dict(document, front_fields=()) -> dict:
+    return get_serializer(document.__class__, True, front_fields)(document)
+
+
+def mongo_dict(document) -> dict:
+    return get_serializer(document.__class__, False)(document)
+
+
+# class of the raw dict by its _cls as mongoengine picks it on load
+def document_class(data: dict, default_cls):
+    class_name = data.get(CLS_KEY)
+    if not class_name or class_name == default_cls._class_name:
+        return default_cls
+    return get_document(class_name)
+
+
+def raw_front_dict(cls, data: dict, front_fields=(), refs=None) -> dict:
+    return get_serializer(cls, True, front_fields, True)(data, refs)
+
+
+def raw_mongo_dict(cls, data: dict) -> dict:
+    return get_serializer(cls, False, (), True)(data, None)
+
+
+# lists of at most size raw dicts of the cursor, so references of a batch are loaded by one query
+def raw_batches(cursor, size: int):
+    batch = []
+    for data in cursor:
+        batch.append(data)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# value of the field in the raw dict or its default, as the loaded document has it
+def raw_value(cls, data: dict, name: str):
+    field = cls._fields[name]
+    value = data.get(field.db_field)
+    if value is None and field.default is not None:
+        value = field.default() if callable(field.default) else field.default
+    return value
+
+
+# to_front_dict of the embedded document in the raw dict or of the field default
+def raw_front_embedded(cls, data: dict, name: str) -> dict:
+    value = raw_value(cls, data, name)
+    if isinstance(value, dict):
+        return raw_front_dict(document_class(value, cls._fields[name].document_type), value)
+    return value.to_front_dict() if value is not None else None
+
+
+# raw_func helpers of front_fields
+def raw_id(data: dict, refs) -> str:
+    return str(data[ID_KEY])
+
+
+def raw_date_msec(key: str, default=None):
+    def date_msec(data: dict, refs) -> int:
+        value = data.get(key)
+        if value is None:
+            value = default() if callable(default) else default
+        return date_to_utc_msec(value)
+
+    return date_msec
+
+
+def raw_front_list(key: str, default_cls):
+    def front_list(data: dict, refs) -> list:
+        return [raw_front_dict(document_class(item, default_cls), item) for item in data.get(key) or []]
+
+    return front_list
+
+
+def _reference_id(value):
+    if isinstance(value, Document):
+        return value.pk
+    if isinstance(value, DBRef):
+        return value.id
+    return value
+
+
+# None if to_mongo stores values of the field as is
+def _field_converter(field, raw: bool):
+    field_type = type(field)
+    if field_type in _PLAIN_FIELDS:
+        return _PLAIN_FIELDS[field_type]
+
+    if field_type is fields.EmbeddedDocumentField:
+        document_type = field.document_type
+
+        def convert_embedded(value):
+            if isinstance(value, document_type):
+                return mongo_dict(value)
+            if raw and isinstance(value, dict):
+                return raw_mongo_dict(document_class(value, document_type), value)
+            return value
+
+        return convert_embedded
+
+    if field_type is fields.ReferenceField and not field.dbref and not field.document_type._meta.get('abstract'):
+        return _reference_id
+
+    if field_type in (fields.ListField, fields.EmbeddedDocumentListField) and field.field:
+        item_converter = _field_converter(field.field, raw)
+
+        def convert_list(value):
+            if isinstance(value, str):
+                return value
+            if not item_converter:
+                return list(value)
+            return [item_converter(item) for item in value]
+
+        return convert_list
+
+    if raw:
+        return lambda value: field.to_mongo(field.to_python(value))
+    return field.to_mongo
+
+
+def _compile(cls, front: bool, front_fields: tuple, raw: bool):
+    overrides = {key: raw_func if raw else func for key, func, raw_func in front_fields}
+    namespace = {}
+    if raw:
+        lines = ['def serialize(data, refs):', '    result = {}']
+    else:
+        lines = ['def serialize(document):', '    data = document._data', '    result = {}']
+
+    def emit_value(name: str, key: str, field):
+        converter = _field_converter(field, raw)
+        lines.append('    value = data.get({0!r})'.format(key if raw else name))
+        if raw and field.default is not None and not field.null:
+            default_name = 'default_{0}'.format(len(namespace))
+            namespace[default_name] = field.default
+            lines.append('    if value is None:')
+            if callable(field.default):
+                lines.append('        value = {0}()'.format(default_name))
+            else:
+                lines.append('        value = {0}'.format(default_name))
+        lines.append('    if value is not None:')
+        if converter:
+            converter_name = 'convert_{0}'.format(len(namespace))
+            namespace[converter_name] = converter
+            lines.append('        result[{0!r}] = {1}(value)'.format(key, converter_name))
+        else:
+            lines.append('        result[{0!r}] = value'.format(key))
+
+    def emit_override(key: str):
+        func_name = 'front_{0}'.format(len(namespace))
+        namespace[func_name] = overrides.pop(key)
+        lines.append('    result[{0!r}] = {1}({2})'.format(key, func_name, 'data, refs' if raw else 'document'))
+
+    id_field = cls._meta.get('id_field')
+    if id_field and not front:
+        emit_value(id_field, ID_KEY, cls._fields[id_field])
+    if cls._meta.get('allow_inheritance') and not front:
+        lines.append('    result[{0!r}] = {1!r}'.format(CLS_KEY, cls._class_name))
+
+    for name in cls._fields_ordered:
+        field = cls._fields[name]
+        key = field.db_field
+        if key == ID_KEY or key == CLS_KEY:
+            continue
+        if key in overrides:
+            emit_override(key)
+        else:
+            emit_value(name, key, field)
+
+    for key in list(overrides):
+        emit_override(key)
+    lines.append('    return result')
+
+    exec('\n'.join(lines), namespace)
+    return namespace['serialize']
@@ -0,0 +1,87 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from pyfastocloud_models.utils.host_limiter import HostLimiter
+
+PROBE_SCHEMES = ('http', 'https')
+
+
+# Checks urls the same way as is_valid_http_url, but many at once over pooled keep-alive connections
+class UrlProber:
+    DEFAULT_WORKERS = 64
+    DEFAULT_PER_HOST = 8
+    DEFAULT_TTL = 60
+    DEFAULT_TIMEOUT = 1
+
+    def __init__(self, workers=DEFAULT_WORKERS, per_host=DEFAULT_PER_HOST, ttl=DEFAULT_TTL, timeout=DEFAULT_TIMEOUT):
+        self.workers = workers
+        self.per_host = per_host
+        self.ttl = ttl
+        self.timeout = timeout
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=per_host)
+        self._session.mount('http://', adapter)
+        self._session.mount('https://', adapter)
+        self._limiter = HostLimiter(per_host)
+        self._cache = {}  # (url, proxy): (expire time, result)
+        self._lock = Lock()
+
+    @staticmethod
+    def is_probeable(url: str) -> bool:
+        try:
+            return urlparse(url).scheme in PROBE_SCHEMES
+        except (TypeError, ValueError):
+            return False
+
+    def probe(self, url: str, proxy=None) -> bool:
+        key = (url, proxy)
+        now = time.monotonic()
+        with self._lock:
+            cached = self._cache.get(key)
+        if cached and cached[0] > now:
+            return cached[1]
+
+        with self._limiter.acquire(url):
+            result = self._head(url, proxy)
+
+        with self._lock:
+            self._cache[key] = (time.monotonic() + self.ttl, result)
+        return result
+
+    # {(url, proxy): result} for all probeable urls, urls are (url, proxy) pairs or plain strings
+    def probe_many(self, urls) -> dict:
+        keys = {}
+        for url in urls:
+            key = url if isinstance(url, tuple) else (url, None)
+            if UrlProber.is_probeable(key[0]):
+                keys[key] = None
+        keys = list(keys)
+
+        if not keys:
+            return {}
+
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(keys))) as executor:
+            results = executor.map(lambda key: self.probe(*key), keys)
+            return dict(zip(keys, results))
+
+    def clear_cache(self):
+        with self._lock:
+            self._cache = {}
+
+    def close(self):
+        self._session.close()
+
+    # private
+    def _head(self, url: str, proxy) -> bool:
+        proxies = {'http': proxy, 'https': proxy} if proxy else None
+        try:
+            response = self._session.head(url, timeout=self.timeout, proxies=proxies)
+            response.close()
+            return response.status_code == 200
+        except requests.RequestException:
+            return False
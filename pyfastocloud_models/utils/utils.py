@@ -1,9 +1,10 @@
-import os
-import uuid
 from datetime import datetime, timezone
-from urllib.parse import urlparse
+from functools import lru_cache
+from urllib.parse import urlparse, urlsplit, urlunsplit, parse_qsl, urlencode
 
-import requests
+# network helpers import requests and friends lazily, models import this module for date and url helpers only
+REMOTE_COUNTRY_CACHE_SIZE = 4096
+DEFAULT_PORTS = {'http': 80, 'https': 443, 'rtmp': 1935, 'rtmps': 443, 'rtsp': 554, 'ftp': 21}
 
 
 def date_to_utc_msec(date: datetime):
@@ -22,27 +23,15 @@ def remove_port_from_url(url: str) -> str:
 
 
 def download_file(url: str, path: str, extension: str, timeout=1):
-    get_response = requests.get(url, stream=True, timeout=timeout)
-    parsed_url = urlparse(url)
-    file_name = parsed_url.path.split('/')[-1]
-    if not file_name:
-        ts = datetime.now()
-        # msec = int(ts.timestamp() * 1000)
-        unique_filename = str(uuid.uuid4())
-        file_name = '{0}{1}'.format(unique_filename, extension)
-    full_path = os.path.join(path, file_name)
-    with open(full_path, 'wb') as f:
-        for chunk in get_response.iter_content(chunk_size=1024):
-            if chunk:  # filter out keep-alive new chunks
-                f.write(chunk)
-
-    return full_path, file_name
+    from pyfastocloud_models.utils.download_manager import DownloadManager
+    return DownloadManager.default().download(url, path, extension, timeout)
 
 
 def is_valid_http_url(url: str, timeout=1) -> bool:
     if not url or len(url) == 0:
         return False
 
+    import requests
     try:
         response = requests.head(url, timeout=timeout)
         return response.status_code == 200
@@ -50,6 +39,28 @@ def is_valid_http_url(url: str, timeout=1) -> bool:
         return False
 
 
+# same resource urls have the same normalized form: scheme and host case folded, default port removed, query sorted
+def normalize_uri(uri: str) -> str:
+    try:
+        parsed = urlsplit(uri.strip())
+        port = parsed.port
+    except (AttributeError, ValueError):
+        return uri
+
+    scheme = parsed.scheme.lower()
+    if not scheme or not parsed.hostname:
+        return urlunsplit((scheme, parsed.netloc, parsed.path, parsed.query, parsed.fragment))
+
+    host = parsed.hostname
+    if ':' in host:
+        host = '[{0}]'.format(host)
+    if port is not None and port != DEFAULT_PORTS.get(scheme):
+        host = '{0}:{1}'.format(host, port)
+    netloc = parsed.netloc.rpartition('@')[0] + '@' + host if '@' in parsed.netloc else host
+    query = urlencode(sorted(parse_qsl(parsed.query, keep_blank_values=True)))
+    return urlunsplit((scheme, netloc, parsed.path or '/', query, parsed.fragment))
+
+
 def is_valid_url(url):
     try:
         parsed_url = urlparse(url)
@@ -58,8 +69,30 @@ def is_valid_url(url):
         return False
 
 
-def get_country_code_by_remote_addr(remote_addr: str):
+# Country by the local GeoIpTable.default() table, the ipinfo.io request is only a fallback
+def get_country_code_by_remote_addr(remote_addr: str, remote_fallback=True, timeout=1):
+    from pyfastocloud_models.utils.geoip import GeoIpTable
+    table = GeoIpTable.default()
+    if table:
+        country = table.lookup(remote_addr)
+        if country:
+            return country
+
+    if not remote_fallback:
+        return None
+
+    import requests
+    try:
+        return _remote_country_code(remote_addr, timeout)
+    except (requests.RequestException, ValueError):
+        return None
+
+
+# private
+@lru_cache(maxsize=REMOTE_COUNTRY_CACHE_SIZE)
+def _remote_country_code(remote_addr: str, timeout):
+    import requests
     url = 'http://ipinfo.io/' + remote_addr
-    response = requests.get(url)
+    response = requests.get(url, timeout=timeout)
     data = response.json()
     return data.get('country', None)
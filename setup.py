@@ -24,6 +24,11 @@ VERSION = '1.4.1'
 REQUIRED = ['pyfastogt @ git+git://github.com/fastogt/pyfastogt@master',
             'mongoengine>=0.22.1']
 
+# What packages are optional?
+EXTRAS = {
+    'stats': ['numpy'],
+}
+
 # The rest you shouldn't have to touch too much :)
 # ------------------------------------------------
 # Except, perhaps the License and Trove Classifiers!
@@ -100,6 +105,7 @@ setup(
     #     'console_scripts': ['mycli=mymodule:cli'],
     # },
     install_requires=REQUIRED,
+    extras_require=EXTRAS,
     include_package_data=True,
     license='LGPL',
     classifiers=[
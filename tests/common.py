@@ -233,6 +233,15 @@ class CommonTest(unittest.TestCase):
         self.assertEqual(rtmp_url.uri, rtmp_str_url)
         self.assertTrue(rtmp_url.is_valid())
 
+    def test_codes(self):
+        self.assertTrue(constants.is_valid_country_code('US'))
+        self.assertTrue(constants.is_valid_country_code('ZW'))
+        self.assertFalse(constants.is_valid_country_code('us'))
+        self.assertFalse(constants.is_valid_country_code(None))
+        self.assertTrue(constants.is_valid_locale_code(constants.DEFAULT_LOCALE))
+        self.assertTrue(constants.is_valid_locale_code('ru'))
+        self.assertFalse(constants.is_valid_locale_code('xx'))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+import gzip
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from functools import partial
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+
+from pyfastocloud_models.utils.download_manager import DownloadManager, PART_EXTENSION, VALIDATOR_EXTENSION
+
+ETAG = '"content"'
+
+
+class RangeHandler(SimpleHTTPRequestHandler):
+    ranges = []
+
+    def do_GET(self):
+        path = self.translate_path(self.path)
+        if not os.path.isfile(path):
+            self.send_error(404)
+            return
+
+        with open(path, 'rb') as file:
+            data = file.read()
+        if os.path.basename(path).startswith('encoded'):  # served encoded whatever is accepted
+            body = gzip.compress(data)
+            self.send_response(200)
+            self.send_header('Content-Encoding', 'gzip')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+
+        start = 0
+        header = self.headers.get('Range')
+        if header and self.headers.get('If-Range', ETAG) == ETAG:
+            start = int(header.split('=')[1].rstrip('-'))
+            RangeHandler.ranges.append(start)
+            if start >= len(data):
+                self.send_response(416)
+                self.send_header('Content-Range', 'bytes */{0}'.format(len(data)))
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header('Content-Range', 'bytes {0}-{1}/{2}'.format(start, len(data) - 1, len(data)))
+        else:
+            self.send_response(200)
+        self.send_header('ETag', ETAG)
+        self.send_header('Content-Length', str(len(data) - start))
+        self.end_headers()
+        self.wfile.write(data[start:])
+
+    def log_message(self, *args):
+        pass
+
+
+class DownloadManagerTest(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.target = tempfile.mkdtemp()
+        self.content = os.urandom(3 * 1024 * 1024 + 123)
+        for name in ['vod{0}.mp4'.format(i) for i in range(5)] + ['encoded.mp4']:
+            with open(os.path.join(self.root, name), 'wb') as file:
+                file.write(self.content)
+
+        RangeHandler.ranges = []
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), partial(RangeHandler, directory=self.root))
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        self.base = 'http://127.0.0.1:{0}/'.format(self.server.server_port)
+        self.manager = DownloadManager(chunk_size=64 * 1024)
+
+    def tearDown(self):
+        self.manager.close()
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.root)
+        shutil.rmtree(self.target)
+
+    def assertDownloaded(self, full_path):
+        with open(full_path, 'rb') as file:
+            self.assertEqual(file.read(), self.content)
+        self.assertFalse(os.path.exists(full_path + PART_EXTENSION))
+        self.assertFalse(os.path.exists(full_path + PART_EXTENSION + VALIDATOR_EXTENSION))
+
+    def write_part(self, data: bytes, validator: str):
+        part_path = os.path.join(self.target, 'vod0.mp4' + PART_EXTENSION)
+        with open(part_path, 'wb') as file:
+            file.write(data)
+        with open(part_path + VALIDATOR_EXTENSION, 'w') as file:
+            file.write(validator)
+
+    def test_download(self):
+        urls = [self.base + 'vod{0}.mp4'.format(i) for i in range(5)]
+        results, failed = self.manager.download_many(urls + [self.base + 'missing.mp4'], self.target)
+        self.assertEqual(list(failed.keys()), [self.base + 'missing.mp4'])
+        for url in urls:
+            full_path, file_name = results[url]
+            self.assertEqual(full_path, os.path.join(self.target, file_name))
+            self.assertDownloaded(full_path)
+
+        # urls of the same file name are downloaded one after another
+        urls = [self.base + 'vod1.mp4', self.base + 'vod1.mp4?copy']
+        results, failed = self.manager.download_many(urls, self.target)
+        self.assertEqual(failed, {})
+        self.assertEqual(results[urls[0]], results[urls[1]])
+        self.assertDownloaded(results[urls[0]][0])
+
+    def test_resume(self):
+        url = self.base + 'vod0.mp4'
+        self.write_part(self.content[:1000], ETAG)
+        full_path, _ = self.manager.download(url, self.target)
+        self.assertEqual(RangeHandler.ranges, [1000])
+        self.assertDownloaded(full_path)
+
+        # changed content is downloaded again
+        self.write_part(b'0' * 1000, '"changed"')
+        self.manager.download(url, self.target)
+        self.assertEqual(RangeHandler.ranges, [1000])
+        self.assertDownloaded(full_path)
+
+        # complete part files are not downloaded again, larger ones are
+        self.write_part(self.content, ETAG)
+        self.manager.download(url, self.target)
+        self.assertDownloaded(full_path)
+        self.write_part(self.content + b'0', ETAG)
+        self.manager.download(url, self.target)
+        self.assertEqual(RangeHandler.ranges, [1000, len(self.content), len(self.content) + 1])
+        self.assertDownloaded(full_path)
+
+    def test_encoded(self):
+        full_path, _ = self.manager.download(self.base + 'encoded.mp4', self.target)
+        self.assertDownloaded(full_path)
+
+
+if __name__ == '__main__':
+    unittest.main()
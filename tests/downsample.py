@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+import math
+import unittest
+
+from pyfastocloud_models.utils.downsample import lttb_indices, min_max_indices
+
+
+class DownsampleTest(unittest.TestCase):
+    def test_lttb(self):
+        x = list(range(10000))
+        y = [math.sin(i / 100.0) for i in x]
+        indices = lttb_indices(x, y, 1000)
+        self.assertEqual(len(indices), 1000)
+        self.assertEqual(indices[0], 0)
+        self.assertEqual(indices[-1], len(x) - 1)
+        self.assertTrue(all(indices[i] < indices[i + 1] for i in range(len(indices) - 1)))
+
+        small = lttb_indices([0, 1, 2], [0, 1, 2], 1000)
+        self.assertEqual(list(small), [0, 1, 2])
+        for points in [-1, 0, 1, 2]:
+            with self.assertRaises(ValueError):
+                lttb_indices(x, y, points)
+
+    def test_min_max(self):
+        y = [0] * 1000
+        y[123] = 100
+        y[877] = -100
+        indices = min_max_indices(y, 10)
+        self.assertIn(123, indices)
+        self.assertIn(877, indices)
+        self.assertLessEqual(len(indices), 10)
+        self.assertTrue(all(indices[i] < indices[i + 1] for i in range(len(indices) - 1)))
+        self.assertEqual(list(min_max_indices(y, 2)), [123, 877])
+        for points in [-1, 0, 1]:
+            with self.assertRaises(ValueError):
+                min_max_indices(y, points)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+import unittest
+from datetime import datetime
+from unittest import mock
+
+try:
+    import mongomock
+except ImportError:
+    mongomock = None
+
+from pyfastocloud_models.common_entries import InputUrl, OutputUrl
+from pyfastocloud_models.service.entry import ServiceSettings
+from pyfastocloud_models.stream.entry import IStream, ProxyStream, EncodeStream, TimeshiftPlayerStream
+from pyfastocloud_models.utils.entry_parser import EntryField, BLANK, RESET, get_parser, patch_update
+
+
+class EntryParserTest(unittest.TestCase):
+    def setUp(self):
+        self.output = [OutputUrl(id=1, uri='http://localhost/1/master.m3u8').to_front_dict()]
+
+    def test_types(self):
+        stream = ProxyStream.make_entry({IStream.NAME_FIELD: 'Proxy', IStream.PRICE_FIELD: 2,
+                                         IStream.CREATED_DATE_FIELD: 1600000000000, IStream.TVG_ID_FIELD: '',
+                                         IStream.OUTPUT_FIELD: self.output})
+        self.assertEqual(stream.price, 2.0)
+        self.assertIsInstance(stream.price, float)
+        self.assertEqual(stream.created_date, datetime.utcfromtimestamp(1600000000))
+        self.assertIsNone(stream.tvg_id)
+        self.assertEqual(stream.output[0].uri, self.output[0][OutputUrl.URI_FIELD])
+
+        for json in [{}, {IStream.NAME_FIELD: 'Proxy'}, {IStream.NAME_FIELD: 1, IStream.OUTPUT_FIELD: []},
+                     {IStream.NAME_FIELD: 'Proxy', IStream.OUTPUT_FIELD: [], IStream.PRICE_FIELD: '1'}]:
+            with self.assertRaises(ValueError):
+                ProxyStream.make_entry(json)
+
+    def test_ranges(self):
+        json = {IStream.NAME_FIELD: 'Proxy', IStream.OUTPUT_FIELD: self.output}
+        for key, value in [(IStream.IARC_FIELD, -1), (IStream.PRICE_FIELD, 1000000.0), (IStream.NAME_FIELD, '')]:
+            with self.assertRaises(ValueError):
+                ProxyStream.make_entry(dict(json, **{key: value}))
+
+        encode = dict(json, input=[], volume=1)
+        self.assertEqual(EncodeStream.make_entry(encode).volume, 1.0)
+        with self.assertRaises(ValueError):
+            EncodeStream.make_entry(dict(encode, frame_rate=1000))
+
+    def test_missing(self):
+        stream = EncodeStream.make_entry({IStream.NAME_FIELD: 'Encode', IStream.OUTPUT_FIELD: self.output,
+                                          EncodeStream.INPUT_FIELD: [], EncodeStream.FRAME_RATE_FIELD: 25,
+                                          EncodeStream.VIDEO_CODEC_FIELD: 'x264enc'})
+        stream.update_entry({IStream.NAME_FIELD: 'Encode', IStream.OUTPUT_FIELD: self.output,
+                             EncodeStream.INPUT_FIELD: []})
+        self.assertIsNone(stream.frame_rate)  # reset
+        self.assertEqual(stream.video_codec, 'x264enc')  # kept
+
+        player = TimeshiftPlayerStream.make_entry({IStream.NAME_FIELD: 'Player', IStream.OUTPUT_FIELD: self.output,
+                                                   TimeshiftPlayerStream.INPUT_FIELD: [],
+                                                   TimeshiftPlayerStream.TIMESHIFT_DELAY: 10})
+        self.assertEqual(player.timeshift_delay, 10)
+
+    def test_none(self):
+        # front dicts hold None for unset optional values
+        stream = EncodeStream.make_entry({IStream.NAME_FIELD: 'Encode', IStream.OUTPUT_FIELD: self.output,
+                                          IStream.TVG_ID_FIELD: None, EncodeStream.INPUT_FIELD: [],
+                                          EncodeStream.FRAME_RATE_FIELD: 25, EncodeStream.VIDEO_CODEC_FIELD: 'x264enc'})
+        self.assertIsNone(stream.tvg_id)
+        stream.update_entry({IStream.NAME_FIELD: 'Encode', IStream.OUTPUT_FIELD: self.output,
+                             EncodeStream.INPUT_FIELD: [], EncodeStream.FRAME_RATE_FIELD: None,
+                             EncodeStream.VIDEO_CODEC_FIELD: None})
+        self.assertIsNone(stream.frame_rate)  # reset
+        self.assertEqual(stream.video_codec, 'x264enc')  # kept
+        with self.assertRaises(ValueError):
+            stream.update_entry({IStream.NAME_FIELD: None, IStream.OUTPUT_FIELD: self.output,
+                                 EncodeStream.INPUT_FIELD: []})
+
+        parser = get_parser(EncodeStream, EncodeStream.ENTRY_FIELDS, True)
+        names = parser(stream, {IStream.VISIBLE_FIELD: None, EncodeStream.FRAME_RATE_FIELD: None})
+        self.assertEqual(names, [EncodeStream.FRAME_RATE_FIELD])
+
+    def test_validated(self):
+        host = {'host': 'localhost', 'port': 6317}
+        json = {ServiceSettings.NAME_FIELD: 'Service', ServiceSettings.HOST_FIELD: host,
+                ServiceSettings.HTTP_HOST_FIELD: host, ServiceSettings.VODS_HOST_FIELD: host,
+                ServiceSettings.CODS_HOST_FIELD: host, ServiceSettings.NGINX_HOST_FIELD: host,
+                ServiceSettings.RTMP_HOST_FIELD: host, ServiceSettings.FEEDBACK_DIRECOTRY_FIELD: '~/streamer',
+                ServiceSettings.TIMESHIFTS_DIRECTORY_FIELD: '~/streamer/timeshifts',
+                ServiceSettings.HLS_DIRECTORY_FIELD: '~/streamer/hls', ServiceSettings.VODS_DIRECTORY_FIELD: '~/vods',
+                ServiceSettings.CODS_DIRECTORY_FIELD: '~/cods', ServiceSettings.PROXY_DIRECTORY_FIELD: '~/proxy',
+                ServiceSettings.DATA_DIRECTORY_FIELD: '~/data', ServiceSettings.PRICE_PACKAGE_FIELD: 1,
+                ServiceSettings.MONITORING_FILED: False, ServiceSettings.AUTO_START_FIELD: False}
+        self.assertTrue(ServiceSettings.make_entry(json).is_valid())
+        # the whole document is validated, also the values kept
+        service = ServiceSettings(activation_key='invalid')
+        with self.assertRaises(ValueError):
+            service.update_entry(json)
+
+    def test_compiled_once(self):
+        entry_fields = (EntryField(IStream.NAME_FIELD, str, required=True),
+                        EntryField(IStream.TVG_NAME_FIELD, str, missing=BLANK),
+                        EntryField(IStream.GROUPS_FIELD, list, missing=RESET))
+        parser = get_parser(ProxyStream, entry_fields)
+        self.assertIs(get_parser(ProxyStream, entry_fields), parser)
+
+        stream = ProxyStream(groups=['News'], tvg_name='Name')
+        parser(stream, {IStream.NAME_FIELD: 'Proxy', IStream.TVG_NAME_FIELD: ''})
+        self.assertEqual(stream.name, 'Proxy')
+        self.assertIsNone(stream.tvg_name)
+        self.assertEqual(stream.groups, [])
+
+    def test_patch(self):
+        stream = ProxyStream.make_entry({IStream.NAME_FIELD: 'Proxy', IStream.TVG_ID_FIELD: 'proxy',
+                                         IStream.GROUPS_FIELD: ['News'], IStream.OUTPUT_FIELD: self.output})
+        parser = get_parser(ProxyStream, ProxyStream.ENTRY_FIELDS, True)
+        names = parser(stream, {IStream.NAME_FIELD: 'Patched', IStream.TVG_ID_FIELD: '', IStream.PRICE_FIELD: 3})
+        self.assertEqual(names, [IStream.NAME_FIELD, IStream.TVG_ID_FIELD, IStream.PRICE_FIELD])
+        update = {'$set': {IStream.NAME_FIELD: 'Patched', IStream.PRICE_FIELD: 3.0},
+                  '$unset': {IStream.TVG_ID_FIELD: ''}}
+        self.assertEqual(patch_update(stream, names), update)
+        self.assertEqual(stream.groups, ['News'])
+
+        for json in [{IStream.OUTPUT_FIELD: []}, {IStream.NAME_FIELD: None}, {IStream.IARC_FIELD: 100}]:
+            with self.assertRaises(ValueError):
+                parser(stream, json)
+
+
+@unittest.skipUnless(mongomock, 'mongomock is not installed')
+class PatchTest(unittest.TestCase):
+    def setUp(self):
+        self.output = [OutputUrl(id=1, uri='http://localhost/1/master.m3u8').to_front_dict()]
+        self.collection = mongomock.MongoClient().iptv.streams
+
+    def test_apply_patch(self):
+        stream = ProxyStream.make_entry({IStream.NAME_FIELD: 'Proxy', IStream.TVG_ID_FIELD: 'proxy',
+                                         IStream.OUTPUT_FIELD: self.output})
+        with self.assertRaises(ValueError):
+            stream.patch({IStream.NAME_FIELD: 'Unsaved'})
+
+        with mock.patch.object(ProxyStream, '_get_collection', return_value=self.collection):
+            stream.save()
+            stream.price = 5.0
+            stream.patch({IStream.NAME_FIELD: 'Patched', IStream.TVG_ID_FIELD: ''})
+        self.assertEqual(stream._changed_fields, [IStream.PRICE_FIELD])
+        stored = self.collection.find_one({'_id': stream.id})
+        self.assertEqual(stored[IStream.NAME_FIELD], 'Patched')
+        self.assertNotIn(IStream.TVG_ID_FIELD, stored)
+        self.assertEqual(stored[IStream.PRICE_FIELD], 0.0)
+
+    def test_apply_patch_invalid(self):
+        input_urls = [InputUrl(id=1, uri='http://localhost/1/input.m3u8').to_front_dict()]
+        stream = EncodeStream.make_entry({IStream.NAME_FIELD: 'Encode', IStream.OUTPUT_FIELD: self.output,
+                                          EncodeStream.INPUT_FIELD: input_urls})
+        with mock.patch.object(EncodeStream, '_get_collection', return_value=self.collection):
+            stream.save()
+            for json in [{EncodeStream.SIZE_FIELD: {'width': -5, 'height': 480}},
+                         {EncodeStream.ASPECT_RATIO_FIELD: {'num': 0, 'den': 0}}]:
+                with self.assertRaises(ValueError):
+                    stream.patch(json)
+            stream.patch({EncodeStream.SIZE_FIELD: {'width': 640, 'height': 480}})
+        stored = self.collection.find_one({'_id': stream.id})
+        self.assertEqual(stored[EncodeStream.SIZE_FIELD], {'width': 640, 'height': 480})
+        self.assertNotIn(EncodeStream.ASPECT_RATIO_FIELD, stored)
+
+    def test_apply_patch_partial(self):
+        input_urls = [InputUrl(id=1, uri='http://localhost/1/input.m3u8').to_front_dict()]
+        stream = EncodeStream.make_entry({IStream.NAME_FIELD: 'Encode', IStream.OUTPUT_FIELD: self.output,
+                                          EncodeStream.INPUT_FIELD: input_urls})
+        with mock.patch.object(EncodeStream, '_get_collection', return_value=self.collection):
+            stream.save()
+            stream.price = 5.0
+            tvg_id, size = stream.tvg_id, stream.size
+            with self.assertRaises(ValueError):
+                stream.patch({IStream.NAME_FIELD: 'Patched', IStream.TVG_ID_FIELD: 'patched',
+                              EncodeStream.SIZE_FIELD: {'width': -5, 'height': 480}})
+            self.assertEqual(stream.name, 'Encode')
+            self.assertEqual(stream.tvg_id, tvg_id)
+            self.assertIs(stream.size, size)
+            self.assertEqual(stream._changed_fields, [IStream.PRICE_FIELD])
+            stream.save()
+        stored = self.collection.find_one({'_id': stream.id})
+        self.assertEqual(stored[IStream.NAME_FIELD], 'Encode')
+        self.assertEqual(stored.get(IStream.TVG_ID_FIELD), tvg_id)
+        self.assertEqual(stored[IStream.PRICE_FIELD], 5.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+import argparse
+import timeit
+from datetime import datetime
+
+from pyfastocloud_models.common_entries import OutputUrl, MetaUrl
+from pyfastocloud_models.stream.entry import IStream, ProxyStream
+
+
+def legacy_update_entry(stream: IStream, json: dict):
+    res, name = stream.check_required_type(IStream.NAME_FIELD, str, json)
+    if res:
+        stream.name = name
+    res, created_date_msec = stream.check_optional_type(IStream.CREATED_DATE_FIELD, int, json)
+    if res:
+        stream.created_date = datetime.utcfromtimestamp(created_date_msec / 1000)
+    res, groups = stream.check_optional_type(IStream.GROUPS_FIELD, list, json)
+    stream.groups = groups if res else []
+    for key in [IStream.TVG_ID_FIELD, IStream.TVG_NAME_FIELD, IStream.ICON_FIELD]:
+        res, value = stream.check_optional_type(key, str, json)
+        setattr(stream, key, value if res and value else None)
+    res, price = stream.check_optional_type(IStream.PRICE_FIELD, float, json)
+    if res:
+        stream.price = price
+    res, visible = stream.check_optional_type(IStream.VISIBLE_FIELD, bool, json)
+    if res:
+        stream.visible = visible
+    res, iarc = stream.check_optional_type(IStream.IARC_FIELD, int, json)
+    if res:
+        stream.iarc = iarc
+    res, output = stream.check_required_type(IStream.OUTPUT_FIELD, list, json)
+    if res:
+        stream.output = [OutputUrl.make_entry(url) for url in output]
+    res, meta = stream.check_optional_type(IStream.META_FIELD, list, json)
+    if res:
+        stream.meta_urls = [MetaUrl.make_entry(met) for met in meta]
+
+
+def legacy_make_entry(json: dict) -> ProxyStream:
+    stream = ProxyStream()
+    legacy_update_entry(stream, json)
+    return stream
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='stream json parser benchmark')
+    parser.add_argument('--count', type=int, default=50000)
+    args = parser.parse_args()
+
+    jsons = []
+    for i in range(args.count):
+        jsons.append({IStream.NAME_FIELD: 'Channel {0}'.format(i), IStream.GROUPS_FIELD: ['Group {0}'.format(i % 100)],
+                      IStream.TVG_ID_FIELD: 'channel.{0}'.format(i),
+                      IStream.ICON_FIELD: 'http://logo/{0}.png'.format(i),
+                      IStream.PRICE_FIELD: 1.5, IStream.CREATED_DATE_FIELD: 1600000000000 + i,
+                      IStream.OUTPUT_FIELD: [{OutputUrl.ID_FIELD: i,
+                                              OutputUrl.URI_FIELD: 'http://localhost/{0}/master.m3u8'.format(i)}]})
+
+    legacy = timeit.timeit(lambda: [legacy_make_entry(json) for json in jsons], number=1)
+    compiled = timeit.timeit(lambda: [ProxyStream.make_entry(json) for json in jsons], number=1)
+    print('streams: {0}'.format(args.count))
+    print('check calls: {0:.2f}s'.format(legacy))
+    print('compiled parser: {0:.2f}s'.format(compiled))
+    print('speedup: {0:.2f}x'.format(legacy / compiled))
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+import argparse
+import timeit
+
+from bson.objectid import ObjectId
+
+from pyfastocloud_models.common_entries import OutputUrl, MetaUrl
+from pyfastocloud_models.stream.entry import IStream, ProxyStream
+
+
+def legacy_to_front_dict(stream: IStream) -> dict:
+    result = stream.to_mongo()
+    result.pop('_cls')
+    result.pop('_id')
+    result[IStream.CREATED_DATE_FIELD] = stream.created_date_utc_msec()
+    result[IStream.TYPE_FIELD] = stream.get_type()
+    result[IStream.ID_FIELD] = stream.get_id()
+
+    output = []
+    for out in stream.output:
+        out = out.to_mongo()
+        out.pop('_cls')
+        output.append(out.to_dict())
+    result[IStream.OUTPUT_FIELD] = output
+    result[IStream.PARTS_FIELD] = [str(part) for part in stream.parts]
+    result[IStream.META_FIELD] = [met.to_mongo().to_dict() for met in stream.meta_urls]
+    return result.to_dict()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='stream front dict serializer benchmark')
+    parser.add_argument('--count', type=int, default=100000)
+    args = parser.parse_args()
+
+    streams = []
+    for i in range(args.count):
+        stream = ProxyStream(id=ObjectId(), name='Channel {0}'.format(i), groups=['Group {0}'.format(i % 100)],
+                             tvg_id='channel.{0}'.format(i), tvg_logo='http://logo/{0}.png'.format(i),
+                             output=[OutputUrl(id=i, uri='http://localhost/{0}/master.m3u8'.format(i))],
+                             meta_urls=[MetaUrl(name='imdb', url='http://imdb/{0}'.format(i))])
+        streams.append(stream)
+
+    legacy = timeit.timeit(lambda: [legacy_to_front_dict(stream) for stream in streams], number=1)
+    compiled = timeit.timeit(lambda: [stream.to_front_dict() for stream in streams], number=1)
+    print('streams: {0}'.format(args.count))
+    print('to_mongo based: {0:.2f}s'.format(legacy))
+    print('compiled serializer: {0:.2f}s'.format(compiled))
+    print('speedup: {0:.2f}x'.format(legacy / compiled))
+
+    raws = [stream.to_mongo().to_dict() for stream in streams]
+    loaded = timeit.timeit(lambda: [IStream._from_son(data).to_front_dict() for data in raws], number=1)
+    raw = timeit.timeit(lambda: [IStream.raw_to_front_dict(data) for data in raws], number=1)
+    print('raw documents loaded: {0:.2f}s'.format(loaded))
+    print('raw documents serialized: {0:.2f}s'.format(raw))
+    print('speedup: {0:.2f}x'.format(loaded / raw))
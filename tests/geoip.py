@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+import os
+import tempfile
+import unittest
+
+from pyfastocloud_models.utils.geoip import GeoIpTable
+from pyfastocloud_models.utils.utils import get_country_code_by_remote_addr
+
+RANGES = 'start,end,country\n' \
+         '8.8.8.0,8.8.8.255,US\n' \
+         '1.0.0.0,1.0.0.255,AU\n' \
+         '16909056,16909311,CN\n' \
+         '2a00:1450::,2a00:1450:ffff:ffff:ffff:ffff:ffff:ffff,IE\n' \
+         '10.0.0.0,10.255.255.255,-\n'
+
+
+class GeoIpTest(unittest.TestCase):
+    def test_lookup(self):
+        fd, path = tempfile.mkstemp(suffix='.csv')
+        with os.fdopen(fd, 'w') as file:
+            file.write(RANGES)
+        try:
+            table = GeoIpTable.from_csv(path)
+        finally:
+            os.remove(path)
+
+        self.assertEqual(len(table), 4)
+        self.assertEqual(table.lookup('8.8.8.8'), 'US')
+        self.assertEqual(table.lookup('1.0.0.0'), 'AU')
+        self.assertEqual(table.lookup('1.0.0.255'), 'AU')
+        self.assertEqual(table.lookup('1.2.3.4'), 'CN')
+        self.assertEqual(table.lookup('::ffff:8.8.4.4'), None)
+        self.assertEqual(table.lookup('::ffff:8.8.8.4'), 'US')
+        self.assertEqual(table.lookup('2a00:1450:4001::1'), 'IE')
+        self.assertIsNone(table.lookup('10.1.1.1'))
+        self.assertIsNone(table.lookup('0.0.0.1'))
+        self.assertIsNone(table.lookup('invalid'))
+
+        table.load_rows([['9.9.9.0', '9.9.9.255', 'CH']])
+        self.assertEqual(table.lookup('9.9.9.9'), 'CH')
+        self.assertEqual(table.lookup('8.8.8.8'), 'US')
+
+        GeoIpTable.set_default(table)
+        try:
+            self.assertEqual(get_country_code_by_remote_addr('8.8.8.8', remote_fallback=False), 'US')
+            self.assertIsNone(get_country_code_by_remote_addr('10.1.1.1', remote_fallback=False))
+        finally:
+            GeoIpTable.set_default(None)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,28 @@
+#!/usr/bin/env python3
+import os
+import subprocess
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# imports the stream, service and provider models too
+MODULE = 'pyfastocloud_models.subscriber.entry'
+# imported on demand by the network helpers, password checks and parallel parsing only
+LAZY_MODULES = ['requests', 'urllib3', 'werkzeug', 'multiprocessing', 'concurrent.futures.process']
+
+
+class ImportTimeTest(unittest.TestCase):
+    def test_lazy_modules(self):
+        env = dict(os.environ)
+        env['PYTHONPATH'] = os.pathsep.join(filter(None, [ROOT, env.get('PYTHONPATH')]))
+        code = 'import sys, {0}; print(",".join(m for m in {1} if m in sys.modules))'.format(MODULE, LAZY_MODULES)
+        result = subprocess.run([sys.executable, '-c', code], env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                universal_newlines=True)
+        if result.returncode != 0:
+            self.skipTest('{0} is not importable: {1}'.format(MODULE, result.stderr.splitlines()[-1]))
+
+        self.assertEqual(result.stdout.strip(), '')
+
+
+if __name__ == '__main__':
+    unittest.main()
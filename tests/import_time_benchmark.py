@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# (self, cumulative) microseconds of each module imported by a fresh interpreter, from python -X importtime
+def import_times(module: str) -> dict:
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [ROOT, env.get('PYTHONPATH')]))
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import {0}'.format(module)], env=env,
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+    if result.returncode != 0:
+        raise SystemExit('{0} is not importable: {1}'.format(module, result.stderr.splitlines()[-1]))
+
+    # import time: self [us] | cumulative | imported package
+    times = {}
+    for line in result.stderr.splitlines():
+        parts = line[len('import time:'):].split('|')
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue
+        times[parts[2].strip()] = (int(parts[0]), int(parts[1]))
+    return times
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='package import time benchmark')
+    parser.add_argument('--module', default='pyfastocloud_models.subscriber.entry')
+    parser.add_argument('--count', type=int, default=10)
+    parser.add_argument('--top', type=int, default=10)
+    args = parser.parse_args()
+
+    runs = [import_times(args.module) for _ in range(args.count)]
+    totals = [times[args.module][1] for times in runs]
+    print('module: {0}'.format(args.module))
+    print('runs: {0}'.format(args.count))
+    print('import time: median {0:.1f}ms, min {1:.1f}ms'.format(statistics.median(totals) / 1000.0,
+                                                                min(totals) / 1000.0))
+
+    last = runs[-1]
+    print('slowest modules (self time of the last run):')
+    for name, (own, _) in sorted(last.items(), key=lambda item: item[1][0], reverse=True)[:args.top]:
+        print('  {0:.1f}ms {1}'.format(own / 1000.0, name))
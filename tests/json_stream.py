@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+import json
+import unittest
+from datetime import datetime
+
+from bson.objectid import ObjectId
+
+import pyfastocloud_models.constants as constants
+from pyfastocloud_models.utils.json_stream import encode, iter_json_array
+from pyfastocloud_models.utils.utils import date_to_utc_msec
+
+
+class Entry:
+    def __init__(self, index: int):
+        self.index = index
+
+    def to_front_dict(self) -> dict:
+        return {'id': self.index, 'name': 'Entry {0}'.format(self.index)}
+
+
+class Entries(list):
+    def __init__(self, *args):
+        super(Entries, self).__init__(*args)
+        self.cached = True
+
+    def no_cache(self):
+        self.cached = False
+        return self
+
+
+class JsonStreamTest(unittest.TestCase):
+    def test_encode(self):
+        oid = ObjectId()
+        now = datetime(2020, 1, 2, 3, 4, 5)
+        data = {'id': oid, 'created_date': now, 'type': constants.StreamType.RELAY, 'name': 'Ünicode'}
+        self.assertEqual(json.loads(encode(data).decode('utf-8')),
+                         {'id': str(oid), 'created_date': date_to_utc_msec(now), 'type': 2, 'name': 'Ünicode'})
+        self.assertRaises(TypeError, encode, {'value': object()})
+
+    def test_iter_json_array(self):
+        self.assertEqual(b''.join(iter_json_array([])), b'[]')
+
+        entries = Entries(Entry(i) for i in range(1000))
+        chunks = list(iter_json_array(entries, chunk_size=1024))
+        self.assertFalse(entries.cached)
+        self.assertGreater(len(chunks), 10)
+        self.assertEqual(json.loads(chunks[0][1:].decode('utf-8')), entries[0].to_front_dict())
+        self.assertEqual(json.loads(b''.join(chunks).decode('utf-8')), [entry.to_front_dict() for entry in entries])
+
+        chunks = iter_json_array(range(3), serialize=lambda value: {'value': value})
+        self.assertEqual(b''.join(chunks), b'[{"value":0},{"value":1},{"value":2}]')
+
+
+if __name__ == '__main__':
+    unittest.main()
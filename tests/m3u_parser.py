@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+import gzip
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from unittest import mock
+from functools import partial
+from http.server import HTTPServer, SimpleHTTPRequestHandler
+
+from pyfastocloud_models.utils.m3u_parser import M3uParser
+
+PLAYLIST = '#EXTM3U\n' \
+           '#EXTINF:-1 tvg-id="first" tvg-name="First" tvg-logo="http://logo/1.png" group-title="Movies",First\n' \
+           'http://localhost/1.m3u8\n' \
+           '#EXTVLCOPT:http-user-agent=test\n' \
+           '#EXTINF:-1 tvg-id="second" group-title="News",Second\n' \
+           'http://localhost/2.m3u8\n'
+
+
+class RangeHandler(SimpleHTTPRequestHandler):
+    ranges = []
+
+    def do_GET(self):
+        header = self.headers.get('Range')
+        if not header:
+            super(RangeHandler, self).do_GET()
+            return
+
+        with open(self.translate_path(self.path), 'rb') as file:
+            data = file.read()
+        start = int(header.split('=')[1].rstrip('-'))
+        RangeHandler.ranges.append(start)
+        self.send_response(206)
+        self.send_header('Content-Range', 'bytes {0}-{1}/{2}'.format(start, len(data) - 1, len(data)))
+        self.send_header('Content-Length', str(len(data) - start))
+        self.end_headers()
+        self.wfile.write(data[start:])
+
+    def log_message(self, *args):
+        pass
+
+
+class M3uParserTest(unittest.TestCase):
+    def test_parse(self):
+        parser = M3uParser()
+        parser.load_content(PLAYLIST)
+        parser.parse()
+        files = parser.get_list()
+        self.assertEqual(len(files), 2)
+        self.assertEqual(files[0], {'title': 'First', 'tvg-name': 'First', 'tvg-id': 'first',
+                                    'tvg-logo': 'http://logo/1.png', 'tvg-group': 'Movies',
+                                    'link': 'http://localhost/1.m3u8'})
+        self.assertEqual(files[1]['tvg-name'], 'Unknown')
+        self.assertEqual(files[1]['link'], 'http://localhost/2.m3u8')
+
+    def test_attributes(self):
+        entry = M3uParser._make_entry(
+            '#EXTINF:-1 tvg-name="News, 24" tvg-chno="7" tvg-shift="2" catchup="default" group-title="News",News, 24',
+            'http://localhost/3.m3u8')
+        self.assertEqual(entry['tvg-name'], 'News, 24')
+        self.assertEqual(entry['tvg-group'], 'News')
+        self.assertEqual(entry['title'], 'News, 24')
+        self.assertEqual(entry['tvg-chno'], '7')
+        self.assertEqual(entry['tvg-shift'], '2')
+        self.assertEqual(entry['catchup'], 'default')
+        self.assertNotIn('group-title', entry)
+
+        # attributes named as entry keys don't replace them
+        entry = M3uParser._make_entry('#EXTINF:-1 group-title="News" tvg-group="Other" link="http://other" '
+                                      'title="Other",News', 'http://localhost/3.m3u8')
+        self.assertEqual(entry['tvg-group'], 'News')
+        self.assertEqual(entry['title'], 'News')
+        self.assertEqual(entry['link'], 'http://localhost/3.m3u8')
+
+    def test_entry_hash(self):
+        parser = M3uParser()
+        parser.load_content(PLAYLIST)
+        parser.parse()
+        first, second = parser.get_list()
+        self.assertEqual(M3uParser.entry_hash(first), M3uParser.entry_hash(dict(first)))
+        self.assertNotEqual(M3uParser.entry_hash(first), M3uParser.entry_hash(second))
+        changed = dict(first)
+        changed['tvg-logo'] = 'http://logo/2.png'
+        self.assertNotEqual(M3uParser.entry_hash(first), M3uParser.entry_hash(changed))
+
+    def test_iter(self):
+        parser = M3uParser()
+        parser.load_content(PLAYLIST)
+        parser.parse()
+        self.assertEqual(list(M3uParser.iter_lines(PLAYLIST.split('\n'))), parser.get_list())
+
+        fd, path = tempfile.mkstemp(suffix='.m3u')
+        with os.fdopen(fd, 'w') as file:
+            file.write(PLAYLIST)
+        try:
+            streamed = M3uParser()
+            streamed.parse_m3u(path)
+            self.assertEqual(streamed.get_list(), parser.get_list())
+            self.assertEqual(streamed.lines, [])
+        finally:
+            os.remove(path)
+
+    def test_parallel(self):
+        fd, path = tempfile.mkstemp(suffix='.m3u')
+        with os.fdopen(fd, 'w') as file:
+            file.write('#EXTM3U\n')
+            for i in range(1000):
+                file.write('#EXTINF:-1 tvg-id="{0}" group-title="Group {1}",Channel {0}\n'.format(i, i % 10))
+                file.write('http://localhost/{0}.m3u8\n'.format(i))
+        try:
+            parser = M3uParser()
+            parser.parse_m3u_parallel(path, 2)
+            self.assertEqual(parser.get_list(), list(M3uParser.iter_m3u(path)))
+            self.assertEqual(len(parser.get_list()), 1000)
+        finally:
+            os.remove(path)
+
+    @staticmethod
+    def make_grouped_parser() -> M3uParser:
+        parser = M3uParser()
+        for i in range(100):
+            parser._add_entry(M3uParser._make_entry(
+                '#EXTINF:-1 group-title="{0}",Channel {1}'.format(['Movies HD', 'News', 'Kids', 'Sport HD'][i % 4], i),
+                'http://localhost/{0}.m3u8'.format(i)))
+        return parser
+
+    def test_filter_groups(self):
+        parser = self.make_grouped_parser()
+        self.assertEqual({group: len(indexes) for group, indexes in parser._groups.items()},
+                         {'Movies HD': 25, 'News': 25, 'Kids': 25, 'Sport HD': 25})
+
+        # chained filters select by the index kept since parsing
+        parser.filter_in_files_of_groups_containing(['HD', 'News'])
+        self.assertEqual(parser._groups['Sport HD'], list(range(2, 75, 3)))
+        with mock.patch.object(parser, '_index_groups', wraps=parser._index_groups) as index_groups:
+            parser.filter_out_files_of_groups_containing('Sport')
+            parser.filter_in_files_of_groups_containing(['HD', 'News', 'Sport'])
+        index_groups.assert_not_called()
+        self.assertEqual(len(parser.get_list()), 50)
+        self.assertIsNone(parser._groups)
+
+        parser = self.make_grouped_parser()
+        parser.filter_in_files_of_groups_containing(['HD', 'News'])
+        self.assertEqual(len(parser.get_list()), 75)
+        parser.filter_out_files_of_groups_containing('Sport')
+        files = parser.get_list()
+        self.assertEqual(len(files), 50)
+        self.assertEqual({file['tvg-group'] for file in files}, {'Movies HD', 'News'})
+        self.assertEqual(files, sorted(files, key=lambda file: int(file['title'].split()[1])))
+
+        # the list changed in place outside of the parser
+        files[0] = dict(files[0], **{'tvg-group': 'Sport'})
+        parser.filter_out_files_of_groups_containing('Sport')
+        self.assertEqual(len(parser.get_list()), 49)
+        self.assertNotIn('Sport', {file['tvg-group'] for file in parser.get_list()})
+
+        # the list replaced outside of the parser
+        parser.files = files[:1]
+        parser.filter_out_files_of_groups_containing(['News'])
+        self.assertEqual(len(parser.get_list()), 1)
+        parser.filter_in_files_of_groups_containing([])
+        self.assertEqual(len(parser.get_list()), 1)
+
+    def test_url(self):
+        directory = tempfile.mkdtemp()
+        content = '#EXTM3U\n'
+        for i in range(5000):
+            content += '#EXTINF:-1 tvg-id="{0}" group-title="Group",Channel {0}\n'.format(i)
+            content += 'http://localhost/{0}.m3u8\n'.format(i)
+        with open(os.path.join(directory, 'list.m3u'), 'w') as file:
+            file.write(content)
+        with gzip.open(os.path.join(directory, 'list.m3u.gz'), 'wt') as file:
+            file.write(content)
+
+        handler = partial(SimpleHTTPRequestHandler, directory=directory)
+        server = HTTPServer(('127.0.0.1', 0), handler)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            expected = list(M3uParser.iter_lines(content.split('\n')))
+            for name in ['list.m3u', 'list.m3u.gz']:
+                url = 'http://127.0.0.1:{0}/{1}'.format(server.server_port, name)
+                streamed = list(M3uParser.iter_m3u_url(url))
+                self.assertEqual([entry for entry, _ in streamed], expected)
+                self.assertEqual(streamed[-1][1], len(content))
+
+                # resume after the 100th entry
+                offset = streamed[99][1]
+                resumed = [entry for entry, _ in M3uParser.iter_m3u_url(url, offset)]
+                self.assertEqual(resumed, expected[100:])
+        finally:
+            server.shutdown()
+            server.server_close()
+            shutil.rmtree(directory)
+
+    def test_url_resume(self):
+        directory = tempfile.mkdtemp()
+        # the link line of the first entry is the info line of the second one
+        content = '#EXTM3U\n#EXTINF:-1,First\n#EXTINF:-1,Second\nhttp://localhost/2.m3u8\n' \
+                  '#EXTINF:-1,Third\nhttp://localhost/3.m3u8\n'
+        with open(os.path.join(directory, 'list.m3u'), 'w') as file:
+            file.write(content)
+
+        RangeHandler.ranges = []
+        server = HTTPServer(('127.0.0.1', 0), partial(RangeHandler, directory=directory))
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            url = 'http://127.0.0.1:{0}/list.m3u'.format(server.server_port)
+            expected = list(M3uParser.iter_lines(content.split('\n')))
+            streamed = list(M3uParser.iter_m3u_url(url))
+            self.assertEqual([entry for entry, _ in streamed], expected)
+            for i, (_, offset) in enumerate(streamed):
+                resumed = [entry for entry, _ in M3uParser.iter_m3u_url(url, offset)]
+                self.assertEqual(resumed, expected[i + 1:])
+            self.assertEqual(RangeHandler.ranges, [offset for _, offset in streamed])
+        finally:
+            server.shutdown()
+            server.server_close()
+            shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+import argparse
+import re
+import timeit
+
+from pyfastocloud_models.utils.m3u_parser import M3uParser
+
+LINE_INFO = '#EXTINF:-1 tvg-id="channel.{0}" tvg-name="Channel {0}" tvg-logo="http://logo/{0}.png" ' \
+            'tvg-chno="{0}" catchup="default" group-title="Group {1}",Channel {0}'
+
+
+def legacy_make_entry(line_info, line_link):
+    m = re.search('tvg-name=\"(.*?)\"', line_info)
+    name = m.group(1) if m else 'Unknown'
+    m = re.search('tvg-id=\"(.*?)\"', line_info)
+    tid = m.group(1) if m else 'Unknown'
+    m = re.search('tvg-logo=\"(.*?)\"', line_info)
+    logo = m.group(1) if m else 'Unknown'
+    m = re.search('group-title=\"(.*?)\"', line_info)
+    group = m.group(1) if m else 'Unknown'
+    m = re.search('[,](?!.*[,])(.*?)$', line_info)
+    title = m.group(1) if m else 'Unknown'
+    return {'title': title, 'tvg-name': name, 'tvg-id': tid, 'tvg-logo': logo, 'tvg-group': group,
+            'link': line_link}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='EXTINF attribute parser benchmark')
+    parser.add_argument('--count', type=int, default=1000000)
+    args = parser.parse_args()
+
+    lines = [LINE_INFO.format(i, i % 100) for i in range(args.count)]
+    link = 'http://localhost/master.m3u8'
+
+    legacy = timeit.timeit(lambda: [legacy_make_entry(line, link) for line in lines], number=1)
+    single = timeit.timeit(lambda: [M3uParser._make_entry(line, link) for line in lines], number=1)
+    print('entries: {0}'.format(args.count))
+    print('legacy re.search x5: {0:.2f}s'.format(legacy))
+    print('single pass tokenizer: {0:.2f}s'.format(single))
+    print('speedup: {0:.2f}x'.format(legacy / single))
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+import unittest
+from unittest import mock
+
+from bson import ObjectId
+
+try:
+    import mongomock
+except ImportError:
+    mongomock = None
+
+from pyfastocloud_models.machine_entry import Machine, parse_load_average, migrate_load_average
+from pyfastocloud_models.service.entry import ServiceSettings
+
+
+def make_stat(timestamp: int, load_average: str) -> Machine:
+    stat = Machine.default()
+    stat.timestamp = timestamp
+    stat.load_average = load_average
+    stat.load_average_1 = stat.load_average_5 = stat.load_average_15 = None
+    return stat
+
+
+class MachineTest(unittest.TestCase):
+    def test_parse_load_average(self):
+        self.assertEqual(parse_load_average('0.52 0.58 0.59'), (0.52, 0.58, 0.59))
+        self.assertEqual(parse_load_average('0.52, 0.58, 0.59'), (0.52, 0.58, 0.59))
+        self.assertEqual(parse_load_average('0,52 0,58 0,59'), (0.52, 0.58, 0.59))
+        self.assertEqual(parse_load_average('0,52, 0,58, 0,59'), (0.52, 0.58, 0.59))
+        self.assertEqual(parse_load_average('1 2 3'), (1.0, 2.0, 3.0))
+        for load_average in ['', '0.52', '1,2,3', 'unknown']:
+            self.assertEqual(parse_load_average(load_average), (None, None, None))
+
+    def test_percentile_load(self):
+        stats = [make_stat(i, '{0}.0 0.0 0.0'.format(i)) for i in range(5)]
+        self.assertEqual(Machine.percentile_load(stats, 0), 0.0)
+        self.assertEqual(Machine.percentile_load(stats, 50), 2.0)
+        self.assertEqual(Machine.percentile_load(stats, 90), 3.6)
+        self.assertEqual(Machine.percentile_load(stats, 100), 4.0)
+        self.assertEqual(Machine.percentile_load([], 50), 0.0)
+        for percentile in [-1, 100.5]:
+            with self.assertRaises(ValueError):
+                Machine.percentile_load(stats, percentile)
+
+    def test_downsample(self):
+        stats = []
+        for i in range(1000):
+            stat = make_stat(i * 10, '{0}.0 0.0 0.0'.format(i % 7))
+            stat.cpu = float(i % 100)
+            stat.load_average_1 = float(i % 7) if i % 2 else None
+            stats.append(stat)
+
+        chart = Machine.downsample(stats, Machine.CPU_FIELD, 1000, 5990, 50)
+        timestamps = chart[Machine.TIMESTAMP_FIELD]
+        self.assertEqual(len(timestamps), 50)
+        self.assertEqual((timestamps[0], timestamps[-1]), (1000, 5990))
+        self.assertEqual(timestamps, sorted(timestamps))
+        self.assertEqual(chart[Machine.CPU_FIELD], [float(timestamp // 10 % 100) for timestamp in timestamps])
+
+        chart = Machine.downsample(stats, Machine.CPU_FIELD, 0, 9990, 20, min_max=True)
+        self.assertLessEqual(len(chart[Machine.TIMESTAMP_FIELD]), 20)
+        self.assertEqual(min(chart[Machine.CPU_FIELD]), 0.0)
+        self.assertEqual(max(chart[Machine.CPU_FIELD]), 99.0)
+
+        # samples without the value are skipped, all are kept if they are less than points
+        chart = Machine.downsample(stats, Machine.LOAD_AVERAGE_1_FIELD, 0, 100, 50)
+        self.assertEqual(chart[Machine.TIMESTAMP_FIELD], list(range(10, 101, 20)))
+        self.assertEqual(Machine.downsample(stats, Machine.CPU_FIELD, 20000, 30000, 50),
+                         {Machine.TIMESTAMP_FIELD: [], Machine.CPU_FIELD: []})
+        with self.assertRaises(ValueError):
+            Machine.downsample(stats, Machine.LOAD_AVERAGE_FIELD, 0, 100, 50)
+        with self.assertRaises(ValueError):
+            Machine.downsample(stats, Machine.CPU_FIELD, 0, 9990, 2)
+
+    @unittest.skipUnless(mongomock, 'mongomock is not installed')
+    def test_migrate_load_average(self):
+        collection = mongomock.MongoClient().iptv.services
+        # stored before the numeric load averages
+        node = ServiceSettings(id=ObjectId(), stats=[make_stat(1, '0,52 0,58 0,59'), make_stat(2, 'unknown')])
+        collection.insert_one(node.to_mongo())
+        migrated = ServiceSettings(id=ObjectId(), stats=[make_stat(1, '1.0 1.0 1.0')])
+        migrated.stats[0].set_load_average('1.0 1.0 1.0')
+        collection.insert_one(migrated.to_mongo())
+        with mock.patch.object(ServiceSettings, '_get_collection', return_value=collection):
+            nodes = list(ServiceSettings.objects.all())
+            collection.update_one({'_id': node.pk}, {'$set': {'name': 'Renamed'}})
+            self.assertEqual(migrate_load_average(nodes), 1)
+            self.assertEqual(migrate_load_average(ServiceSettings.objects.all()), 0)
+
+            # first sample rotated out and one added since the node was loaded
+            rotated = ServiceSettings(id=ObjectId(), stats=[make_stat(1, '1.0 2.0 3.0'), make_stat(2, '4.0 5.0 6.0')])
+            collection.insert_one(rotated.to_mongo())
+            nodes = list(ServiceSettings.objects(id=rotated.pk))
+            collection.update_one({'_id': rotated.pk}, {'$pop': {'stats': -1}})
+            collection.update_one({'_id': rotated.pk}, {'$push': {'stats': make_stat(3, '7.0 8.0 9.0').to_mongo()}})
+            self.assertEqual(migrate_load_average(nodes), 1)
+
+        stored = collection.find_one({'_id': node.pk})
+        self.assertEqual(stored['name'], 'Renamed')  # only the load averages are written
+        self.assertEqual([stored['stats'][0].get(field) for field in Machine.LOAD_AVERAGE_FIELDS], [0.52, 0.58, 0.59])
+        self.assertNotIn(Machine.LOAD_AVERAGE_1_FIELD, stored['stats'][1])
+        stored = collection.find_one({'_id': rotated.pk})
+        self.assertEqual([stat['timestamp'] for stat in stored['stats']], [2, 3])
+        self.assertEqual([stored['stats'][0].get(field) for field in Machine.LOAD_AVERAGE_FIELDS], [4.0, 5.0, 6.0])
+        self.assertNotIn(Machine.LOAD_AVERAGE_1_FIELD, stored['stats'][1])
+
+
+if __name__ == '__main__':
+    unittest.main()
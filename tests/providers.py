@@ -1,8 +1,20 @@
 #!/usr/bin/env python3
 import datetime
 import unittest
+from unittest import mock
 
+from mongoengine import Document
+
+try:
+    import mongomock
+except ImportError:
+    mongomock = None
+
+from pyfastocloud_models.content_request.entry import ContentRequest
+from pyfastocloud_models.epg.entry import EpgSettings, EpgUrl
+from pyfastocloud_models.load_balance.entry import LoadBalanceSettings
 from pyfastocloud_models.provider.entry import Provider
+from pyfastocloud_models.provider.entry_pair import ProviderPair
 from pyfastocloud_models.service.entry import ServiceSettings, HostAndPort
 from pyfastocloud_models.subscriber.entry import Subscriber
 
@@ -91,5 +103,73 @@ class Providers(unittest.TestCase):
         self.assertTrue(provider.add_subscriber(sub2))
 
 
+@unittest.skipUnless(mongomock, 'mongomock is not installed')
+class ProvidersFrontDictTest(unittest.TestCase):
+    def setUp(self):
+        self.db = mongomock.MongoClient().iptv
+        self.patches = [mock.patch.object(cls, '_get_collection', return_value=self.db[cls._meta['collection']])
+                        for cls in [Provider, Subscriber, ServiceSettings, LoadBalanceSettings, EpgSettings,
+                                    ContentRequest]]
+        # references are loaded through the database
+        self.patches.append(mock.patch.object(Document, '_get_db', return_value=self.db))
+        for patch in self.patches:
+            patch.start()
+
+        self.admin = Provider(email='admin@test.com', first_name='Admin', last_name='User', password='1',
+                              country='US', type=Provider.Type.ADMIN, credits=5)
+        self.admin.save()
+        self.reseller = Provider(email='reseller@test.com', first_name='Reseller', last_name='User', password='2',
+                                 country='GB', language='ru')
+        self.reseller.save()
+        self.pairs = [ProviderPair(user=self.admin), ProviderPair(user=self.reseller, role=ProviderPair.Roles.READ)]
+
+    def tearDown(self):
+        for patch in self.patches:
+            patch.stop()
+
+    def assertFrontDicts(self, cls, query=None):
+        fronts = list(cls.iter_front_dicts(query))
+        documents = cls.objects(__raw__=query or {})
+        self.assertEqual(fronts, [document.to_front_dict() for document in documents])
+        self.assertEqual([list(front) for front in fronts], [list(document.to_front_dict()) for document in documents])
+        return fronts
+
+    def test_providers(self):
+        subscriber = Subscriber(email='user@test.com', first_name='User', last_name='User', password='0' * 32,
+                                country='GB')
+        subscriber.save()
+        self.db.providers.update_one({'_id': self.admin.id}, {'$push': {'subscribers': subscriber.id}})
+        fronts = self.assertFrontDicts(Provider)
+        self.assertEqual(fronts[0][Provider.CREDITS_REMAINING_FIELD], 4)
+        self.assertFrontDicts(Provider, {'country': 'GB'})
+
+    def test_services(self):
+        ServiceSettings(name='First', providers=self.pairs, host=HostAndPort(host='localhost', port=1234)).save()
+        ServiceSettings(name='Second', description='Service').save()
+        # stored by older versions without defaults
+        self.db.services.insert_one({'name': 'Raw', 'created_date': datetime.datetime(2020, 1, 1)})
+        fronts = self.assertFrontDicts(ServiceSettings)
+        self.assertEqual([pair['email'] for pair in fronts[0][ServiceSettings.PROVIDERS_FIELD]],
+                         ['admin@test.com', 'reseller@test.com'])
+        self.assertEqual(len(list(ServiceSettings.iter_front_dicts(batch_size=1))), 3)
+
+    def test_load_balancers(self):
+        LoadBalanceSettings(name='First', providers=self.pairs, monitoring=True).save()
+        self.db.load_balances.insert_one({'name': 'Raw', 'created_date': datetime.datetime(2020, 1, 1),
+                                          'host': {'host': 'localhost', 'port': 5000}})
+        self.assertFrontDicts(LoadBalanceSettings)
+
+    def test_epgs(self):
+        EpgSettings(name='First', providers=self.pairs[1:], urls=[EpgUrl(), EpgUrl(url='http://localhost/1.xml')],
+                    auto_update=True, auto_update_period=7200).save()
+        self.db.epgs.insert_one({'name': 'Raw', 'created_date': datetime.datetime(2020, 1, 1)})
+        self.assertFrontDicts(EpgSettings)
+
+    def test_content_requests(self):
+        ContentRequest(title='First', type=ContentRequest.Type.VODS).save()
+        self.db.requests.insert_one({'title': 'Raw', 'created_date': datetime.datetime(2020, 1, 1)})
+        self.assertFrontDicts(ContentRequest)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -1,10 +1,18 @@
 #!/usr/bin/env python3
 import datetime
 import unittest
+from unittest import mock
+
+from mongoengine import Document
+
+try:
+    import mongomock
+except ImportError:
+    mongomock = None
 
 import pyfastocloud_models.constants as constants
 from pyfastocloud_models.series.entry import Serial
-from pyfastocloud_models.stream.entry import ProxyVodStream, OutputUrl
+from pyfastocloud_models.stream.entry import IStream, ProxyVodStream, OutputUrl
 
 
 class SeriesTest(unittest.TestCase):
@@ -39,5 +47,40 @@ class SeriesTest(unittest.TestCase):
         self.assertEqual(len(ser.episodes), 0)
 
 
+@unittest.skipUnless(mongomock, 'mongomock is not installed')
+class SeriesFrontDictTest(unittest.TestCase):
+    def setUp(self):
+        self.db = mongomock.MongoClient().iptv
+        self.patches = [mock.patch.object(cls, '_get_collection', return_value=self.db[cls._meta['collection']])
+                        for cls in [IStream, Serial]]
+        # references are loaded through the database
+        self.patches.append(mock.patch.object(Document, '_get_db', return_value=self.db))
+        for patch in self.patches:
+            patch.start()
+
+    def tearDown(self):
+        for patch in self.patches:
+            patch.stop()
+
+    def test_iter_front_dicts(self):
+        episodes = []
+        for i in range(3):
+            episode = ProxyVodStream(name='Episode {0}'.format(i), view_count=i + 1,
+                                     output=[OutputUrl(id=i, uri='http://localhost/{0}.mp4'.format(i))])
+            episode.save()
+            episodes.append(episode)
+        Serial(name='First', groups=['Movies'], season=2, episodes=episodes[:2]).save()
+        Serial(name='Second', icon='http://localhost/icon.png', episodes=[episodes[2]]).save()
+        # stored by older versions without defaults
+        self.db.series.insert_one({'name': 'Raw', 'created_date': datetime.datetime(2020, 1, 1)})
+
+        fronts = list(Serial.iter_front_dicts(batch_size=2))
+        self.assertEqual(fronts, [serial.to_front_dict() for serial in Serial.objects.all()])
+        self.assertEqual([list(front) for front in fronts],
+                         [list(serial.to_front_dict()) for serial in Serial.objects.all()])
+        self.assertEqual(fronts[0][Serial.VIEW_COUNT_FIELD], 3)
+        self.assertEqual(list(Serial.iter_front_dicts({'name': 'Second'})), [fronts[1]])
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -1,11 +1,28 @@
 #!/usr/bin/env python3
 import datetime
+import os
+import shutil
+import tempfile
+import threading
 import unittest
+from functools import partial
+from http.server import HTTPServer, SimpleHTTPRequestHandler
+from unittest import mock
 
+from bson import ObjectId
 from mongoengine import connect
 
+try:
+    import mongomock
+except ImportError:
+    mongomock = None
+
+from pyfastocloud_models.machine_entry import Machine
+from pyfastocloud_models.series.entry import Serial
 from pyfastocloud_models.service.entry import ServiceSettings, HostAndPort
-from pyfastocloud_models.stream.entry import ProxyStream, OutputUrl
+from pyfastocloud_models.stream.entry import IStream, ProxyStream, RelayStream, InputUrl, OutputUrl
+from pyfastocloud_models.subscriber.entry import Subscriber
+from pyfastocloud_models.utils.m3u_parser import M3uParser
 
 
 class StreamsTest(unittest.TestCase):
@@ -82,3 +99,235 @@ class StreamsTest(unittest.TestCase):
 
     if __name__ == '__main__':
         unittest.main()
+
+
+@unittest.skipUnless(mongomock, 'mongomock is not installed')
+class ServiceCollectionsTest(unittest.TestCase):
+    def setUp(self):
+        self.db = mongomock.MongoClient().iptv
+        self.patches = [mock.patch.object(cls, '_get_collection', return_value=self.db[cls._meta['collection']])
+                        for cls in [IStream, ServiceSettings, Subscriber, Serial]]
+        # mongomock does not take the UpdateOne of newer pymongo versions in bulk_write
+        streams = self.db[IStream._meta['collection']]
+        self.patches.append(mock.patch.object(streams, 'bulk_write', side_effect=lambda requests, ordered: [
+            streams.update_one(request._filter, request._doc) for request in requests]))
+        for patch in self.patches:
+            patch.start()
+
+    def tearDown(self):
+        for patch in self.patches:
+            patch.stop()
+
+    @staticmethod
+    def entry(title: str) -> dict:
+        return M3uParser._make_entry('#EXTINF:-1,{0}'.format(title), 'http://localhost/{0}.m3u8'.format(title))
+
+    def make_stream(self, service: ServiceSettings, title: str) -> ProxyStream:
+        output_url = OutputUrl(id=OutputUrl.generate_id(), uri='http://localhost/{0}.m3u8'.format(title))
+        stream = ProxyStream(name=title, output=[output_url])
+        stream.save()
+        ServiceSettings.objects(id=service.id).update_one(push__streams=stream)
+        return stream
+
+    def test_import(self):
+        service = ServiceSettings()
+        service.save()
+        streams = self.db[IStream._meta['collection']]
+        streams.create_index('name', unique=True)
+        streams.insert_one({'name': 'taken'})
+        files = [self.entry('a'), self.entry('b'), self.entry('taken'),
+                 M3uParser._make_entry('#EXTINF:-1,bad', 'invalid'), self.entry('c'), self.entry('d')]
+
+        with mock.patch.object(streams, 'insert_many', wraps=streams.insert_many) as insert_many:
+            report = service.import_m3u_streams(files, batch_size=2)
+        self.assertEqual([len(call[0][0]) for call in insert_many.call_args_list], [2, 2, 1])
+        self.assertEqual(report['imported'], 4)
+        errors = {error['index']: error for error in report['errors']}
+        self.assertEqual(sorted(errors), [2, 3])
+        self.assertEqual(errors[2]['title'], 'taken')
+        self.assertIn('E11000', errors[2]['error'])
+        self.assertEqual(errors[3]['title'], 'bad')
+        self.assertIn('Invalid url', errors[3]['error'])
+
+        names = {doc['_id']: doc['name'] for doc in streams.find()}
+        self.assertEqual([names[sid] for sid in service._stream_ids()], ['a', 'b', 'c', 'd'])
+
+    def test_import_url_resume(self):
+        directory = tempfile.mkdtemp()
+        content = '#EXTM3U\n'
+        for i in range(25):
+            content += '#EXTINF:-1 group-title="Group",Channel {0}\nhttp://localhost/{0}.m3u8\n'.format(i)
+        with open(os.path.join(directory, 'list.m3u'), 'w') as file:
+            file.write(content)
+
+        server = HTTPServer(('127.0.0.1', 0), partial(SimpleHTTPRequestHandler, directory=directory))
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            url = 'http://127.0.0.1:{0}/list.m3u'.format(server.server_port)
+            service = ServiceSettings()
+            service.save()
+            checkpoints = []
+
+            def interrupted(checkpoint: dict):
+                checkpoints.append(checkpoint)
+                raise KeyboardInterrupt
+
+            with self.assertRaises(KeyboardInterrupt):
+                service.import_m3u_url(url, batch_size=10, on_checkpoint=interrupted)
+            self.assertEqual(checkpoints[0]['index'], 10)
+            self.assertEqual(len(service._stream_ids()), 10)
+
+            report = service.import_m3u_url(url, batch_size=10, checkpoint=checkpoints[0],
+                                            on_checkpoint=checkpoints.append)
+            self.assertEqual((report['imported'], report['errors']), (15, []))
+            self.assertEqual([checkpoint['index'] for checkpoint in checkpoints], [10, 20, 25])
+            self.assertEqual(report['checkpoint'], {'offset': len(content), 'index': 25})
+            names = {doc['_id']: doc['name'] for doc in self.db.streams.find()}
+            self.assertEqual([names[sid] for sid in service._stream_ids()],
+                             ['Channel {0}'.format(i) for i in range(25)])
+        finally:
+            server.shutdown()
+            server.server_close()
+            shutil.rmtree(directory)
+
+    def test_reimport(self):
+        service = ServiceSettings()
+        service.save()
+        # without a hash, imported before hashes or added by hand
+        legacy = self.make_stream(service, 'legacy')
+        own = self.make_stream(service, 'own')
+
+        report = service.reimport_m3u_streams([self.entry('first'), self.entry('second'), self.entry('legacy')])
+        self.assertEqual((report['imported'], report['updated'], report['removed']), (2, 1, 0))
+        self.assertEqual(self.db.streams.count_documents({}), 4)
+        self.assertEqual(self.db.streams.find_one({'_id': legacy.id})[ProxyStream.SOURCE_HASH_FIELD],
+                         M3uParser.entry_hash(self.entry('legacy')))
+
+        second = self.db.streams.find_one({'name': 'second'})['_id']
+        self.db.subscribers.insert_one({'streams': [{'sid': second, 'private': False}, {'sid': own.id}],
+                                        'vods': [{'sid': second, 'private': True}], 'catchups': []})
+        self.db.series.insert_one({'episodes': [second, legacy.id, own.id]})
+
+        report = service.reimport_m3u_streams([self.entry('first')])
+        self.assertEqual((report['unchanged'], report['removed']), (1, 2))
+        self.assertEqual(sorted(doc['name'] for doc in self.db.streams.find()), ['first', 'own'])
+        self.assertEqual(len(service._stream_ids()), 2)
+        subscriber = self.db.subscribers.find_one()
+        self.assertEqual(subscriber['streams'], [{'sid': own.id}])
+        self.assertEqual(subscriber['vods'], [{'sid': second, 'private': True}])
+        self.assertEqual(self.db.series.find_one()['episodes'], [own.id])
+
+    def test_reimport_sources(self):
+        service = ServiceSettings()
+        service.save()
+        first = [self.entry('first'), self.entry('shared')]
+        second = [self.entry('second'), self.entry('shared')]
+        service.import_m3u_streams(first, source='http://localhost/first.m3u')
+        service.import_m3u_streams(second, source='http://localhost/second.m3u')
+        # imported before sources
+        service.import_m3u_streams([self.entry('old')])
+        self.db.streams.update_one({'name': 'old'}, {'$unset': {ProxyStream.SOURCE_FIELD: ''}})
+
+        report = service.reimport_m3u_streams([self.entry('old')], source='http://localhost/first.m3u')
+        self.assertEqual((report['updated'], report['removed']), (1, 2))
+        self.assertEqual(sorted(doc['name'] for doc in self.db.streams.find()), ['old', 'second', 'shared'])
+        self.assertEqual(self.db.streams.find_one({'name': 'shared'})[ProxyStream.SOURCE_FIELD],
+                         'http://localhost/second.m3u')
+        self.assertEqual(self.db.streams.find_one({'name': 'old'})[ProxyStream.SOURCE_FIELD],
+                         'http://localhost/first.m3u')
+        self.assertEqual(len(service._stream_ids()), 3)
+
+        report = service.reimport_m3u_streams(second, source='http://localhost/second.m3u')
+        self.assertEqual((report['imported'], report['unchanged'], report['removed']), (0, 2, 0))
+        report = service.reimport_m3u_streams([], source='http://localhost/second.m3u')
+        self.assertEqual(report['removed'], 2)
+        self.assertEqual([doc['name'] for doc in self.db.streams.find()], ['old'])
+
+    @staticmethod
+    def make_stat(timestamp: int) -> Machine:
+        stat = Machine.default()
+        stat.timestamp = timestamp
+        stat.cpu = float(timestamp)
+        return stat
+
+    def test_latest_stat(self):
+        service = ServiceSettings(name='Stats', stats=[self.make_stat(1), self.make_stat(2), self.make_stat(3)])
+        service.save()
+        empty = ServiceSettings()
+        empty.save()
+        missing = ObjectId()
+
+        services = self.db[ServiceSettings._meta['collection']]
+        with mock.patch.object(services, 'find', wraps=services.find) as find:
+            stat = ServiceSettings.latest_stat(service.id)
+            self.assertEqual(find.call_args[1]['projection'], {'_id': 1, 'stats': {'$slice': -1}})
+        self.assertEqual((stat.timestamp, stat.cpu), (3, 3.0))
+        self.assertIsNone(ServiceSettings.latest_stat(empty.id))
+        self.assertIsNone(ServiceSettings.latest_stat(missing))
+
+        stats = ServiceSettings.latest_stats_for([service.id, empty.id, missing])
+        self.assertEqual(list(stats.keys()), [service.id, empty.id])
+        self.assertEqual(stats[service.id].timestamp, 3)
+        self.assertIsNone(stats[empty.id])
+        self.assertEqual(ServiceSettings.latest_stats_for([]), {})
+
+    def test_all_light(self):
+        stream = ProxyStream(name='Stream', output=[OutputUrl(id=1, uri='http://localhost/1.m3u8')])
+        stream.save()
+        serial = Serial(name='Serial')
+        serial.save()
+        service = ServiceSettings(name='Light', stats=[self.make_stat(1)], streams=[stream], series=[serial])
+        service.save()
+
+        services = self.db[ServiceSettings._meta['collection']]
+        with mock.patch.object(services, 'find', wraps=services.find) as find:
+            light = ServiceSettings.all_light().get()
+            self.assertEqual(find.call_args[1]['projection'], {'_id': 1, 'stats': 0, 'streams': 0, 'series': 0})
+        self.assertEqual((light.id, light.name), (service.id, 'Light'))
+        self.assertEqual((light.stats, light.streams, light.series), ([], [], []))
+        self.assertEqual(light.to_front_dict(), service.to_front_dict())
+
+        node = ServiceSettings.all_light(stats=True, streams=True).as_pymongo().get()
+        self.assertEqual([stat['timestamp'] for stat in node['stats']], [1])
+        self.assertEqual(node['streams'], [stream.id])
+        self.assertNotIn('series', node)
+        node = ServiceSettings.all_light(series=True).as_pymongo().get()
+        self.assertEqual(node['series'], [serial.id])
+        self.assertNotIn('stats', node)
+
+    def test_bytes_for(self):
+        first, second, third = ObjectId(), ObjectId(), ObjectId()
+        # mongomock does not run $reduce, aggregation results of services with empty or older stats are given
+        services = self.db[ServiceSettings._meta['collection']]
+        with mock.patch.object(services, 'aggregate') as aggregate:
+            aggregate.return_value = [{'_id': first, 'net_bytes': 10}, {'_id': second, 'net_bytes': None},
+                                      {'_id': third}]
+            self.assertEqual(ServiceSettings.get_net_bytes_for([first, second, third], 1),
+                             {first: 10.0, second: 0.0, third: 0.0})
+            pipeline = aggregate.call_args[0][0]
+            self.assertEqual(pipeline[0], {'$match': {'_id': {'$in': [first, second, third]}}})
+            self.assertIn('net_bytes', pipeline[1]['$project'])
+
+            aggregate.return_value = [{'_id': first, 'store_bytes': 20.5}, {'_id': second, 'store_bytes': None},
+                                      {'_id': third}]
+            self.assertEqual(ServiceSettings.get_store_bytes_for([first, second, third], 1),
+                             {first: 20.5, second: 0.0, third: 0.0})
+            self.assertIn('store_bytes', aggregate.call_args[0][0][1]['$project'])
+
+    def test_probe_input_urls(self):
+        service = ServiceSettings()
+        service.save()
+        stream = RelayStream(name='Relay', input=[InputUrl(id=1, uri='http://localhost/1.m3u8')],
+                             output=[OutputUrl(id=1, uri='http://localhost/out.m3u8')])
+        stream.save()
+        ServiceSettings.objects(id=service.id).update_one(push__streams=stream)
+        # stored by older versions without an id
+        self.db.streams.update_one({'_id': stream.id}, {'$push': {'input': {'uri': 'http://localhost/2.m3u8'}}})
+
+        prober = mock.Mock()
+        prober.probe_many.side_effect = lambda urls: {url: True for url in urls}
+        self.assertEqual(service.probe_input_urls(prober), {stream.id: {1: True}})
+        prober.probe_many.assert_called_once_with([('http://localhost/1.m3u8', None)])
+        inputs = self.db.streams.find_one({'_id': stream.id})['input']
+        self.assertEqual([url.get('available') for url in inputs], [True, None])
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+import unittest
+
+from bson.objectid import ObjectId
+
+import pyfastocloud_models.constants as constants
+from pyfastocloud_models.service.entry import ServiceSettings
+from pyfastocloud_models.service.snapshot import ServiceSnapshot
+from pyfastocloud_models.stream.entry import IStream
+from pyfastocloud_models.stream.snapshot import StreamSnapshot
+
+PROXY = {'_id': ObjectId(), '_cls': 'IStream.ProxyStream', 'name': 'Proxy', 'tvg_id': 'proxy',
+         'groups': ['News', 'USA'], 'output': [{'_cls': 'OutputUrl', 'id': 1, 'uri': 'http://localhost/proxy.m3u8'}]}
+RELAY = {'_id': ObjectId(), '_cls': 'IStream.HardwareStream.RelayStream', 'name': 'Relay', 'tvg_name': 'Relay HD',
+         'input': [{'_cls': 'InputUrl', 'id': 2, 'uri': 'http://localhost/input.m3u8'}],
+         'output': [{'_cls': 'OutputUrl', 'id': 3, 'uri': 'http://localhost/relay/0.m3u8'},
+                    {'_cls': 'OutputUrl', 'id': 4, 'uri': 'http://localhost/relay/1.m3u8'}]}
+
+
+class SnapshotTest(unittest.TestCase):
+    def test_stream(self):
+        for raw in [PROXY, RELAY]:
+            snapshot = StreamSnapshot.from_raw(raw)
+            stream = IStream._from_son(raw)
+            self.assertEqual(snapshot.get_id(), stream.get_id())
+            self.assertEqual(snapshot.get_type(), stream.get_type())
+            self.assertEqual(snapshot.main_group, stream.main_group)
+            self.assertEqual(snapshot.stable_name, stream.stable_name)
+            self.assertEqual(snapshot.generate_playlist(), stream.generate_playlist())
+
+        snapshot = StreamSnapshot.from_raw(RELAY)
+        self.assertEqual(snapshot.type, constants.StreamType.RELAY)
+        self.assertEqual(snapshot.groups, ())
+        self.assertEqual([out.uri for out in snapshot.output], [out['uri'] for out in RELAY['output']])
+        with self.assertRaises(AttributeError):
+            snapshot.name = 'Changed'
+
+    def test_service(self):
+        raw = {'_id': ObjectId(), 'name': 'Service', 'http_host': {'host': 'localhost', 'port': 8080},
+               'hls_directory': '/hls', 'streams': [RELAY['_id'], ObjectId(), PROXY['_id']]}
+        streams = {PROXY['_id']: StreamSnapshot.from_raw(PROXY), RELAY['_id']: StreamSnapshot.from_raw(RELAY)}
+        snapshot = ServiceSnapshot.from_raw(raw, streams)
+        service = ServiceSettings._from_son(raw)
+        self.assertEqual(snapshot.get_id(), service.get_id())
+        self.assertEqual(snapshot.name, service.name)
+        for host in ['get_host', 'get_http_host', 'get_vods_host', 'get_cods_host', 'get_nginx_host', 'get_rtmp_host']:
+            self.assertEqual(getattr(snapshot, host)(), getattr(service, host)())
+        self.assertEqual(snapshot.vods_directory, service.vods_directory)
+        self.assertEqual(snapshot.generate_http_link('/hls/1/master.m3u8'), 'http://localhost:8080/1/master.m3u8')
+
+        playlist = '#EXTM3U\n' + IStream._from_son(RELAY).generate_playlist(False) + \
+                   IStream._from_son(PROXY).generate_playlist(False)
+        self.assertEqual(snapshot.generate_playlist(), playlist)
+
+
+if __name__ == '__main__':
+    unittest.main()
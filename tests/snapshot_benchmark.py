@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+import argparse
+import tracemalloc
+
+from bson.objectid import ObjectId
+
+from pyfastocloud_models.stream.entry import IStream
+from pyfastocloud_models.stream.snapshot import StreamSnapshot
+
+
+def make_raw(i: int) -> dict:
+    return {'_id': ObjectId(), '_cls': 'IStream.ProxyStream', 'name': 'Channel {0}'.format(i),
+            'tvg_id': 'channel.{0}'.format(i), 'tvg_logo': 'http://logo/{0}.png'.format(i),
+            'groups': ['Group {0}'.format(i % 100)],
+            'output': [{'_cls': 'OutputUrl', 'id': i, 'uri': 'http://localhost/{0}/master.m3u8'.format(i)}]}
+
+
+def measure(build, raws) -> (int, list):
+    tracemalloc.start()
+    items = [build(raw) for raw in raws]
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return size, items
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='stream catalog memory benchmark')
+    parser.add_argument('--count', type=int, default=200000)
+    args = parser.parse_args()
+
+    raws = [make_raw(i) for i in range(args.count)]
+    documents_size, documents = measure(IStream._from_son, raws)
+    del documents
+    snapshots_size, snapshots = measure(StreamSnapshot.from_raw, raws)
+    print('streams: {0}'.format(args.count))
+    print('documents: {0:.1f}MiB'.format(documents_size / 1024 / 1024))
+    print('snapshots: {0:.1f}MiB'.format(snapshots_size / 1024 / 1024))
+    print('ratio: {0:.2f}x'.format(documents_size / snapshots_size))
@@ -2,7 +2,14 @@
 import datetime
 import unittest
 
-from pyfastocloud_models.stream.entry import ProxyStream, RelayStream, EncodeStream, OutputUrl, InputUrl
+from bson.objectid import ObjectId
+
+import pyfastocloud_models.constants as constants
+from pyfastocloud_models.service.entry import ServiceSettings, HostAndPort
+from pyfastocloud_models.stream.entry import IStream, ProxyStream, ProxyVodStream, RelayStream, EncodeStream, \
+    VodRelayStream, EventStream, OutputUrl, InputUrl
+from pyfastocloud_models.utils.m3u_parser import M3uParser
+from pyfastocloud_models.utils.serializer import mongo_dict, raw_mongo_dict
 
 
 class StreamsTest(unittest.TestCase):
@@ -81,6 +88,118 @@ class StreamsTest(unittest.TestCase):
         encode = EncodeStream.make_entry(data)
         self.assertTrue(encode.is_valid())
 
+    def test_m3u(self):
+        file = M3uParser._make_entry(
+            '#EXTINF:-1 tvg-id="first" tvg-logo="http://logo/1.png" group-title="Movies",First',
+            'http://localhost/1.m3u8')
+        proxy = ProxyStream.make_m3u_entry(file)
+        self.assertEqual(proxy.name, 'First')
+        self.assertEqual(proxy.tvg_id, 'first')
+        self.assertIsNone(proxy.tvg_name)
+        self.assertEqual(proxy.tvg_logo, 'http://logo/1.png')
+        self.assertEqual(proxy.groups, ['Movies'])
+        self.assertEqual(proxy.output[0].uri, 'http://localhost/1.m3u8')
+        self.assertTrue(proxy.is_valid())
+
+        vod = ProxyVodStream.make_m3u_entry(M3uParser._make_entry('#EXTINF:-1,Film', 'http://localhost/film.mp4'))
+        self.assertEqual(vod.groups, [])
+        self.assertTrue(vod.is_valid())
+
+        self.assertRaises(ValueError, ProxyStream.make_m3u_entry,
+                          M3uParser._make_entry('#EXTINF:-1,Invalid', 'localhost'))
+
+    def test_front_dict(self):
+        input_url = InputUrl(id=InputUrl.generate_id(), uri='http://localhost/input.m3u8')
+        output_url = OutputUrl(id=OutputUrl.generate_id(), uri='http://localhost/output.m3u8')
+        relay = RelayStream.make_entry({RelayStream.NAME_FIELD: 'Relay', RelayStream.GROUPS_FIELD: ['USA'],
+                                        RelayStream.INPUT_FIELD: [input_url.to_front_dict()],
+                                        RelayStream.OUTPUT_FIELD: [output_url.to_front_dict()]})
+        relay.id = ObjectId()
+        self.assertEqual(mongo_dict(relay), relay.to_mongo().to_dict())
+
+        legacy = relay.to_mongo()
+        legacy.pop('_cls')
+        legacy.pop('_id')
+        legacy[RelayStream.CREATED_DATE_FIELD] = relay.created_date_utc_msec()
+        legacy[RelayStream.TYPE_FIELD] = relay.get_type()
+        legacy[RelayStream.ID_FIELD] = relay.get_id()
+        legacy[RelayStream.OUTPUT_FIELD] = [output_url.to_front_dict()]
+        legacy[RelayStream.INPUT_FIELD] = [input_url.to_front_dict()]
+        legacy = legacy.to_dict()
+        front = relay.to_front_dict()
+        self.assertEqual(front, legacy)
+        self.assertEqual(list(front), list(legacy))
+        self.assertNotIn('_cls', front[RelayStream.INPUT_FIELD][0])
+
+    def test_raw_front_dict(self):
+        input_url = InputUrl(id=InputUrl.generate_id(), uri='http://localhost/input.m3u8')
+        output_url = OutputUrl(id=OutputUrl.generate_id(), uri='http://localhost/output.m3u8')
+        vod = VodRelayStream(id=ObjectId(), name='Vod', input=[input_url], output=[output_url], groups=['Movies'],
+                             prime_date=datetime.datetime(2020, 1, 1))
+        data = vod.to_mongo().to_dict()
+        front = IStream.raw_to_front_dict(data)
+        self.assertEqual(front, vod.to_front_dict())
+        self.assertEqual(list(front), list(vod.to_front_dict()))
+        self.assertEqual(front[IStream.TYPE_FIELD], constants.StreamType.VOD_RELAY)
+
+        # fields missing in old documents get their defaults as loaded documents do
+        for key in [VodRelayStream.PRIME_DATE_FIELD, VodRelayStream.LOG_LEVEL_FIELD, IStream.GROUPS_FIELD]:
+            data.pop(key)
+        loaded = IStream._from_son(data)
+        self.assertIsInstance(loaded, VodRelayStream)
+        self.assertEqual(IStream.raw_to_front_dict(data), loaded.to_front_dict())
+        self.assertEqual(raw_mongo_dict(VodRelayStream, data), loaded.to_mongo().to_dict())
+
+    def test_make_stream_entries(self):
+        output_url = OutputUrl(id=OutputUrl.generate_id(), uri='http://localhost/output.m3u8')
+        jsons = []
+        for i in range(5):
+            jsons.append({IStream.TYPE_FIELD: constants.StreamType.PROXY, IStream.NAME_FIELD: 'Proxy {0}'.format(i),
+                          IStream.OUTPUT_FIELD: [output_url.to_front_dict()]})
+        jsons[1] = {IStream.TYPE_FIELD: constants.StreamType.PROXY, IStream.OUTPUT_FIELD: []}
+        jsons[3] = {}
+        # parsed, but the required input is empty
+        jsons.append({IStream.TYPE_FIELD: constants.StreamType.ENCODE, IStream.NAME_FIELD: 'Encode',
+                      IStream.OUTPUT_FIELD: [output_url.to_front_dict()], EncodeStream.INPUT_FIELD: []})
+
+        for workers in [None, 2]:
+            streams, failures = IStream.make_stream_entries(jsons, workers=workers, chunk_size=2)
+            self.assertEqual([stream.name for stream in streams], ['Proxy 0', 'Proxy 2', 'Proxy 4'])
+            self.assertTrue(all(isinstance(stream, ProxyStream) for stream in streams))
+            self.assertEqual([failure['index'] for failure in failures], [1, 3, 5])
+
+        proxy = IStream.make_stream_entry(jsons[0])
+        self.assertIsInstance(proxy, ProxyStream)
+        self.assertEqual(proxy.output, [output_url])
+
+    def test_make_event_entry(self):
+        input_url = InputUrl(id=InputUrl.generate_id(), uri='http://localhost/input.m3u8')
+        output_url = OutputUrl(id=OutputUrl.generate_id(), uri='http://localhost/output.m3u8')
+        event = EventStream(name='Event', input=[input_url], output=[output_url], description='Final',
+                            prime_date=datetime.datetime(2020, 1, 1))
+        made = IStream.make_stream_entry(event.to_front_dict())
+        self.assertIsInstance(made, EventStream)
+        self.assertEqual(made.get_type(), constants.StreamType.EVENT)
+        self.assertEqual(made.description, 'Final')
+        self.assertEqual(made.prime_date, event.prime_date)
+
+    def test_fixup_unchanged_output(self):
+        settings = ServiceSettings(http_host=HostAndPort(host='localhost', port=8000))
+        output_url = OutputUrl(id=OutputUrl.generate_id(), uri='http://localhost/master.m3u8')
+        relay = RelayStream(id=ObjectId(), name='Relay', input=[InputUrl(id=InputUrl.generate_id(), uri='http://in')],
+                            output=[output_url])
+        relay.fixup_output_urls(settings)
+        self.assertNotEqual(relay.output[0].uri, output_url.uri)
+
+        loaded = IStream._from_son(relay.to_mongo())
+        loaded.fixup_output_urls(settings)
+        self.assertEqual(loaded._get_changed_fields(), [])
+
+        settings.hls_directory = '/hls'
+        loaded.fixup_output_urls(settings)
+        self.assertEqual(loaded._get_changed_fields(), ['output.0'])
+        self.assertTrue(loaded.output[0].http_root.startswith('/hls/'))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -1,9 +1,18 @@
 #!/usr/bin/env python3
 import datetime
 import unittest
+from unittest import mock
 
-from pyfastocloud_models.stream.entry import ProxyStream, OutputUrl
-from pyfastocloud_models.subscriber.entry import Subscriber, UserStream
+from mongoengine import Document
+
+try:
+    import mongomock
+except ImportError:
+    mongomock = None
+
+from pyfastocloud_models.service.entry import ServiceSettings
+from pyfastocloud_models.stream.entry import IStream, ProxyStream, OutputUrl
+from pyfastocloud_models.subscriber.entry import Subscriber, UserStream, Device
 
 
 class Subscribers(unittest.TestCase):
@@ -52,5 +61,41 @@ class Subscribers(unittest.TestCase):
         self.assertTrue(sub.is_valid())
 
 
+@unittest.skipUnless(mongomock, 'mongomock is not installed')
+class SubscribersFrontDictTest(unittest.TestCase):
+    def setUp(self):
+        self.db = mongomock.MongoClient().iptv
+        self.patches = [mock.patch.object(cls, '_get_collection', return_value=self.db[cls._meta['collection']])
+                        for cls in [IStream, ServiceSettings, Subscriber]]
+        # references are loaded through the database
+        self.patches.append(mock.patch.object(Document, '_get_db', return_value=self.db))
+        for patch in self.patches:
+            patch.start()
+
+    def tearDown(self):
+        for patch in self.patches:
+            patch.stop()
+
+    def test_iter_front_dicts(self):
+        server = ServiceSettings()
+        server.save()
+        stream = ProxyStream(name='Stream', output=[OutputUrl(id=1, uri='http://localhost/1.m3u8')])
+        stream.save()
+        Subscriber(email='first@test.com', first_name='First', last_name='User', password='0' * 32, country='GB',
+                   servers=[server], devices=[Device(), Device()], streams=[UserStream(sid=stream)]).save()
+        Subscriber(email='second@test.com', first_name='Second', last_name='User', password='1' * 32, country='US',
+                   language='ru', status=Subscriber.Status.ACTIVE, max_devices_count=3).save()
+        # stored by older versions without defaults
+        self.db.subscribers.insert_one({'email': 'raw@test.com', 'first_name': 'Raw', 'last_name': 'User',
+                                        'password': '2' * 32, 'country': 'DE',
+                                        'created_date': datetime.datetime(2020, 1, 1)})
+
+        fronts = list(Subscriber.iter_front_dicts())
+        self.assertEqual(fronts, [subscriber.to_front_dict() for subscriber in Subscriber.objects.all()])
+        self.assertEqual(fronts[0][Subscriber.SERVERS_FIELD], [server.get_id()])
+        self.assertEqual(fronts[0][Subscriber.DEVICES_COUNT_FIELD], 2)
+        self.assertEqual(list(Subscriber.iter_front_dicts({'country': 'US'})), [fronts[1]])
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+import unittest
+from unittest import mock
+
+from bson.objectid import ObjectId
+
+try:
+    import mongomock
+except ImportError:
+    mongomock = None
+
+from pyfastocloud_models.series.entry import Serial
+from pyfastocloud_models.service.entry import ServiceSettings
+from pyfastocloud_models.stream.entry import IStream, ProxyStream, OutputUrl
+from pyfastocloud_models.stream.uri_index import StreamUriIndex
+from pyfastocloud_models.subscriber.entry import Subscriber
+from pyfastocloud_models.utils.utils import normalize_uri
+
+
+class StreamUriIndexTest(unittest.TestCase):
+    def test_normalize(self):
+        self.assertEqual(normalize_uri('HTTP://Example.COM:80/live/1.m3u8?token=2&a=1'),
+                         'http://example.com/live/1.m3u8?a=1&token=2')
+        self.assertEqual(normalize_uri('https://example.com:443'), 'https://example.com/')
+        self.assertEqual(normalize_uri('https://example.com:8443/x'), 'https://example.com:8443/x')
+        self.assertEqual(normalize_uri('rtmp://Example.com:1935/live/Key'), 'rtmp://example.com/live/Key')
+        self.assertEqual(normalize_uri('test'), 'test')
+
+    def test_index(self):
+        first, second, third = ObjectId(), ObjectId(), ObjectId()
+        index = StreamUriIndex()
+        index.add(first, ['http://example.com/1.m3u8?b=1&a=2', 'test'])
+        index.add(second, ['HTTP://EXAMPLE.com:80/1.m3u8?a=2&b=1'])
+        index.add(third, ['http://example.com/3.m3u8', 'udp://239.0.0.1:1234'])
+        self.assertTrue(index.contains('http://example.com/1.m3u8?a=2&b=1'))
+        self.assertFalse(index.contains('test'))
+        self.assertEqual(index.find('http://example.com:80/3.m3u8'), [third])
+        self.assertEqual(index.duplicates(), {'http://example.com/1.m3u8?a=2&b=1': [first, second]})
+
+        index.remove(second)
+        self.assertEqual(index.duplicates(), {})
+        index.remove(third)
+        self.assertFalse(index.contains('udp://239.0.0.1:1234'))
+
+
+@unittest.skipUnless(mongomock, 'mongomock is not installed')
+class StreamUriIndexMergeTest(unittest.TestCase):
+    def setUp(self):
+        self.db = mongomock.MongoClient().iptv
+        self.patches = [mock.patch.object(cls, '_get_collection', return_value=self.db[cls._meta['collection']])
+                        for cls in [IStream, ServiceSettings, Subscriber, Serial]]
+        for patch in self.patches:
+            patch.start()
+
+    def tearDown(self):
+        for patch in self.patches:
+            patch.stop()
+
+    @staticmethod
+    def make_stream(name: str, uri: str) -> ObjectId:
+        stream = ProxyStream(name=name, output=[OutputUrl(id=OutputUrl.generate_id(), uri=uri)])
+        stream.save()
+        return stream.id
+
+    def test_merge(self):
+        keep = self.make_stream('keep', 'http://example.com/1.m3u8')
+        first = self.make_stream('first', 'HTTP://EXAMPLE.com:80/1.m3u8')
+        second = self.make_stream('second', 'http://example.com/1.m3u8?')
+        other = self.make_stream('other', 'http://example.com/2.m3u8')
+        self.db.services.insert_one({'streams': [other, first, keep, second]})
+        self.db.series.insert_one({'episodes': [second, other, first]})
+        self.db.streams.update_one({'_id': other}, {'$set': {'parts': [first, other]}})
+        self.db.subscribers.insert_one({'streams': [{'sid': other}, {'sid': second, 'private': False}],
+                                        'vods': [], 'catchups': []})
+
+        index = StreamUriIndex.build([keep, first, second, other])
+        self.assertEqual(index.duplicates(), {'http://example.com/1.m3u8': [keep, first, second]})
+        self.assertEqual(StreamUriIndex.build([keep, other]).duplicates(), {})
+
+        index.merge(keep, [first, second])
+        self.assertEqual(index.duplicates(), {})
+        self.assertEqual(self.db.services.find_one()['streams'], [other, keep])
+        self.assertEqual(self.db.series.find_one()['episodes'], [keep, other])
+        self.assertEqual(self.db.streams.find_one({'_id': other})['parts'], [keep, other])
+        self.assertEqual(self.db.subscribers.find_one()['streams'], [{'sid': other}, {'sid': keep, 'private': False}])
+        self.assertEqual(sorted(doc['name'] for doc in self.db.streams.find()), ['keep', 'other'])
+
+
+if __name__ == '__main__':
+    unittest.main()
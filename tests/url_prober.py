@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+import threading
+import unittest
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from pyfastocloud_models.utils.url_prober import UrlProber
+
+
+class ProbeHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    lock = threading.Lock()
+    requests = 0
+    active = 0
+    max_active = 0
+
+    def do_HEAD(self):
+        with ProbeHandler.lock:
+            ProbeHandler.requests += 1
+            ProbeHandler.active += 1
+            ProbeHandler.max_active = max(ProbeHandler.max_active, ProbeHandler.active)
+        self.send_response(200 if self.path.startswith('/live/') else 404)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+        with ProbeHandler.lock:
+            ProbeHandler.active -= 1
+
+    def log_message(self, *args):
+        pass
+
+
+class UrlProberTest(unittest.TestCase):
+    def test_probe_many(self):
+        server = ThreadingHTTPServer(('127.0.0.1', 0), ProbeHandler)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        prober = UrlProber(workers=16, per_host=4)
+        try:
+            root = 'http://127.0.0.1:{0}'.format(server.server_port)
+            urls = ['{0}/live/{1}.m3u8'.format(root, i) for i in range(200)]
+            urls.append('{0}/missing.m3u8'.format(root))
+            urls.append('udp://239.0.0.1:1234')
+            urls.append('http://127.0.0.1:1/closed.m3u8')
+            result = prober.probe_many(urls + urls[:10])
+            self.assertEqual(len(result), 202)
+            self.assertTrue(all(result[(url, None)] for url in urls[:200]))
+            self.assertFalse(result[(urls[200], None)])
+            self.assertFalse(result[(urls[202], None)])
+            self.assertNotIn((urls[201], None), result)
+            self.assertEqual(ProbeHandler.requests, 201)
+            self.assertLessEqual(ProbeHandler.max_active, 4)
+
+            # cached
+            self.assertTrue(prober.probe(urls[0]))
+            self.assertEqual(ProbeHandler.requests, 201)
+            prober.clear_cache()
+            self.assertTrue(prober.probe(urls[0]))
+            self.assertEqual(ProbeHandler.requests, 202)
+        finally:
+            prober.close()
+            server.shutdown()
+            server.server_close()
+
+
+if __name__ == '__main__':
+    unittest.main()